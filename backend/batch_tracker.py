@@ -0,0 +1,371 @@
+"""
+Background tracker for submitted OpenAI batches.
+
+Instead of every open UI tab polling OpenAI through /api/v1/llm-batch/status,
+one poller per process keeps the latest status of each tracked batch in
+memory (persisted to SQLite so tracking survives restarts) and pushes
+changes to subscribers over SSE.
+
+Polling is adaptive: batches that are validating / finalizing are checked
+every `min_interval` seconds, in-progress batches less often the longer they
+have been running (a tenth of the time spent in that status, capped at
+`max_interval`), and finished batches not at all. API errors back off
+exponentially. Batches tracked with `auto_download` are unpacked with
+`llm_batch.fetch_results` as soon as they complete.
+"""
+import asyncio
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+import llm_batch
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    tracked_at REAL NOT NULL,
+    status_since REAL NOT NULL,
+    auto_download INTEGER NOT NULL DEFAULT 0,
+    output_folder TEXT NOT NULL DEFAULT '',
+    download TEXT
+);
+"""
+
+
+def batch_info(batch_job) -> dict:
+    counts = batch_job.request_counts
+    return {
+        "batch_id": batch_job.id,
+        "status": batch_job.status,
+        "completed": counts.completed if counts else 0,
+        "failed": counts.failed if counts else 0,
+        "total": counts.total if counts else 0,
+        "created_at": batch_job.created_at,
+        "output_file_id": batch_job.output_file_id,
+        "error_file_id": batch_job.error_file_id,
+    }
+
+
+class _Entry:
+    def __init__(self, batch_id: str, tracked_at: float, status_since: float, auto_download: bool, output_folder: str):
+        self.batch_id = batch_id
+        self.info: dict = {"batch_id": batch_id, "status": None}
+        self.tracked_at = tracked_at
+        self.status_since = status_since
+        self.auto_download = auto_download
+        self.output_folder = output_folder
+        self.download: dict | None = None
+        self.next_poll = 0.0
+        self.errors = 0
+        self.polled = asyncio.Event()
+
+    @property
+    def terminal(self) -> bool:
+        return self.info.get("status") in TERMINAL_STATUSES
+
+    def view(self) -> dict:
+        return {**self.info, "auto_download": self.auto_download, "download": self.download}
+
+
+class BatchTracker:
+    def __init__(
+        self,
+        path: pathlib.Path,
+        client_factory: Callable,
+        min_interval: float = 5.0,
+        max_interval: float = 300.0,
+        concurrency: int = 4,
+        retention: float = 30 * 86400.0,
+    ):
+        self.path = pathlib.Path(path)
+        self.client_factory = client_factory
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.concurrency = concurrency
+        self.retention = retention
+
+        self._entries: dict[str, _Entry] = {}
+        self._subscribers: set[asyncio.Queue] = set()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._downloads: set[asyncio.Task] = set()
+        self._client = None
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+        self.polls = 0
+        self.api_errors = 0
+        self.pushes = 0
+
+    # ── Persistence ─────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _load_sync(self) -> list[tuple]:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM batches WHERE tracked_at < ?", (time.time() - self.retention,))
+            db.commit()
+            return db.execute(
+                "SELECT batch_id, info, tracked_at, status_since, auto_download, output_folder, download FROM batches"
+            ).fetchall()
+
+    def _save_sync(self, entry: _Entry):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, info, tracked_at, status_since, auto_download, output_folder, download) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.batch_id,
+                    json.dumps(entry.info, ensure_ascii=False),
+                    entry.tracked_at,
+                    entry.status_since,
+                    int(entry.auto_download),
+                    entry.output_folder,
+                    json.dumps(entry.download, ensure_ascii=False) if entry.download is not None else None,
+                ),
+            )
+            db.commit()
+
+    async def _save(self, entry: _Entry):
+        await asyncio.to_thread(self._save_sync, entry)
+
+    # ── Lifecycle ───────────────────────────────────────
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        for batch_id, info, tracked_at, status_since, auto_download, output_folder, download in await asyncio.to_thread(self._load_sync):
+            entry = _Entry(batch_id, tracked_at, status_since, bool(auto_download), output_folder)
+            entry.info = json.loads(info)
+            entry.download = json.loads(download) if download else None
+            if entry.info.get("status") is not None:
+                entry.polled.set()
+            self._entries[batch_id] = entry
+            if entry.terminal and entry.auto_download and entry.download is None:
+                self._start_download(entry)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        tasks = [t for t in (self._task, *self._downloads) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    # ── Public API ──────────────────────────────────────
+
+    async def track(self, batch_ids: list[str], auto_download: bool = False, output_folder: str = ""):
+        """Start tracking batches (no-op for ones already tracked, except enabling auto-download)."""
+        now = time.time()
+        for batch_id in dict.fromkeys(batch_ids):
+            entry = self._entries.get(batch_id)
+            if entry is None:
+                entry = self._entries[batch_id] = _Entry(batch_id, now, now, auto_download, output_folder)
+                await self._save(entry)
+            elif auto_download and not entry.auto_download:
+                entry.auto_download = True
+                entry.output_folder = output_folder
+                await self._save(entry)
+                if entry.terminal and entry.download is None:
+                    self._start_download(entry)
+        self._wake.set()
+
+    async def status(self, batch_ids: list[str], timeout: float = 5.0) -> list[dict]:
+        """Cached status; batches seen for the first time are tracked from now on.
+
+        Waits up to `timeout` seconds for the first poll of new batches, then
+        answers with what is known: a batch not polled yet is `pending` with
+        `polled: false`, and later updates arrive over the tracker's SSE.
+        """
+        new = [batch_id for batch_id in batch_ids if batch_id not in self._entries]
+        if new:
+            await self.track(new)
+        waiting = [self._entries[b].polled.wait() for b in batch_ids if not self._entries[b].polled.is_set()]
+        if waiting:
+            try:
+                await asyncio.wait_for(asyncio.gather(*waiting), timeout)
+            except asyncio.TimeoutError:
+                pass
+        views = []
+        for batch_id in batch_ids:
+            entry = self._entries[batch_id]
+            view = {**entry.view(), "polled": entry.polled.is_set()}
+            if view["status"] is None:
+                view["status"] = "pending"
+            views.append(view)
+        return views
+
+    async def observe(self, infos: list[dict]):
+        """Fold statuses fetched elsewhere (e.g. batches.list) into tracked entries."""
+        now = time.time()
+        for info in infos:
+            entry = self._entries.get(info["batch_id"])
+            if entry is not None and info != entry.info:
+                await self._update(entry, info, now)
+
+    def snapshot(self, batch_ids: list[str] | None = None) -> list[dict]:
+        ids = batch_ids if batch_ids is not None else list(self._entries)
+        return [self._entries[b].view() for b in ids if b in self._entries]
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def stats(self) -> dict:
+        active = [e for e in self._entries.values() if not e.terminal]
+        now = time.time()
+        return {
+            "tracked": len(self._entries),
+            "active": len(active),
+            "next_poll_in_s": round(max(0.0, min((e.next_poll for e in active), default=now) - now), 1) if active else None,
+            "polls": self.polls,
+            "api_errors": self.api_errors,
+            "pushes": self.pushes,
+            "subscribers": len(self._subscribers),
+            "downloads_running": len(self._downloads),
+        }
+
+    # ── Polling ─────────────────────────────────────────
+
+    def _publish(self, event: dict):
+        self.pushes += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass  # a stalled client misses intermediate updates, not the final state
+
+    def _interval(self, entry: _Entry, now: float) -> float:
+        if entry.errors:
+            return min(self.max_interval, self.min_interval * (2 ** entry.errors))
+        if entry.info.get("status") == "in_progress":
+            return max(self.min_interval * 2, min(self.max_interval, (now - entry.status_since) / 10))
+        return self.min_interval
+
+    async def _poll(self, entry: _Entry, client):
+        now = time.time()
+        try:
+            info = batch_info(await client.batches.retrieve(entry.batch_id))
+        except Exception as e:
+            self.api_errors += 1
+            entry.errors += 1
+            if getattr(e, "status_code", None) == 404:
+                info = {**entry.info, "status": "failed", "error": "Batch not found"}
+            else:
+                entry.next_poll = now + self._interval(entry, now)
+                entry.polled.set()  # answer with the last known status
+                return
+        self.polls += 1
+        entry.errors = 0
+        await self._update(entry, info, now)
+
+    async def _update(self, entry: _Entry, info: dict, now: float):
+        if info.get("status") != entry.info.get("status"):
+            entry.status_since = now
+        changed = info != entry.info
+        entry.info = info
+        entry.next_poll = now + self._interval(entry, now)
+        entry.polled.set()
+        if changed:
+            await self._save(entry)
+            self._publish({"type": "status", **entry.view()})
+        if entry.terminal and entry.auto_download and entry.download is None:
+            self._start_download(entry)
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def poll(entry: _Entry, client):
+            async with semaphore:
+                try:
+                    await self._poll(entry, client)
+                except Exception:
+                    # e.g. a failed _save: keep tracking this batch, retry after the usual interval
+                    logger.exception("Polling batch %s failed", entry.batch_id)
+                    now = time.time()
+                    entry.next_poll = max(entry.next_poll, now + self._interval(entry, now))
+                    entry.polled.set()
+
+        while True:
+            self._wake.clear()
+            now = time.time()
+            due = [e for e in self._entries.values() if not e.terminal and e.next_poll <= now]
+            if due:
+                try:
+                    client = self._get_client()
+                    if client is None:
+                        # No API key yet: release waiters and retry later.
+                        for entry in due:
+                            entry.next_poll = now + self.max_interval
+                            entry.polled.set()
+                    else:
+                        await asyncio.gather(*(poll(entry, client) for entry in due))
+                except Exception:
+                    # One bad iteration must not stop tracking for the rest of the process.
+                    logger.exception("Batch tracker poll loop failed; retrying")
+                    for entry in due:
+                        entry.next_poll = max(entry.next_poll, now + self.min_interval)
+                        entry.polled.set()
+            active = [e.next_poll for e in self._entries.values() if not e.terminal]
+            delay = max(0.05, min(active) - time.time()) if active else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # ── Auto-download ───────────────────────────────────
+
+    def _start_download(self, entry: _Entry):
+        if any(t.get_name() == entry.batch_id for t in self._downloads):
+            return
+        task = asyncio.create_task(self._download(entry), name=entry.batch_id)
+        self._downloads.add(task)
+        task.add_done_callback(self._downloads.discard)
+
+    async def _download(self, entry: _Entry):
+        client = self._get_client()
+        if client is None:
+            return
+        output_dir = pathlib.Path(entry.output_folder) if entry.output_folder else pathlib.Path.cwd() / "batch_results"
+        try:
+            summary = await llm_batch.fetch_results(client, [entry.batch_id], output_dir, concurrency=1)
+            entry.download = {
+                "output_folder": summary["output_folder"],
+                "files": summary["total_files"],
+                "rejected": summary["rejected_count"],
+                "failed": summary["failed_count"],
+                "error": summary["batches"][0].get("error", ""),
+            }
+        except Exception as e:
+            entry.download = {"output_folder": str(output_dir), "files": 0, "rejected": 0, "failed": 0, "error": str(e)}
+        await self._save(entry)
+        self._publish({"type": "downloaded", **entry.view()})
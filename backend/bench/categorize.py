@@ -0,0 +1,118 @@
+"""
+Micro-benchmark for the link categorizer.
+
+Compares the original hand-written `categorize_link` (kept below as the
+reference) with the compiled `link_rules.LinkCategorizer`, per link and in
+bulk, on a synthetic set of links shaped like Korean public-sector sites.
+Every link must get the same category from both; a mismatch fails the run.
+
+Usage (from backend/):
+    python bench/categorize.py
+    python bench/categorize.py --links 200000 --repeat 5 --json categorize.json
+    python bench/categorize.py --rules my_rules.json   # time a custom rule set (no parity check)
+"""
+import argparse
+import json
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from link_rules import LinkCategorizer  # noqa: E402
+
+
+def reference_categorize_link(url: str, text: str) -> str:
+    """The collector's categorizer before it was made rule-driven."""
+    url_lower = url.lower()
+    text_lower = text.lower()
+
+    file_extensions = [
+        '.pdf', '.zip', '.rar', '.hwp', '.doc', '.docx',
+        '.xls', '.xlsx', '.ppt', '.pptx', '.csv',
+        '.png', '.jpg', '.jpeg', '.gif', '.mp3', '.mp4', '.avi'
+    ]
+    if any(url_lower.endswith(ext) or (ext + '?') in url_lower for ext in file_extensions):
+        return 'File Download'
+
+    board_keywords = ['board', 'forum', 'bbs', 'view', 'article', 'notice', 'list.do', 'view.do']
+    if any(kw in url_lower for kw in board_keywords) or any(kw in text_lower for kw in ['게시판', '공지사항', '자료실', '목록']):
+        return 'Board/Forum'
+
+    return 'Standard'
+
+
+_PATHS = [
+    "/", "/about/company", "/ko/sub/page.html", "/main/main.do", "/contents/view.do?menuNo=200",
+    "/board/list.do?bbsId=NOTICE", "/bbs/BoardView.php?no=17", "/news/article/2024/05",
+    "/files/report_2024.PDF", "/upload/attach/doc.hwp?fileSn=3", "/img/banner.jpg?w=640",
+    "/download.do?file=form.xlsx", "/media/intro.mp4", "/en/contact", "/sitemap",
+]
+_TEXTS = ["", "홈", "기관소개", "공지사항", "자료실 바로가기", "게시판", "Download", "Read more", "목록으로", "채용정보"]
+
+
+def make_links(count: int, seed: int = 7) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    links = []
+    for _ in range(count):
+        host = f"www.{rng.choice(['mois', 'moel', 'seoul', 'busan', 'example'])}.go.kr"
+        path = rng.choice(_PATHS)
+        if rng.random() < 0.3:
+            path += f"/{rng.randint(1, 99999)}"
+        links.append((f"https://{host}{path}", rng.choice(_TEXTS)))
+    return links
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--links", type=int, default=50_000, help="number of synthetic links")
+    ap.add_argument("--repeat", type=int, default=3, help="timing iterations (best is reported)")
+    ap.add_argument("--rules", help="JSON rule file to benchmark instead of the built-in rules")
+    ap.add_argument("--json", help="write machine-readable results to this file")
+    args = ap.parse_args()
+
+    links = make_links(args.links)
+    categorizer = LinkCategorizer.from_file(args.rules) if args.rules else LinkCategorizer()
+
+    mismatches = []
+    if not args.rules:
+        for url, text in links:
+            expected = reference_categorize_link(url, text)
+            got = categorizer.categorize(url, text)
+            if got != expected:
+                mismatches.append({"url": url, "text": text, "expected": expected, "got": got})
+
+    timings = {
+        "reference": _time(lambda: [reference_categorize_link(u, t) for u, t in links], args.repeat),
+        "compiled": _time(lambda: [categorizer.categorize(u, t) for u, t in links], args.repeat),
+        "compiled_bulk": _time(lambda: categorizer.categorize_many(links), args.repeat),
+    }
+
+    report = {"links": len(links), "mismatches": len(mismatches), "examples": mismatches[:10], "us_per_link": {}}
+    base = timings["reference"]
+    for name, elapsed in timings.items():
+        us = elapsed / len(links) * 1e6
+        report["us_per_link"][name] = round(us, 3)
+        print(f"{name:14s} {us:7.2f} us/link   x{base / elapsed:5.2f}")
+    if not args.rules:
+        print(f"parity: {'identical' if not mismatches else f'{len(mismatches)} mismatches'}")
+        for m in mismatches[:10]:
+            print(f"    {m['url']} [{m['text']}] expected {m['expected']}, got {m['got']}")
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
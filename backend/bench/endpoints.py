@@ -0,0 +1,490 @@
+"""
+End-to-end benchmark of the backend endpoints against local stand-ins.
+
+Starts bench/fake_site.py (generated site with slow pages, 429s and redirects)
+and bench/fake_openai.py, launches the backend with uvicorn in a subprocess
+with throw-away caches, and runs these suites:
+
+    crawl            POST /api/v1/crawl for --crawl-requests pages, --concurrency at a time
+    collect_links    POST /api/v1/collect-links from the root, --repeat times
+    batch_crawl      POST /api/v1/batch-crawl over --batch-pages pages
+    analyze          postprocess.process_page (analyze_structure + html2text) in-process
+    llm_batch        convert → submit → status until done → results, on fake OpenAI
+
+Each suite reports count / ok / failed, wall seconds, throughput, latency
+percentiles (per request, page or job) and the peak RSS of the backend
+process and of the backend plus its browsers (RSS needs `pip install psutil`;
+without it the RSS columns are empty). Use --json to keep the result
+and --baseline to compare with an earlier one: throughput drops, p95 rises
+and peak RSS growth beyond --tolerance are listed and make the run exit 1.
+
+Usage (from backend/):
+    python bench/endpoints.py
+    python bench/endpoints.py --pages 500 --slow-rate 0.05 --rate-limit-rate 0.02 --json before.json
+    python bench/endpoints.py --suites crawl,batch_crawl --baseline before.json --json after.json
+    python bench/endpoints.py --suites crawl,batch_crawl --js-rate 0.1 --env VCRAWL_FETCH_STRATEGY=auto
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+try:
+    import psutil
+except ImportError:  # optional: only the peak RSS columns need it
+    psutil = None
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "bench"))
+
+from fake_openai import FakeOpenAI  # noqa: E402
+from fake_site import FakeSite  # noqa: E402
+
+SUITES = ("crawl", "collect_links", "batch_crawl", "analyze", "llm_batch")
+
+
+# ── Measurement ─────────────────────────────────────────
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None, "mean": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+    return {
+        "p50": round(pick(0.50) * 1000, 1),
+        "p95": round(pick(0.95) * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+        "mean": round(statistics.fmean(ordered) * 1000, 1),
+    }
+
+
+class RssSampler:
+    """Samples the RSS of a process (and its children) in a background thread."""
+
+    def __init__(self, pid: int, interval: float = 0.1, children: bool = True):
+        self.process = psutil.Process(pid) if psutil is not None else None
+        self.interval = interval
+        self.children = children
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.reset()
+
+    def reset(self):
+        self.peak_self = 0
+        self.peak_tree = 0
+
+    def sample(self):
+        if self.process is None:
+            return
+        try:
+            own = self.process.memory_info().rss
+            tree = own
+            for child in self.process.children(recursive=True) if self.children else ():
+                try:
+                    tree += child.memory_info().rss
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            return
+        self.peak_self = max(self.peak_self, own)
+        self.peak_tree = max(self.peak_tree, tree)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "RssSampler":
+        if self.process is not None:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def peaks(self) -> dict:
+        if self.process is None:
+            return {"peak_rss_mb": None, "peak_rss_tree_mb": None}
+        self.sample()
+        return {
+            "peak_rss_mb": round(self.peak_self / 2**20, 1),
+            "peak_rss_tree_mb": round(self.peak_tree / 2**20, 1),
+        }
+
+
+def suite_result(count: int, ok: int, seconds: float, latencies: list[float], rss: dict, **extra) -> dict:
+    return {
+        "count": count,
+        "ok": ok,
+        "failed": count - ok,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(count / seconds, 3) if seconds else None,
+        "latency_ms": percentiles(latencies),
+        **rss,
+        **extra,
+    }
+
+
+async def read_sse(response: httpx.Response):
+    """Yield (arrival time, event) for each `data:` line of an SSE response."""
+    async for line in response.aiter_lines():
+        if line.startswith("data: "):
+            yield time.perf_counter(), json.loads(line[6:])
+
+
+# ── Backend ─────────────────────────────────────────────
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(workdir: pathlib.Path, openai_url: str, extra_env: dict) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": openai_url,
+        "VCRAWL_PAGE_CACHE_PATH": str(workdir / "page_cache.db"),
+        "VCRAWL_LLM_CACHE_PATH": str(workdir / "llm_cache.db"),
+        "VCRAWL_JOB_DB_PATH": str(workdir / "jobs.db"),
+        "VCRAWL_BATCH_TRACKER_PATH": str(workdir / "batches.db"),
+        "VCRAWL_EXPORT_DIR": str(workdir / "exports"),
+        "VCRAWL_BATCH_POLL_MIN": "0.5",
+        **extra_env,
+    }
+    log = open(workdir / "backend.log", "wb")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {proc.returncode}; see {workdir / 'backend.log'}")
+        try:
+            if httpx.get(f"{base}/api/v1/pool/stats", timeout=1).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Backend did not start within 60s")
+
+
+# ── Suites ──────────────────────────────────────────────
+
+async def bench_crawl(client: httpx.AsyncClient, base: str, site: FakeSite, args, rss: RssSampler, workdir: pathlib.Path) -> dict:
+    urls = [site.page_url(n % site.pages) for n in range(args.crawl_requests)]
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies, ok = [], 0
+
+    async def one(url: str):
+        nonlocal ok
+        async with sem:
+            started = time.perf_counter()
+            r = await client.post(f"{base}/api/v1/crawl", json={"url": url, "cache_mode": args.cache_mode})
+            latencies.append(time.perf_counter() - started)
+            ok += bool(r.status_code == 200 and r.json().get("success"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    return suite_result(len(urls), ok, time.perf_counter() - started, latencies, rss.peaks())
+
+
+async def bench_collect_links(client: httpx.AsyncClient, base: str, site: FakeSite, args, rss: RssSampler, workdir: pathlib.Path) -> dict:
+    durations, pages, links, ok = [], 0, 0, 0
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        body = {"url": site.page_url(0), "depth": args.depth, "max_urls": site.pages, "cache_mode": args.cache_mode}
+        run_started = time.perf_counter()
+        done = None
+        async with client.stream("POST", f"{base}/api/v1/collect-links", json=body) as r:
+            async for _, event in read_sse(r):
+                if event.get("type") in ("done", "error"):
+                    done = event
+        durations.append(time.perf_counter() - run_started)
+        if done and done["type"] == "done":
+            if not done["total_internal"]:
+                # Every link classed as external means only the root page was measured.
+                raise RuntimeError(f"collect-links found no internal links on {site.base_url} (pages_ok={done['pages_ok']})")
+            ok += 1
+            pages += done["pages_ok"]
+            links += done["total_internal"]
+    seconds = time.perf_counter() - started
+    return suite_result(
+        args.repeat, ok, seconds, durations, rss.peaks(),
+        pages=pages, pages_per_s=round(pages / seconds, 3) if seconds else None, internal_links=links,
+    )
+
+
+async def bench_batch_crawl(client: httpx.AsyncClient, base: str, site: FakeSite, args, rss: RssSampler, workdir: pathlib.Path) -> dict:
+    count = min(args.batch_pages, site.pages)
+    body = {
+        "links": [{"href": site.page_url(n), "text": f"Page {n}"} for n in range(count)],
+        "output_folder_name": f"vcrawl-bench-{int(time.time())}",
+        "concurrency": args.concurrency,
+        "cache_mode": args.cache_mode,
+    }
+    began: dict[int, float] = {}
+    latencies, ok, folder = [], 0, None
+    started = time.perf_counter()
+    async with client.stream("POST", f"{base}/api/v1/batch-crawl", json=body) as r:
+        async for at, event in read_sse(r):
+            if event.get("type") == "progress":
+                if event["status"] == "crawling":
+                    began[event["current"]] = at
+                elif event["current"] in began:
+                    latencies.append(at - began.pop(event["current"]))
+                    ok += event["status"] == "done"
+            elif event.get("type") == "complete":
+                folder = event["folder_path"]
+            elif event.get("type") == "error":
+                break
+    seconds = time.perf_counter() - started
+    if folder and not args.keep_output:
+        shutil.rmtree(folder, ignore_errors=True)
+    return suite_result(count, ok, seconds, latencies, rss.peaks())
+
+
+async def bench_analyze(client: httpx.AsyncClient, base: str, site: FakeSite, args, rss: RssSampler, workdir: pathlib.Path) -> dict:
+    import postprocess
+
+    parser = os.getenv("VCRAWL_HTML_PARSER", "html.parser")
+    count = min(args.analyze_pages, site.pages)
+    pages = [site.render(n) for n in range(count)]
+    own = RssSampler(os.getpid(), children=False).start()
+    latencies = []
+    started = time.perf_counter()
+    for html in pages:
+        page_started = time.perf_counter()
+        postprocess.process_page(html, parser)
+        latencies.append(time.perf_counter() - page_started)
+    seconds = time.perf_counter() - started
+    own.stop()
+    # Runs in this process, not the backend: RSS is the benchmark process's.
+    return suite_result(count, count, seconds, latencies, own.peaks(), parser=parser)
+
+
+async def bench_llm_batch(client: httpx.AsyncClient, base: str, site: FakeSite, args, rss: RssSampler, workdir: pathlib.Path) -> dict:
+    docs = workdir / "llm_docs"
+    docs.mkdir(exist_ok=True)
+    for n in range(args.llm_docs):
+        (docs / f"{n:04d}_page.md").write_text(f"# Page {n}\n\n" + "본문 내용 content " * 400, encoding="utf-8")
+
+    steps, latencies = {}, []
+
+    async def step(name: str, path: str, body: dict) -> dict:
+        step_started = time.perf_counter()
+        r = await client.post(f"{base}{path}", json=body)
+        elapsed = time.perf_counter() - step_started
+        steps[name] = round(steps.get(name, 0) + elapsed, 3)
+        latencies.append(elapsed)
+        data = r.json()
+        if not data.get("success"):
+            raise RuntimeError(f"{path}: {data.get('error_message')}")
+        return data
+
+    started = time.perf_counter()
+    converted = await step("convert", "/api/v1/llm-batch/convert", {
+        "folder_path": str(docs), "instruction": "Summarize.", "max_tokens_per_file": args.llm_shard_tokens,
+    })
+    submitted = await step("submit", "/api/v1/llm-batch/submit", {"jsonl_folder_path": converted["output_folder"]})
+    batch_ids = [b["batch_id"] for b in submitted["batches"]]
+
+    wait_started = time.perf_counter()
+    while True:
+        status = await step("status", "/api/v1/llm-batch/status", {"batch_ids": batch_ids})
+        if all(b["status"] in ("completed", "failed", "expired", "cancelled") for b in status["batches"]):
+            break
+        if time.perf_counter() - wait_started > 120:
+            raise RuntimeError("Batches did not finish within 120s")
+        await asyncio.sleep(0.5)
+    steps["wait"] = round(time.perf_counter() - wait_started, 3)
+
+    results = await step("results", "/api/v1/llm-batch/results", {"batch_ids": batch_ids, "output_folder_path": str(workdir / "llm_results")})
+    seconds = time.perf_counter() - started
+    return suite_result(
+        args.llm_docs, results["total_files"], seconds, latencies, rss.peaks(),
+        shards=len(batch_ids), steps_s=steps,
+    )
+
+
+# ── Comparison ──────────────────────────────────────────
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `current` against `baseline` beyond `tolerance` (a fraction)."""
+    problems = []
+    for name, now in current["suites"].items():
+        before = baseline.get("suites", {}).get(name)
+        if not before or "error" in now or "error" in before:
+            continue
+        checks = [
+            ("throughput_per_s", now.get("throughput_per_s"), before.get("throughput_per_s"), -1),
+            ("latency p95", now["latency_ms"]["p95"], before["latency_ms"]["p95"], 1),
+            ("peak_rss_tree_mb", now.get("peak_rss_tree_mb"), before.get("peak_rss_tree_mb"), 1),
+        ]
+        for label, value, reference, direction in checks:
+            if not value or not reference:
+                continue
+            change = (value - reference) / reference
+            if change * direction > tolerance:
+                problems.append(f"{name}: {label} {reference} → {value} ({change:+.0%})")
+    return problems
+
+
+def print_table(results: dict):
+    print(f"{'suite':<14} {'count':>6} {'ok':>6} {'sec':>8} {'per s':>8} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8} {'tree MB':>8}")
+    for name, r in results["suites"].items():
+        if "error" in r:
+            print(f"{name:<14} error: {r['error']}")
+            continue
+        lat = r["latency_ms"]
+        print(
+            f"{name:<14} {r['count']:>6} {r['ok']:>6} {r['seconds']:>8.2f} {r['throughput_per_s'] or 0:>8.2f} "
+            f"{lat['p50'] or 0:>9.1f} {lat['p95'] or 0:>9.1f} {_mb(r['peak_rss_mb'])} {_mb(r['peak_rss_tree_mb'])}"
+        )
+
+
+def _mb(value: float | None) -> str:
+    return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+async def run(args) -> dict:
+    site = FakeSite(
+        pages=args.pages, fanout=args.fanout, page_kb=args.page_kb,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+        rate_limit_rate=args.rate_limit_rate, redirect_rate=args.redirect_rate, seed=args.seed,
+        js_rate=args.js_rate,
+    ).start()
+    openai_fake = FakeOpenAI(complete_after=args.llm_complete_after, seed=args.seed).start()
+    workdir = pathlib.Path(tempfile.mkdtemp(prefix="vcrawl-bench-"))
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    proc, base = start_backend(workdir, openai_fake.base_url, extra_env)
+    rss = RssSampler(proc.pid).start()
+    if psutil is None:
+        print("psutil is not installed: peak RSS is not measured (pip install psutil)")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+        },
+        "suites": {},
+    }
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(600, connect=10)) as client:
+            for name in args.suites:
+                rss.reset()
+                print(f"▶ {name} ...", flush=True)
+                suite = globals()[f"bench_{name}"]
+                try:
+                    results["suites"][name] = await suite(client, base, site, args, rss, workdir)
+                except Exception as e:
+                    results["suites"][name] = {"error": f"{type(e).__name__}: {e}"}
+            results["site_requests"] = dict(site.requests)
+            results["pool_stats"] = (await client.get(f"{base}/api/v1/pool/stats")).json()
+    finally:
+        rss.stop()
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        site.stop()
+        openai_fake.stop()
+        if not args.keep_output:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"Work directory kept: {workdir}")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    site = ap.add_argument_group("stand-in site")
+    site.add_argument("--pages", type=int, default=200)
+    site.add_argument("--fanout", type=int, default=5)
+    site.add_argument("--page-kb", type=float, default=30.0)
+    site.add_argument("--slow-rate", type=float, default=0.0)
+    site.add_argument("--slow-ms", type=float, default=1500.0)
+    site.add_argument("--rate-limit-rate", type=float, default=0.0)
+    site.add_argument("--redirect-rate", type=float, default=0.0)
+    site.add_argument("--js-rate", type=float, default=0.0, help="share of pages rendered by JavaScript")
+    site.add_argument("--seed", type=int, default=7)
+    load = ap.add_argument_group("load")
+    load.add_argument("--concurrency", type=int, default=4, help="concurrent /crawl requests and batch-crawl concurrency")
+    load.add_argument("--crawl-requests", type=int, default=50)
+    load.add_argument("--depth", type=int, default=2, help="collect-links depth")
+    load.add_argument("--repeat", type=int, default=1, help="collect-links runs")
+    load.add_argument("--batch-pages", type=int, default=50)
+    load.add_argument("--analyze-pages", type=int, default=200)
+    load.add_argument("--llm-docs", type=int, default=200)
+    load.add_argument("--llm-shard-tokens", type=int, default=50_000)
+    load.add_argument("--llm-complete-after", type=float, default=2.0, help="seconds until a fake batch completes")
+    load.add_argument("--cache-mode", default="bypass", choices=("use", "bypass", "refresh"))
+    ap.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra backend environment (repeatable)")
+    ap.add_argument("--keep-output", action="store_true", help="keep batch-crawl output and the work directory")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="earlier --json result to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed regression vs. --baseline (fraction)")
+    args = ap.parse_args()
+    args.suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        ap.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    problems = []
+    if args.baseline:
+        problems = compare(results, json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        results["regressions"] = problems
+        for line in problems:
+            print(f"⚠️  {line}")
+        if not problems:
+            print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Results written to {args.json}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
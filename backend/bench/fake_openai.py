@@ -0,0 +1,316 @@
+"""
+Local stand-in for the OpenAI Files + Batches API, for exercising the
+/api/v1/llm-batch endpoints without an API key or network access.
+
+Implements the subset the backend uses:
+
+    POST /v1/files                      (multipart upload, purpose=batch)
+    GET  /v1/files/{id}/content
+    POST /v1/batches                    validating → in_progress → completed
+    GET  /v1/batches/{id}
+    GET  /v1/batches?limit=&after=
+    POST /v1/batches/{id}/cancel
+
+Completed batches get an output file with one chat-completion response per
+input line, and (with --error-rate) an error file for the failed requests.
+--fail-rate / --rate-limit-rate inject 500 / 429 responses to test retries.
+
+Usage (from backend/):
+    python bench/fake_openai.py --port 8765 --complete-after 5
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://127.0.0.1:8765/v1 uvicorn main:app
+"""
+import argparse
+import email.parser
+import email.policy
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAI:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        complete_after: float = 2.0,
+        fail_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.complete_after = complete_after
+        self.fail_rate = fail_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.files: dict[str, dict] = {}
+        self.batches: dict[str, dict] = {}
+        self.requests: dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── State ───────────────────────────────────────────
+
+    def _new_file(self, filename: str, data: bytes, purpose: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.files[file_id] = {
+            "meta": {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(data),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+            },
+            "data": data,
+        }
+        return self.files[file_id]["meta"]
+
+    def _advance(self, batch: dict):
+        """Move a batch along its lifecycle based on elapsed time."""
+        if batch["status"] in ("completed", "failed", "cancelled", "expired"):
+            return
+        elapsed = time.time() - batch["created_at"]
+        if elapsed < self.complete_after / 3:
+            return
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+            batch["in_progress_at"] = int(time.time())
+        total = batch["request_counts"]["total"]
+        done = min(total, int(total * elapsed / max(self.complete_after, 1e-6)))
+        batch["request_counts"]["completed"] = done
+        if elapsed >= self.complete_after:
+            self._complete(batch)
+
+    def _complete(self, batch: dict):
+        lines = self.files[batch["input_file_id"]]["data"].decode("utf-8").splitlines()
+        outputs, errors = [], []
+        for line in lines:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            custom_id = request.get("custom_id")
+            if self._rng.random() < self.error_rate:
+                errors.append({
+                    "id": f"batch_req_{uuid.uuid4().hex[:16]}",
+                    "custom_id": custom_id,
+                    "response": None,
+                    "error": {"code": "server_error", "message": "Simulated request failure"},
+                })
+                continue
+            messages = request.get("body", {}).get("messages", [])
+            prompt = messages[-1]["content"] if messages else ""
+            outputs.append({
+                "id": f"batch_req_{uuid.uuid4().hex[:16]}",
+                "custom_id": custom_id,
+                "response": {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": {
+                        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                        "object": "chat.completion",
+                        "model": request.get("body", {}).get("model", ""),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": f"# {custom_id}\n\nProcessed {len(prompt)} characters."},
+                            "finish_reason": "stop",
+                        }],
+                    },
+                },
+                "error": None,
+            })
+        to_bytes = lambda rows: "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+        if outputs:
+            batch["output_file_id"] = self._new_file(f"{batch['id']}_output.jsonl", to_bytes(outputs), "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self._new_file(f"{batch['id']}_error.jsonl", to_bytes(errors), "batch_output")["id"]
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    # ── HTTP ────────────────────────────────────────────
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload=None, body: bytes | None = None, headers: dict | None = None):
+                if body is None:
+                    body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json" if payload is not None else "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _error(self, status: int, message: str, headers: dict | None = None):
+                self._send(status, {"error": {"message": message, "type": "fake_error", "code": None}}, headers=headers)
+
+            def _inject(self) -> bool:
+                roll = fake._rng.random()
+                if roll < fake.rate_limit_rate:
+                    self._error(429, "Simulated rate limit", {"retry-after": "0.1"})
+                    return True
+                if roll < fake.rate_limit_rate + fake.fail_rate:
+                    self._error(500, "Simulated server error")
+                    return True
+                return False
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _count(self, key: str):
+                with fake._lock:
+                    fake.requests[key] = fake.requests.get(key, 0) + 1
+
+            def do_POST(self):
+                path = urllib.parse.urlsplit(self.path).path
+                body = self._body()
+                if path == "/v1/files":
+                    self._count("files.create")
+                    if self._inject():
+                        return
+                    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                    )
+                    fields, filename, data = {}, "upload.jsonl", b""
+                    for part in message.iter_parts():
+                        name = part.get_param("name", header="content-disposition")
+                        if part.get_filename():
+                            filename, data = part.get_filename(), part.get_payload(decode=True)
+                        else:
+                            fields[name] = part.get_content().strip()
+                    with fake._lock:
+                        meta = fake._new_file(filename, data, fields.get("purpose", "batch"))
+                    self._send(200, meta)
+                elif path == "/v1/batches":
+                    self._count("batches.create")
+                    if self._inject():
+                        return
+                    params = json.loads(body or b"{}")
+                    input_file = fake.files.get(params.get("input_file_id"))
+                    if input_file is None:
+                        self._error(400, "Invalid input_file_id")
+                        return
+                    total = sum(1 for line in input_file["data"].splitlines() if line.strip())
+                    batch = {
+                        "id": f"batch_{uuid.uuid4().hex[:24]}",
+                        "object": "batch",
+                        "endpoint": params.get("endpoint", "/v1/chat/completions"),
+                        "input_file_id": params["input_file_id"],
+                        "completion_window": params.get("completion_window", "24h"),
+                        "status": "validating",
+                        "output_file_id": None,
+                        "error_file_id": None,
+                        "created_at": int(time.time()),
+                        "request_counts": {"total": total, "completed": 0, "failed": 0},
+                        "metadata": params.get("metadata"),
+                    }
+                    with fake._lock:
+                        fake.batches[batch["id"]] = batch
+                    self._send(200, batch)
+                elif path.startswith("/v1/batches/") and path.endswith("/cancel"):
+                    batch = fake.batches.get(path.split("/")[3])
+                    if batch is None:
+                        self._error(404, "No such batch")
+                        return
+                    batch["status"] = "cancelled"
+                    self._send(200, batch)
+                else:
+                    self._error(404, f"Unknown endpoint {path}")
+
+            def do_GET(self):
+                parsed = urllib.parse.urlsplit(self.path)
+                parts = parsed.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    self._count("batches.retrieve")
+                    if self._inject():
+                        return
+                    with fake._lock:
+                        batch = fake.batches.get(parts[2])
+                        if batch is not None:
+                            fake._advance(batch)
+                    if batch is None:
+                        self._error(404, "No such batch")
+                    else:
+                        self._send(200, batch)
+                elif parts[:2] == ["v1", "batches"] and len(parts) == 2:
+                    self._count("batches.list")
+                    query = urllib.parse.parse_qs(parsed.query)
+                    limit = int(query.get("limit", ["20"])[0])
+                    after = query.get("after", [None])[0]
+                    with fake._lock:
+                        ordered = sorted(fake.batches.values(), key=lambda b: b["created_at"], reverse=True)
+                        for batch in ordered:
+                            fake._advance(batch)
+                    if after:
+                        ids = [b["id"] for b in ordered]
+                        ordered = ordered[ids.index(after) + 1:] if after in ids else []
+                    page = ordered[:limit]
+                    self._send(200, {
+                        "object": "list",
+                        "data": page,
+                        "first_id": page[0]["id"] if page else None,
+                        "last_id": page[-1]["id"] if page else None,
+                        "has_more": len(ordered) > limit,
+                    })
+                elif parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+                    self._count("files.content")
+                    entry = fake.files.get(parts[2])
+                    if entry is None:
+                        self._error(404, "No such file")
+                    else:
+                        self._send(200, body=entry["data"])
+                else:
+                    self._error(404, f"Unknown endpoint {parsed.path}")
+
+        return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--complete-after", type=float, default=5.0, help="seconds until a batch completes")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of calls answered with 500")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that land in the error file")
+    args = ap.parse_args()
+
+    fake = FakeOpenAI(args.host, args.port, args.complete_after, args.fail_rate, args.rate_limit_rate, args.error_rate)
+    print(f"Fake OpenAI API on {fake.base_url}  (Ctrl+C to stop)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Local stand-in website for benchmarking the crawl endpoints offline.
+
+Serves a generated, deterministic site shaped like the public-sector sites
+the collector is used on: a tree of pages with header / nav / main / footer
+and an ad block, a board page, robots.txt and sitemap.xml.
+
+    GET /                 the root page (page 0)
+    GET /p/{n}            page n; links to its `fanout` children n*fanout+1 ...
+    GET /r/{n}            302 → /p/{n} (used for a `redirect_rate` share of links)
+    GET /robots.txt       allows everything, points at the sitemap
+    GET /sitemap.xml      every page
+
+A `slow_rate` share of pages answers after `slow_ms`, and a `rate_limit_rate`
+share answers its first request with 429 + Retry-After before serving the page.
+A `js_rate` share is an SPA shell (<div id="root"></div>) that only gets its
+content from a script, to exercise the `auto` fetch strategy's browser fallback.
+Which pages are slow / limited / redirected / JS-rendered is fixed by `seed`,
+so runs with the same options see the same site.
+
+URLs use `hostname` (default `localhost`) rather than the bind address:
+crawl4ai derives the base domain "0.1" from 127.0.0.1 and would class every
+link as external.
+
+Usage (from backend/):
+    python bench/fake_site.py --port 8766 --pages 500 --fanout 8 --page-kb 40 --slow-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    "정책 안내 공지 사업 지원 신청 기관 소개 자료 보도 민원 서비스 채용 행사 "
+    "public service notice report budget program application data release policy"
+).split()
+
+
+class FakeSite:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pages: int = 200,
+        fanout: int = 5,
+        page_kb: float = 30.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 1500.0,
+        rate_limit_rate: float = 0.0,
+        redirect_rate: float = 0.0,
+        seed: int = 7,
+        js_rate: float = 0.0,
+        hostname: str = "localhost",
+    ):
+        self.pages = max(1, pages)
+        self.fanout = max(1, fanout)
+        self.page_kb = page_kb
+        self.slow_ms = slow_ms
+        self.hostname = hostname
+
+        rng = random.Random(seed)
+        ids = range(1, self.pages)  # the root page is never slow / limited / redirected / JS-rendered
+        self.slow = {n for n in ids if rng.random() < slow_rate}
+        self.rate_limited = {n for n in ids if rng.random() < rate_limit_rate}
+        self.redirected = {n for n in ids if rng.random() < redirect_rate}
+        self.js_rendered = {n for n in ids if rng.random() < js_rate}
+        self._seed = seed
+
+        self.requests: dict[str, int] = {}
+        self._served: set[int] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.hostname}:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Site ────────────────────────────────────────────
+
+    def page_url(self, n: int) -> str:
+        return f"{self.base_url}/p/{n}" if n else f"{self.base_url}/"
+
+    def children(self, n: int) -> list[int]:
+        first = n * self.fanout + 1
+        return [c for c in range(first, first + self.fanout) if c < self.pages]
+
+    def _href(self, n: int) -> str:
+        if n == 0:
+            return "/"
+        return f"/r/{n}" if n in self.redirected else f"/p/{n}"
+
+    def render(self, n: int) -> str:
+        rng = random.Random(self._seed * 1_000_003 + n)
+        nav = "".join(f'<li><a href="{self._href(c)}">메뉴 {c}</a></li>' for c in range(1, min(self.pages, 8)))
+        links = "".join(f'<li><a href="{self._href(c)}">Page {c} 안내</a></li>' for c in self.children(n))
+        parent = (n - 1) // self.fanout if n else None
+        if parent is not None:
+            links += f'<li><a href="{self._href(parent)}">상위 페이지</a></li>'
+
+        target = int(self.page_kb * 1024)
+        paragraphs, size = [], 0
+        while size < target:
+            text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120)))
+            paragraphs.append(f"<p>{text}.</p>")
+            size += len(text.encode("utf-8")) + 7
+
+        body = (
+            f'<header id="header"><a href="/">Bench Agency</a><nav class="gnb"><ul>{nav}</ul></nav></header>'
+            f'<div class="ad-banner"><a href="https://ads.example.net/click?id={n}">광고</a></div>'
+            f'<main id="content"><article><h1>Page {n}</h1>{"".join(paragraphs)}'
+            f'<ul class="links">{links}</ul>'
+            f'<p><a href="/board/list.do?page={n}">공지사항 목록</a> <a href="/files/report_{n}.pdf">보고서</a></p>'
+            "</article></main>"
+            '<footer id="footer"><p>Bench Agency · 세종특별자치시</p><a href="https://other.example.org/">관련 기관</a></footer>'
+        )
+        if n in self.js_rendered:
+            body = (
+                '<noscript>You need to enable JavaScript to run this app.</noscript><div id="root"></div>'
+                f"<script>document.getElementById('root').innerHTML = {json.dumps(body)};</script>"
+            )
+        return (
+            "<!DOCTYPE html><html lang=\"ko\"><head><meta charset=\"utf-8\">"
+            f"<title>Page {n}</title></head><body>{body}</body></html>"
+        )
+
+    def sitemap(self) -> str:
+        urls = "".join(f"<url><loc>{self.page_url(n)}</loc></url>" for n in range(self.pages))
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+    # ── HTTP ────────────────────────────────────────────
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _count(self, key: str):
+                with site._lock:
+                    site.requests[key] = site.requests.get(key, 0) + 1
+
+            def _send(self, status: int, body: str = "", content_type: str = "text/html; charset=utf-8", headers: dict | None = None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+            def _page(self, n: int):
+                if n in site.rate_limited:
+                    with site._lock:
+                        first = n not in site._served
+                        site._served.add(n)
+                    if first:
+                        self._count("429")
+                        self._send(429, "Too Many Requests", "text/plain", {"Retry-After": "1"})
+                        return
+                if n in site.slow:
+                    self._count("slow")
+                    time.sleep(site.slow_ms / 1000)
+                self._count("page")
+                self._send(200, site.render(n))
+
+            def do_GET(self):
+                path = urllib.parse.urlsplit(self.path).path
+                parts = path.strip("/").split("/")
+                if path == "/":
+                    self._page(0)
+                elif len(parts) == 2 and parts[0] in ("p", "r") and parts[1].isdigit() and int(parts[1]) < site.pages:
+                    n = int(parts[1])
+                    if parts[0] == "r":
+                        self._count("redirect")
+                        self._send(302, "", headers={"Location": f"/p/{n}"})
+                    else:
+                        self._page(n)
+                elif path == "/robots.txt":
+                    self._count("robots")
+                    self._send(200, f"User-agent: *\nAllow: /\nSitemap: {site.base_url}/sitemap.xml\n", "text/plain")
+                elif path == "/sitemap.xml":
+                    self._count("sitemap")
+                    self._send(200, site.sitemap(), "application/xml")
+                elif path == "/board/list.do":
+                    self._count("board")
+                    self._send(200, "<html><body><main><h1>공지사항</h1><ul><li><a href=\"/\">홈</a></li></ul></main></body></html>")
+                else:
+                    self._count("404")
+                    self._send(404, "<html><body><h1>Not Found</h1></body></html>")
+
+            do_HEAD = do_GET
+
+        return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1", help="bind address")
+    ap.add_argument("--hostname", default="localhost", help="host name used in links, robots.txt and the sitemap")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--pages", type=int, default=200, help="number of pages")
+    ap.add_argument("--fanout", type=int, default=5, help="child links per page")
+    ap.add_argument("--page-kb", type=float, default=30.0, help="approximate body text per page (KB)")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="fraction of pages answered after --slow-ms")
+    ap.add_argument("--slow-ms", type=float, default=1500.0)
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of pages whose first request gets 429")
+    ap.add_argument("--redirect-rate", type=float, default=0.0, help="fraction of links that go through a 302")
+    ap.add_argument("--js-rate", type=float, default=0.0, help="fraction of pages rendered by JavaScript")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    site = FakeSite(
+        args.host, args.port, args.pages, args.fanout, args.page_kb,
+        args.slow_rate, args.slow_ms, args.rate_limit_rate, args.redirect_rate, args.seed, args.js_rate,
+        args.hostname,
+    )
+    print(f"Fake site on {site.base_url}  ({site.pages} pages, Ctrl+C to stop)")
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Golden-corpus check and benchmark for the structure analyzer's HTML parser backends.
+
+For every saved page in bench/corpus/*.html this records which element each
+backend picks for header / navigation / main content / footer / ads, plus the
+content-only markdown that /api/v1/crawl would return, and compares it with
+the html.parser reference stored in bench/corpus/golden.json.
+
+lxml and lexbor repair malformed HTML the way browsers do, so on such pages
+they can legitimately disagree with html.parser. Those fields are recorded
+per backend in bench/corpus/parser_differences.json and checked exactly
+like the reference; any other difference makes the script exit 1.
+
+Usage (from backend/):
+    python bench/parsers.py                   # check + benchmark all backends
+    python bench/parsers.py --update-golden   # re-record the reference and known differences
+    python bench/parsers.py --repeat 20 --json parsers.json
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import postprocess  # noqa: E402
+import structure_analyzer  # noqa: E402
+
+CORPUS_DIR = pathlib.Path(__file__).resolve().parent / "corpus"
+GOLDEN_PATH = CORPUS_DIR / "golden.json"
+DIFFERENCES_PATH = CORPUS_DIR / "parser_differences.json"
+REFERENCE_PARSER = "html.parser"
+
+
+def _signature(scan, element) -> dict | None:
+    if element is None:
+        return None
+    if isinstance(element, structure_analyzer.Tag):
+        attrs = element.attrs
+    else:
+        attrs = element.attributes
+    classes = attrs.get("class") or ""
+    return {
+        "tag": scan.name(element),
+        "id": attrs.get("id") or "",
+        "class": " ".join(classes) if isinstance(classes, list) else classes,
+        "text_len": scan.length(element),
+    }
+
+
+def summarize(html: str, parser: str) -> dict:
+    """Parser-independent view of what analyze_structure + crawl() produce."""
+    scan = structure_analyzer.parse_and_scan(html, parser)
+    main = structure_analyzer.find_region(scan, "main_content") or structure_analyzer.find_main_fallback(scan)
+
+    markdown = postprocess.html_to_markdown(structure_analyzer.outer_html(main)) if main is not None else ""
+
+    return {
+        "header": _signature(scan, structure_analyzer.find_region(scan, "header")),
+        "navigation": _signature(scan, structure_analyzer.find_region(scan, "navigation")),
+        "main_content": _signature(scan, main),
+        "footer": _signature(scan, structure_analyzer.find_region(scan, "footer")),
+        "ads": [_signature(scan, ad) for ad in structure_analyzer.collect_ads(scan)],
+        "content_only_markdown": markdown,
+    }
+
+
+def _available(parser: str) -> bool:
+    try:
+        structure_analyzer.parse_and_scan("<p>x</p>", parser)
+        return True
+    except Exception:
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--update-golden", action="store_true", help="re-record the html.parser reference")
+    ap.add_argument("--repeat", type=int, default=10, help="timing iterations per page")
+    ap.add_argument("--json", help="write machine-readable results to this file")
+    args = ap.parse_args()
+
+    pages = sorted(CORPUS_DIR.glob("*.html"))
+    if not pages:
+        sys.exit(f"No pages in {CORPUS_DIR}")
+    html_by_page = {p.name: p.read_text(encoding="utf-8") for p in pages}
+
+    if args.update_golden:
+        golden = {name: summarize(html, REFERENCE_PARSER) for name, html in html_by_page.items()}
+        GOLDEN_PATH.write_text(json.dumps(golden, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {GOLDEN_PATH} ({len(golden)} pages)")
+        differences = {}
+        for parser in structure_analyzer.PARSERS:
+            if parser == REFERENCE_PARSER or not _available(parser):
+                continue
+            for name, html in html_by_page.items():
+                got = summarize(html, parser)
+                fields = {k: v for k, v in got.items() if v != golden[name][k]}
+                if fields:
+                    differences.setdefault(parser, {})[name] = fields
+                    print(f"    {parser} differs on {name}: {', '.join(fields)}")
+        DIFFERENCES_PATH.write_text(json.dumps(differences, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {DIFFERENCES_PATH}")
+        return
+
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+    differences = json.loads(DIFFERENCES_PATH.read_text(encoding="utf-8")) if DIFFERENCES_PATH.exists() else {}
+    report = {"pages": len(pages), "bytes": sum(len(h.encode("utf-8")) for h in html_by_page.values()), "parsers": {}}
+    failed = False
+
+    for parser in structure_analyzer.PARSERS:
+        if not _available(parser):
+            print(f"{parser:12s} skipped (not installed)")
+            report["parsers"][parser] = {"available": False}
+            continue
+
+        mismatches, known = [], []
+        for name, html in html_by_page.items():
+            got = summarize(html, parser)
+            known_fields = differences.get(parser, {}).get(name, {})
+            expected = {**golden[name], **known_fields} if name in golden else None
+            if got != expected:
+                diff_keys = [k for k in got if expected is None or got[k] != expected.get(k)]
+                mismatches.append({"page": name, "fields": diff_keys})
+            elif known_fields:
+                known.append({"page": name, "fields": list(known_fields)})
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in html_by_page.values():
+                structure_analyzer.parse_and_scan(html, parser)
+        elapsed = time.perf_counter() - started
+        per_page_ms = elapsed / (args.repeat * len(pages)) * 1000
+
+        report["parsers"][parser] = {
+            "available": True,
+            "identical": not mismatches and not known,
+            "mismatches": mismatches,
+            "known_differences": known,
+            "ms_per_page": round(per_page_ms, 3),
+            "mb_per_s": round(report["bytes"] * args.repeat / elapsed / 1e6, 2),
+        }
+        if mismatches:
+            status = f"{len(mismatches)} page(s) differ"
+        elif known:
+            status = f"matches, {len(known)} page(s) with known differences"
+        else:
+            status = "identical"
+        print(f"{parser:12s} {per_page_ms:8.2f} ms/page   {status}")
+        for m in mismatches:
+            print(f"    ❌ {m['page']}: {', '.join(m['fields'])}")
+        for k in known:
+            print(f"    known {k['page']}: {', '.join(k['fields'])}")
+        failed = failed or bool(mismatches)
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
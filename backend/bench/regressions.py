@@ -0,0 +1,195 @@
+"""
+Behaviour checks for scheduling and caching fixes, run offline against bench/fake_site.py.
+
+The backend has no unit-test suite; like bench/parsers.py, this script is the
+check to run after touching the code it covers. Each check drives the real
+endpoint code in-process (HTTP fetch strategy, throw-away caches) and the
+script exits 1 if any check fails.
+
+    batch_host_fairness   batch-crawl: links to a fast host are not stuck
+                          behind a slow host's links (per-host slot before
+                          the global slot)
+    cache_render_profile  page cache: a `full` request after a `lean` one for
+                          the same URL is a miss, even when every other
+                          config field matches
+    job_queue_position    jobs: a job waiting for a slot streams `queued`
+                          events with its place in line before its own
+                          events
+    crawl_failure_metrics /api/v1/crawl: a page that fails after it was
+                          fetched is counted in vcrawl_page_failures_total
+                          and still reports its timings
+
+Usage (from backend/):
+    python bench/regressions.py
+    python bench/regressions.py --checks batch_host_fairness
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "bench"))
+
+from fake_site import FakeSite  # noqa: E402
+
+CHECKS = ("batch_host_fairness", "cache_render_profile", "job_queue_position", "crawl_failure_metrics")
+
+
+async def check_batch_host_fairness(main) -> str:
+    slow = FakeSite(pages=8, slow_rate=1.0, slow_ms=1200).start()
+    fast = FakeSite(pages=8, seed=11).start()
+    try:
+        # Slow host's links first, so a global-slot-first order would fill every slot with them.
+        links = [{"href": slow.page_url(n), "text": f"slow {n}"} for n in range(1, 7)]
+        links += [{"href": fast.page_url(n), "text": f"fast {n}"} for n in range(1, 7)]
+        request = main.BatchCrawlRequest(
+            links=links, output_folder_name=f"vcrawl_regressions_{os.getpid()}",
+            concurrency=2, per_host_concurrency=1, fetch_strategy="http", cache_mode="bypass",
+        )
+        finished: list[str] = []
+        folder = None
+        async for event in main._batch_crawl_events(request):
+            if event.get("type") == "progress" and event["status"] in ("done", "failed"):
+                finished.append("fast" if event["url"].startswith(fast.base_url) else "slow")
+            elif event.get("type") == "complete":
+                folder = event["folder_path"]
+            elif event.get("type") == "error":
+                raise AssertionError(event["message"])
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        slow.stop()
+        fast.stop()
+
+    last_fast = max(i for i, host in enumerate(finished) if host == "fast")
+    first_slow_after = [i for i, host in enumerate(finished) if host == "slow" and i > last_fast]
+    assert len(finished) == len(links), f"{len(finished)} of {len(links)} links finished"
+    assert first_slow_after, f"fast host did not finish before the slow host: {finished}"
+    return f"finish order {' '.join(finished)}"
+
+
+async def check_cache_render_profile(main) -> str:
+    site = FakeSite(pages=3).start()
+    try:
+        # Same fields everywhere except the profile name
+        same = {"wait_for": None, "delay_before_return_html": 0.0}
+        lean = main.render_profiles["lean"].run_config(**same)
+        full = main.render_profiles["full"].run_config(**same)
+        url = site.page_url(1)
+        first = await main._fetch_page(url, lean, "use", strategy="http")
+        again = await main._fetch_page(url, lean, "use", strategy="http")
+        other = await main._fetch_page(url, full, "use", strategy="http")
+    finally:
+        site.stop()
+    assert first.success and not getattr(first, "from_cache", False), "first lean fetch should hit the site"
+    assert getattr(again, "from_cache", False), "repeated lean fetch should be a cache hit"
+    assert not getattr(other, "from_cache", False), "full after lean was served from the lean cache entry"
+    return "lean hit on repeat, full after lean missed"
+
+
+async def check_job_queue_position(main) -> str:
+    from job_store import JobManager, JobStore
+
+    async def slow_job(name: str):
+        await asyncio.sleep(0.3)
+        yield {"type": "done", "name": name}
+
+    manager = JobManager(JobStore(pathlib.Path(os.environ["VCRAWL_JOB_DB_PATH"]).with_name("queue_check.db")), max_running=1)
+    await manager.start()
+    try:
+        job_ids = [await manager.submit("check", {}, slow_job(str(n))) for n in range(3)]
+        streams = []
+        for job_id in job_ids:
+            streams.append([item[1] async for item in manager.stream(job_id) if item])
+    finally:
+        await manager.close()
+
+    positions = [[e["position"] for e in events if e["type"] == "queued"] for events in streams]
+    assert positions == [[], [1], [2, 1]], f"queued positions per job: {positions}"
+    for events in streams:
+        assert events[-1]["type"] == "done", f"job did not finish: {events}"
+    return f"queued positions per job {positions}"
+
+
+async def check_crawl_failure_metrics(main) -> str:
+    def failures() -> float:
+        return sum(main.PAGE_FAILURES._values.values())
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("post-processing exploded")
+
+    site = FakeSite(pages=2).start()
+    original = main.post_processor.run
+    main.post_processor.run = broken
+    try:
+        before = failures()
+        response = await main._crawl(
+            main.CrawlRequest(url=site.page_url(1), fetch_strategy="http", cache_mode="bypass", include_timings=True),
+            main.StageTimer("crawl"),
+        )
+        counted = failures() - before
+    finally:
+        main.post_processor.run = original
+        site.stop()
+
+    gone = FakeSite(pages=1).start()
+    gone.stop()
+    down = gone.page_url(1)
+    before = failures()
+    unreachable = await main._crawl(main.CrawlRequest(url=down, fetch_strategy="http", cache_mode="bypass"), main.StageTimer("crawl"))
+    counted_fetch = failures() - before
+
+    assert not response.success and "exploded" in response.error_message, response.error_message
+    assert counted == 1, f"post-processing failure counted {counted} times"
+    assert "http_fetch" in response.metadata.get("timings_ms", {}), f"no fetch timing in {response.metadata}"
+    assert not unreachable.success and counted_fetch == 1, f"fetch failure counted {counted_fetch} times"
+    return f"failures counted once each, timings_ms {sorted(response.metadata['timings_ms'])}"
+
+
+async def run(names: list[str]) -> int:
+    import main  # imported after the environment below is set
+
+    failures = 0
+    for name in names:
+        try:
+            detail = await globals()[f"check_{name}"](main)
+            print(f"✅ {name}: {detail}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {name}: {e}")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--checks", default=",".join(CHECKS), help=f"comma-separated subset of {', '.join(CHECKS)}")
+    args = ap.parse_args()
+    names = [c.strip() for c in args.checks.split(",") if c.strip()]
+    unknown = set(names) - set(CHECKS)
+    if unknown:
+        ap.error(f"unknown checks: {', '.join(sorted(unknown))}")
+
+    workdir = pathlib.Path(tempfile.mkdtemp(prefix="vcrawl-regressions-"))
+    os.environ.update({
+        "VCRAWL_PAGE_CACHE_PATH": str(workdir / "page_cache.db"),
+        "VCRAWL_LLM_CACHE_PATH": str(workdir / "llm_cache.db"),
+        "VCRAWL_JOB_DB_PATH": str(workdir / "jobs.db"),
+        "VCRAWL_BATCH_TRACKER_PATH": str(workdir / "batches.db"),
+        "VCRAWL_EXPORT_DIR": str(workdir / "exports"),
+        "VCRAWL_POSTPROCESS_MODE": "inline",
+    })
+    os.chdir(BACKEND_DIR)
+    try:
+        failures = asyncio.run(run(names))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
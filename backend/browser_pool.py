@@ -0,0 +1,252 @@
+"""
+Shared, long-lived browser pool for crawl endpoints.
+
+Launching Chromium for every request dominates single-page latency, so the
+app keeps a small set of warm `AsyncWebCrawler` instances for its whole
+lifespan and lends them out one request (or one worker) at a time.
+Browsers are recycled after `max_pages_per_browser` pages or when they crash.
+`hooks` (crawl4ai strategy hooks, name -> coroutine) are set on every
+browser the pool launches.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+logger = logging.getLogger(__name__)
+
+# Error fragments that mean the underlying browser/page is gone and the
+# crawler must be relaunched before it is lent out again.
+_CRASH_MARKERS = (
+    "target closed",
+    "browser has been closed",
+    "browser closed",
+    "connection closed",
+    "has been disconnected",
+)
+
+
+def _looks_like_crash(message: str) -> bool:
+    message = (message or "").lower()
+    return any(marker in message for marker in _CRASH_MARKERS)
+
+
+class _Slot:
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.crawler: AsyncWebCrawler | None = None
+        self.pages = 0
+        self.healthy = True
+        # Set when a page load was cancelled mid-flight (job cancelled, client
+        # gone); the browser is shut down so the orphaned page is closed.
+        self.abandoned = False
+
+
+class PooledCrawler:
+    """Lease handed out by `BrowserPool.acquire()`.
+
+    Exposes the `arun` / `arun_many` subset of `AsyncWebCrawler` that the
+    endpoints use, counting pages and spotting crashes so the pool knows
+    when to recycle the browser.
+    """
+
+    def __init__(self, slot: _Slot, wait_seconds: float = 0.0, launch_seconds: float = 0.0):
+        self._slot = slot
+        # Time spent queueing for a free browser / (re)launching it for this lease
+        self.wait_seconds = wait_seconds
+        self.launch_seconds = launch_seconds
+
+    @property
+    def crawler(self) -> AsyncWebCrawler:
+        return self._slot.crawler
+
+    def _inspect(self, result):
+        if result is not None and not getattr(result, "success", True):
+            if _looks_like_crash(getattr(result, "error_message", "")):
+                self._slot.healthy = False
+        return result
+
+    async def arun(self, *args, **kwargs):
+        self._slot.pages += 1
+        return self._inspect(await self._slot.crawler.arun(*args, **kwargs))
+
+    async def arun_many(self, urls, *args, **kwargs):
+        self._slot.pages += len(urls)
+        results = await self._slot.crawler.arun_many(urls, *args, **kwargs)
+        for res in results:
+            self._inspect(res)
+        return results
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = 4,
+        max_pages_per_browser: int = 200,
+        acquire_timeout: float = 120.0,
+        browser_config: BrowserConfig | None = None,
+        hooks: dict | None = None,
+    ):
+        self.size = max(1, size)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.acquire_timeout = acquire_timeout
+        self.browser_config = browser_config or BrowserConfig(headless=True, verbose=False)
+        self.hooks = dict(hooks or {})
+
+        self._slots = [_Slot(i) for i in range(self.size)]
+        self._idle: asyncio.Queue | None = None
+        self._closed = False
+        self._recycling: set[asyncio.Task] = set()
+
+        # Stats
+        self._launched = 0
+        self._recycled = 0
+        self._crashes = 0
+        self._pages_served = 0
+        self._waiting = 0
+        self._acquired = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._abandoned = 0
+
+    def _queue(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the running event loop.
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    async def start(self, warm: bool = False):
+        """Prepare the pool; with `warm=True` launch every browser up front."""
+        self._closed = False
+        queue = self._queue()
+        if warm:
+            await asyncio.gather(*(self._launch(slot) for slot in self._slots if slot.crawler is None))
+        return queue
+
+    async def close(self):
+        self._closed = True
+        await asyncio.gather(
+            *(self._shutdown(slot) for slot in self._slots),
+            return_exceptions=True,
+        )
+
+    async def _launch(self, slot: _Slot):
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        for name, hook in self.hooks.items():
+            crawler.crawler_strategy.set_hook(name, hook)
+        await crawler.start()
+        slot.crawler = crawler
+        slot.pages = 0
+        slot.healthy = True
+        self._launched += 1
+
+    async def _shutdown(self, slot: _Slot):
+        crawler, slot.crawler = slot.crawler, None
+        if crawler is not None:
+            try:
+                await crawler.close()
+            except Exception as e:
+                logger.warning("Error closing browser #%d: %s", slot.slot_id, e)
+
+    @staticmethod
+    def _is_connected(crawler: AsyncWebCrawler) -> bool:
+        # Best-effort health check; crawl4ai internals are not a public API.
+        try:
+            browser = crawler.crawler_strategy.browser_manager.browser
+        except AttributeError:
+            return True
+        if browser is None:
+            return True
+        is_connected = getattr(browser, "is_connected", None)
+        return is_connected() if callable(is_connected) else True
+
+    async def _prepare(self, slot: _Slot):
+        if slot.crawler is None:
+            await self._launch(slot)
+            return
+        if not slot.healthy or not self._is_connected(slot.crawler):
+            self._crashes += 1
+        elif slot.pages < self.max_pages_per_browser:
+            return
+        self._recycled += 1
+        await self._shutdown(slot)
+        await self._launch(slot)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a warm crawler for the duration of the `async with` block."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        queue = self._queue()
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            slot = await asyncio.wait_for(queue.get(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"Timed out after {self.acquire_timeout:.0f}s waiting for a free browser")
+        finally:
+            self._waiting -= 1
+
+        waited = time.perf_counter() - started
+        self._acquired += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        pages_before = slot.pages
+        try:
+            prepare_started, launches_before = time.perf_counter(), self._launched
+            await self._prepare(slot)
+            launch_seconds = time.perf_counter() - prepare_started if self._launched != launches_before else 0.0
+            pages_before = slot.pages
+            yield PooledCrawler(slot, waited, launch_seconds)
+        except asyncio.CancelledError:
+            if slot.pages > pages_before:
+                slot.abandoned = True
+            raise
+        except Exception as e:
+            if _looks_like_crash(str(e)):
+                slot.healthy = False
+            raise
+        finally:
+            self._pages_served += slot.pages - pages_before
+            if slot.abandoned:
+                # Close the orphaned page now rather than on the next acquire.
+                task = asyncio.create_task(self._recycle_abandoned(slot))
+                self._recycling.add(task)
+                task.add_done_callback(self._recycling.discard)
+            else:
+                queue.put_nowait(slot)
+
+    async def _recycle_abandoned(self, slot: _Slot):
+        try:
+            if not self._closed:
+                await self._shutdown(slot)
+                self._abandoned += 1
+                self._recycled += 1
+        finally:
+            slot.abandoned = False
+            self._queue().put_nowait(slot)
+
+    def stats(self) -> dict:
+        idle = self._idle.qsize() if self._idle is not None else self.size
+        return {
+            "size": self.size,
+            "in_use": self.size - idle,
+            "idle": idle,
+            "launched": sum(1 for slot in self._slots if slot.crawler is not None),
+            "total_launches": self._launched,
+            "recycled": self._recycled,
+            "crashes": self._crashes,
+            "abandoned": self._abandoned,
+            "pages_served": self._pages_served,
+            "max_pages_per_browser": self.max_pages_per_browser,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "wait_time_avg_ms": round(self._wait_total / self._acquired * 1000, 2) if self._acquired else 0.0,
+            "wait_time_max_ms": round(self._wait_max * 1000, 2),
+        }
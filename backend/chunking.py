@@ -0,0 +1,71 @@
+"""
+Token-aware markdown splitter for chunked (map-reduce) LLM analysis.
+
+Content is cut on markdown headings first, then on blank-line paragraphs,
+then on lines, and finally on characters, so a chunk only breaks mid-block
+when a single block is larger than the budget. Consecutive blocks are
+packed greedily up to `max_tokens`.
+"""
+import re
+from typing import Callable
+
+_HEADING_RE = re.compile(r"^(?=#{1,6}\s)", re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def approx_tokens(text: str) -> int:
+    """Rough fallback estimate (~4 characters per token for Latin text, ~1.5 for Korean)."""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + int((len(text) - ascii_chars) / 1.5) + 1
+
+
+def _split_block(block: str, max_tokens: int, count: Callable[[str], int], level: int) -> list[str]:
+    if count(block) <= max_tokens:
+        return [block]
+
+    if level == 0:
+        # Sections lose their trailing blank line here (and in the levels below), so rejoin with one.
+        parts = [p.rstrip() for p in _HEADING_RE.split(block) if p.strip()]
+        sep = "\n\n"
+    elif level == 1:
+        parts = [p for p in _PARAGRAPH_RE.split(block) if p.strip()]
+        sep = "\n\n"
+    elif level == 2:
+        parts = block.splitlines()
+        sep = "\n"
+    else:
+        # A single huge line: cut by characters proportionally to the budget.
+        size = max(1, len(block) * max_tokens // max(count(block), 1))
+        return [block[i:i + size] for i in range(0, len(block), size)]
+
+    if len(parts) <= 1:
+        return _split_block(block, max_tokens, count, level + 1)
+
+    pieces: list[str] = []
+    for part in parts:
+        pieces.extend(_split_block(part, max_tokens, count, level + 1))
+    return _pack(pieces, max_tokens, count, sep)
+
+
+def _pack(pieces: list[str], max_tokens: int, count: Callable[[str], int], sep: str) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = count(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(sep.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(sep.join(current))
+    return chunks
+
+
+def split_markdown(content: str, max_tokens: int, count: Callable[[str], int] = approx_tokens) -> list[str]:
+    """Split markdown into chunks of at most ~`max_tokens` tokens each."""
+    content = content.strip()
+    if not content:
+        return []
+    return [c for c in _split_block(content, max(1, max_tokens), count, 0) if c.strip()]
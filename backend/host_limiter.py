@@ -0,0 +1,226 @@
+"""
+Process-wide, per-host adaptive rate limiting for page fetches.
+
+Every browser fetch (crawl, collect-links, batch-crawl) takes a slot from
+`HostLimiter.slot(url)` first, so concurrent jobs against the same site
+share one budget instead of competing blindly.
+
+Each host gets a token bucket (requests per second) and a concurrency
+limit, both adjusted AIMD-style from the outcome of every fetch:
+
+- fast successes raise concurrency by ~1 per round trip and the rate by a
+  fixed step;
+- 429 / 503 halve both and pause the host (Retry-After when given);
+- errors and latency far above the host's baseline cut them back.
+"""
+import asyncio
+import email.utils
+import time
+import urllib.parse
+from contextlib import asynccontextmanager
+
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 300.0
+# Hosts idle this long are forgotten (their limits reset to the defaults).
+IDLE_FORGET_SECONDS = 3600.0
+
+
+def host_of(url: str) -> str:
+    parsed = urllib.parse.urlsplit(url)
+    return (parsed.netloc or parsed.path).lower()
+
+
+def parse_retry_after(value) -> float | None:
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, min(seconds, MAX_RETRY_AFTER))
+
+
+class _HostState:
+    def __init__(self, rate: float, concurrency: float):
+        self.rate = rate
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.waiting = 0
+        self.paused_until = 0.0
+        self.latency_ewma: float | None = None
+        self.baseline: float | None = None
+        self.ok = 0
+        self.errors = 0
+        self.throttled = 0
+        self.last_used = time.monotonic()
+        self.changed = asyncio.Event()
+
+    def refill(self, now: float):
+        burst = max(1.0, self.rate)
+        self.tokens = min(burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def wake(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class HostSlot:
+    """Handed out by `HostLimiter.slot()`; report how the fetch went with `done()`."""
+
+    def __init__(self):
+        self.status: int | None = None
+        self.error = False
+        self.retry_after: float | None = None
+        self.latency: float | None = None
+
+    def done(self, status: int | None = None, error: bool = False, retry_after=None, latency: float | None = None):
+        self.status = status
+        self.error = error
+        self.retry_after = parse_retry_after(retry_after)
+        self.latency = latency
+
+
+class HostLimiter:
+    def __init__(
+        self,
+        initial_rate: float = 2.0,
+        min_rate: float = 0.1,
+        max_rate: float = 10.0,
+        initial_concurrency: int = 2,
+        max_concurrency: int = 8,
+        rate_step: float = 0.25,
+        latency_factor: float = 2.5,
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.rate_step = rate_step
+        self.latency_factor = latency_factor
+        self._hosts: dict[str, _HostState] = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            self._forget_idle()
+            state = self._hosts[host] = _HostState(self.initial_rate, float(self.initial_concurrency))
+        return state
+
+    def _forget_idle(self):
+        now = time.monotonic()
+        for host, state in list(self._hosts.items()):
+            if not state.in_flight and not state.waiting and now - state.last_used > IDLE_FORGET_SECONDS:
+                del self._hosts[host]
+
+    async def _acquire(self, state: _HostState):
+        state.waiting += 1
+        try:
+            while True:
+                now = time.monotonic()
+                state.refill(now)
+                if now < state.paused_until:
+                    delay = state.paused_until - now
+                elif state.in_flight >= max(1, int(state.concurrency)):
+                    delay = None  # until a fetch finishes
+                elif state.tokens < 1.0:
+                    delay = (1.0 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1.0
+                    state.in_flight += 1
+                    state.last_used = now
+                    return
+                changed = state.changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            state.waiting -= 1
+
+    def _record(self, state: _HostState, slot: HostSlot):
+        now = time.monotonic()
+        if slot.status in THROTTLE_STATUSES:
+            state.throttled += 1
+            state.concurrency = max(1.0, state.concurrency / 2)
+            state.rate = max(self.min_rate, state.rate / 2)
+            pause = slot.retry_after if slot.retry_after is not None else min(MAX_RETRY_AFTER, 1.0 / state.rate)
+            state.paused_until = max(state.paused_until, now + pause)
+            return
+
+        if slot.error or (slot.status is not None and slot.status >= 500):
+            state.errors += 1
+            state.concurrency = max(1.0, state.concurrency * 0.7)
+            state.rate = max(self.min_rate, state.rate * 0.7)
+            return
+
+        state.ok += 1
+        if slot.latency is None:
+            return
+        latency = slot.latency
+        state.latency_ewma = latency if state.latency_ewma is None else 0.7 * state.latency_ewma + 0.3 * latency
+        # Baseline follows the fastest recent fetches but drifts up slowly
+        # so a host that is simply slow is not punished forever.
+        state.baseline = latency if state.baseline is None else min(latency, state.baseline * 1.02)
+
+        if state.latency_ewma > self.latency_factor * state.baseline:
+            state.concurrency = max(1.0, state.concurrency * 0.9)
+        else:
+            state.concurrency = min(float(self.max_concurrency), state.concurrency + 1.0 / state.concurrency)
+            state.rate = min(self.max_rate, state.rate + self.rate_step)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        state = self._state(host_of(url))
+        await self._acquire(state)
+        slot = HostSlot()
+        started = time.monotonic()
+        cancelled = False
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            # The job was stopped; says nothing about the host.
+            cancelled = True
+            raise
+        except BaseException:
+            slot.error = True
+            raise
+        finally:
+            if slot.latency is None and not slot.error:
+                slot.latency = time.monotonic() - started
+            state.in_flight -= 1
+            state.last_used = time.monotonic()
+            if not cancelled:
+                self._record(state, slot)
+            state.wake()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        hosts = {}
+        for host, state in sorted(self._hosts.items(), key=lambda kv: -kv[1].last_used):
+            state.refill(now)
+            hosts[host] = {
+                "rate_per_s": round(state.rate, 3),
+                "concurrency": max(1, int(state.concurrency)),
+                "in_flight": state.in_flight,
+                "waiting": state.waiting,
+                "paused_for_s": round(max(0.0, state.paused_until - now), 2),
+                "latency_ewma_ms": round(state.latency_ewma * 1000, 1) if state.latency_ewma is not None else None,
+                "baseline_ms": round(state.baseline * 1000, 1) if state.baseline is not None else None,
+                "ok": state.ok,
+                "errors": state.errors,
+                "throttled": state.throttled,
+            }
+        return {
+            "initial_rate_per_s": self.initial_rate,
+            "max_rate_per_s": self.max_rate,
+            "max_concurrency": self.max_concurrency,
+            "hosts": hosts,
+        }
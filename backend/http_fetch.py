@@ -0,0 +1,267 @@
+"""
+Lightweight HTTP fetching for static pages, with a per-host browser fallback.
+
+The fetch strategy decides how a page is loaded:
+
+    browser   always the pooled headless browser
+    http      only the pooled keep-alive HTTP/2 client
+    auto      HTTP first, then the browser if the page looks rendered by
+              JavaScript (almost no text, a "please enable JavaScript"
+              <noscript> shell, an empty SPA mount point such as
+              <div id="root"></div>), is not HTML, is larger than
+              `max_bytes`, the server refuses non-browser clients
+              (401 / 403) or answers 429 / 5xx
+
+In `auto` mode the verdict is remembered per host for `memory_ttl` seconds.
+A host that needed the browser goes straight to it. A host that served
+static pages keeps using HTTP, and switches to the browser if one of its
+pages later looks JS-rendered.
+
+HTTP responses go through crawl4ai's own scraping strategy and markdown
+generator, the same steps `AsyncWebCrawler` runs after loading a page, so
+`html`, `cleaned_html`, `markdown` and `links` come out in the same shape
+as a browser result.
+"""
+import asyncio
+import re
+import time
+import urllib.parse
+
+import httpx
+from crawl4ai import CrawlerRunConfig, DefaultMarkdownGenerator
+from crawl4ai.utils import sanitize_input_encode
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+FETCH_STRATEGIES = ("browser", "http", "auto")
+
+# Same family of UA the headless browser sends, so servers return the same markup.
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+)
+
+_STRIP = re.compile(r"<(script|style|noscript|template|svg)\b.*?</\1\s*>|<!--.*?-->", re.I | re.S)
+_TAG = re.compile(r"<[^>]+>")
+_BODY = re.compile(r"<body\b[^>]*>(.*)</body\s*>", re.I | re.S)
+_NOSCRIPT_JS = re.compile(r"<noscript\b[^>]*>(?:(?!</noscript).)*(?:javascript|자바스크립트)", re.I | re.S)
+_SPA_SHELL = re.compile(
+    r"<(div|main)\b[^>]*\bid=[\"'](?:root|app|__next|__nuxt|q-app|svelte)[\"'][^>]*>\s*</\1>"
+    r"|<app-root\b[^>]*>\s*</app-root>"
+    r"|\bng-app\b|\bdata-reactroot\b|window\.__(?:NUXT|INITIAL_STATE|APOLLO_STATE)__",
+    re.I,
+)
+# Status codes that usually mean "not for non-browser clients" rather than a real answer
+_BLOCKED_STATUSES = {401, 403}
+_HTML_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "")
+
+
+def visible_text_length(html: str) -> int:
+    body = _BODY.search(html)
+    text = _TAG.sub(" ", _STRIP.sub(" ", body.group(1) if body else html))
+    return len(" ".join(text.split()))
+
+
+def js_rendered_reason(html: str, min_text: int = 200) -> str | None:
+    """Why `html` looks like it needs a browser to render, or None if it looks static."""
+    text = visible_text_length(html)
+    if text < min_text:
+        return "empty_body"
+    # Shell markers only count when there is little server-rendered text next to them
+    # (SSR frameworks keep their mount points and state blobs on fully rendered pages).
+    if text < min_text * 5:
+        if _NOSCRIPT_JS.search(html):
+            return "noscript"
+        if _SPA_SHELL.search(html):
+            return "spa_shell"
+    return None
+
+
+class HttpPage:
+    """Duck-types the subset of `CrawlResult` the endpoints read."""
+
+    from_cache = False
+    fetched_via = "http"
+
+    def __init__(self, url: str, html: str = "", status_code: int | None = None, response_headers: dict | None = None,
+                 redirected_url: str = "", error_message: str = ""):
+        self.url = url
+        self.html = html
+        self.cleaned_html = ""
+        self.markdown = ""
+        self.links: dict = {}
+        self.status_code = status_code
+        self.response_headers = response_headers or {}
+        self.redirected_url = redirected_url or url
+        self.error_message = error_message
+        # Error statuses are failures even with a body, so they are neither cached nor hide an `auto` fallback.
+        self.success = bool(html) and not error_message and not (status_code and status_code >= 400)
+
+
+def process_html(page: HttpPage, config=None) -> HttpPage:
+    """Fill cleaned_html / markdown / links the way `AsyncWebCrawler.aprocess_html` does."""
+    config = config or CrawlerRunConfig()
+    params = config.__dict__.copy()
+    params.pop("url", None)
+    scraped = config.scraping_strategy.scrap(page.redirected_url, page.html, **params)
+    page.cleaned_html = sanitize_input_encode(scraped.cleaned_html)
+    page.links = scraped.links.model_dump() if hasattr(scraped.links, "model_dump") else scraped.links
+    generator = config.markdown_generator or DefaultMarkdownGenerator()
+    page.markdown = generator.generate_markdown(input_html=page.cleaned_html, base_url=page.redirected_url).raw_markdown
+    return page
+
+
+class HttpFetcher:
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        http2: bool = True,
+        min_text: int = 200,
+        memory_ttl: float = 86400.0,
+        max_bytes: int = 20 * 1024 * 1024,
+    ):
+        self.timeout = timeout
+        self.max_connections = max(1, max_connections)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.min_text = min_text
+        self.memory_ttl = memory_ttl
+        self.max_bytes = max_bytes
+
+        self._client: httpx.AsyncClient | None = None
+        # host -> (strategy, decided_at)
+        self._hosts: dict[str, tuple[str, float]] = {}
+
+        # Stats
+        self._requests = 0
+        self._http2_responses = 0
+        self._errors = 0
+        self._bytes = 0
+        self._latency_total = 0.0
+        self._fallbacks: dict[str, int] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout, connect=min(10.0, self.timeout)),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+                },
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ── Per-host memory ─────────────────────────────────
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urllib.parse.urlsplit(url).netloc.lower()
+
+    def choose(self, url: str, strategy: str) -> str:
+        """'http' or 'browser' for this URL under `strategy`."""
+        if strategy != "auto":
+            return strategy
+        remembered = self._hosts.get(self._host(url))
+        if remembered is not None and time.monotonic() - remembered[1] < self.memory_ttl:
+            return remembered[0]
+        return "http"
+
+    def remember(self, url: str, strategy: str):
+        self._hosts[self._host(url)] = (strategy, time.monotonic())
+
+    def fallback(self, url: str, reason: str, remember: bool = True):
+        """Record that an `auto` fetch of `url` is being handed to the browser."""
+        self._fallbacks[reason] = self._fallbacks.get(reason, 0) + 1
+        if remember:
+            self.remember(url, "browser")
+
+    # ── Fetching ────────────────────────────────────────
+
+    async def fetch(self, url: str) -> tuple[HttpPage, str | None]:
+        """GET `url`. Returns the raw page and, for `auto`, why it should go to the browser instead.
+
+        Transport errors, 429 and 5xx come back as an unsuccessful page with
+        reason "error". Non-HTML and oversized bodies are not downloaded.
+        """
+        self._requests += 1
+        started = time.monotonic()
+        try:
+            async with self._get_client().stream("GET", url) as response:
+                page, reason = await self._read(url, response)
+        except httpx.HTTPError as e:
+            self._errors += 1
+            return HttpPage(url, error_message=f"{type(e).__name__}: {e}" if str(e) else type(e).__name__), "error"
+        finally:
+            self._latency_total += time.monotonic() - started
+        return page, reason
+
+    async def _read(self, url: str, response: httpx.Response) -> tuple[HttpPage, str | None]:
+        if response.http_version == "HTTP/2":
+            self._http2_responses += 1
+        status = response.status_code
+        page = HttpPage(url, status_code=status, response_headers=dict(response.headers), redirected_url=str(response.url))
+
+        content_type = response.headers.get("content-type", "text/html").split(";")[0].strip().lower()
+        if content_type not in _HTML_TYPES:
+            page.error_message = f"Not an HTML page ({content_type})"
+            return page, "not_html"
+        length = response.headers.get("content-length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            page.error_message = f"Page too large ({int(length)} bytes)"
+            return page, "too_large"
+
+        body = bytearray()
+        async for data in response.aiter_bytes():
+            body.extend(data)
+            if len(body) > self.max_bytes:
+                page.error_message = f"Page too large (over {self.max_bytes} bytes)"
+                return page, "too_large"
+        self._bytes += len(body)
+        try:
+            page.html = body.decode(response.charset_encoding or "utf-8", errors="replace")
+        except LookupError:  # unknown charset name
+            page.html = body.decode("utf-8", errors="replace")
+
+        if status >= 400:
+            page.error_message = f"HTTP {status}"
+            page.success = False
+            if status in _BLOCKED_STATUSES:
+                return page, "blocked"
+            # 429 / 5xx may be transient; other 4xx: the browser would get the same answer
+            return page, "error" if status == 429 or status >= 500 else None
+        page.success = bool(page.html)
+        return page, js_rendered_reason(page.html, self.min_text)
+
+    async def process(self, page: HttpPage, config=None) -> HttpPage:
+        """Run the crawl4ai scraping + markdown steps off the event loop."""
+        if not page.success:
+            return page
+        return await asyncio.to_thread(process_html, page, config)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        decided = [strategy for strategy, at in self._hosts.values() if now - at < self.memory_ttl]
+        return {
+            "http2": self.http2,
+            "requests": self._requests,
+            "http2_responses": self._http2_responses,
+            "errors": self._errors,
+            "bytes": self._bytes,
+            "avg_latency_ms": round(self._latency_total / self._requests * 1000, 2) if self._requests else 0.0,
+            "fallbacks": dict(self._fallbacks),
+            "hosts_http": decided.count("http"),
+            "hosts_browser": decided.count("browser"),
+        }
@@ -0,0 +1,387 @@
+"""
+Durable background jobs for long crawls (batch-crawl, collect-links).
+
+A job runs an async event generator in a background task, detached from
+the HTTP request that started it. Every event it yields gets a sequence
+number and is appended to a local SQLite store, so a client can close the
+tab and later re-attach to the job's stream from any offset, or list and
+cancel jobs.
+
+Events are buffered in memory and flushed in small batches (`flush_size`
+events or `flush_interval` seconds) so a fast job does not commit per
+event; live readers are served from that buffer, so they never wait for a
+flush. At most `max_running` jobs run at once, the rest wait as `queued`.
+A waiting job's stream gets a `queued` event with its place in line, and
+another one each time that place changes, so clients are not left with a
+silent stream.
+Jobs still running when the process stops are marked `interrupted` on the
+next start.
+"""
+import asyncio
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+import uuid
+from typing import AsyncIterator
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "interrupted")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+"""
+
+_JOB_COLUMNS = "job_id, kind, status, request, created_at, updated_at, event_count, error, summary"
+
+
+def _job_row(row) -> dict:
+    job_id, kind, status, request, created_at, updated_at, event_count, error, summary = row
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "status": status,
+        "request": json.loads(request),
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "event_count": event_count,
+        "error": error,
+        "summary": json.loads(summary) if summary else None,
+    }
+
+
+class JobStore:
+    """SQLite persistence for jobs and their event logs (thread-safe, sync)."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def create(self, job_id: str, kind: str, request: dict):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO jobs (job_id, kind, status, request, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(request, ensure_ascii=False), now, now),
+            )
+            db.commit()
+
+    def append(self, job_id: str, events: list[tuple[int, dict]]):
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO job_events (job_id, seq, data) VALUES (?, ?, ?)",
+                [(job_id, seq, json.dumps(event, ensure_ascii=False)) for seq, event in events],
+            )
+            db.execute(
+                "UPDATE jobs SET event_count = ?, updated_at = ? WHERE job_id = ?",
+                (events[-1][0] + 1, time.time(), job_id),
+            )
+            db.commit()
+
+    def set_status(self, job_id: str, status: str, error: str = "", summary: dict | None = None):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, summary = COALESCE(?, summary), updated_at = ? WHERE job_id = ?",
+                (status, error, json.dumps(summary, ensure_ascii=False) if summary is not None else None, time.time(), job_id),
+            )
+            db.commit()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db().execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _job_row(row) if row else None
+
+    def list_jobs(self, limit: int = 50, status: str | None = None, kind: str | None = None) -> list[dict]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [_job_row(row) for row in rows]
+
+    def events(self, job_id: str, offset: int = 0, limit: int = 500) -> list[tuple[int, dict]]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def mark_interrupted(self) -> int:
+        with self._lock:
+            db = self._db()
+            cur = db.execute(
+                "UPDATE jobs SET status = 'interrupted', error = 'Server stopped while the job was running', updated_at = ? "
+                "WHERE status IN ('queued', 'running')",
+                (time.time(),),
+            )
+            db.commit()
+            return cur.rowcount
+
+    def prune(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "DELETE FROM job_events WHERE job_id IN (SELECT job_id FROM jobs WHERE updated_at < ? AND status IN (?, ?, ?, ?))",
+                (cutoff, *TERMINAL_STATUSES),
+            )
+            cur = db.execute(
+                "DELETE FROM jobs WHERE updated_at < ? AND status IN (?, ?, ?, ?)",
+                (cutoff, *TERMINAL_STATUSES),
+            )
+            db.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _RunningJob:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.task: asyncio.Task | None = None
+        self.seq = 0
+        self.pending: list[tuple[int, dict]] = []   # not yet flushed to the store
+        self.flushing: list[tuple[int, dict]] = []  # being written right now
+        self.last_flush = time.monotonic()
+        self.changed = asyncio.Event()
+        self.status = "queued"
+        self.error = ""
+        self.summary: dict | None = None
+        self.cancel_requested = False
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def unflushed(self) -> list[tuple[int, dict]]:
+        return self.flushing + self.pending
+
+
+class JobManager:
+    def __init__(
+        self,
+        store: JobStore,
+        max_running: int = 2,
+        retention: float = 7 * 86400.0,
+        flush_size: int = 100,
+        flush_interval: float = 0.25,
+    ):
+        self.store = store
+        self.max_running = max(1, max_running)
+        self.retention = retention
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._slots: asyncio.Semaphore | None = None
+        self._running: dict[str, _RunningJob] = {}
+        self._waiting: list[_RunningJob] = []
+        self._closing = False
+        self.started = 0
+        self.cancelled = 0
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.max_running)
+        await asyncio.to_thread(self.store.mark_interrupted)
+        await asyncio.to_thread(self.store.prune, self.retention)
+
+    async def close(self):
+        self._closing = True
+        tasks = [run.task for run in self._running.values() if run.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.store.close()
+
+    # ── Running ─────────────────────────────────────────
+
+    async def submit(self, kind: str, request: dict, events: AsyncIterator[dict]) -> str:
+        """Persist a new job and start consuming `events` in the background."""
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.create, job_id, kind, request)
+        run = self._running[job_id] = _RunningJob(job_id)
+        run.task = asyncio.create_task(self._run(run, events))
+        self.started += 1
+        return job_id
+
+    def _emit(self, run: _RunningJob, event: dict):
+        run.pending.append((run.seq, event))
+        run.seq += 1
+        run.notify()
+
+    async def _flush(self, run: _RunningJob):
+        if not run.pending:
+            return
+        run.flushing, run.pending = run.pending, []
+        try:
+            await asyncio.to_thread(self.store.append, run.job_id, run.flushing)
+        finally:
+            run.flushing = []
+            run.last_flush = time.monotonic()
+
+    def _emit_queued(self, run: _RunningJob, position: int):
+        self._emit(run, {"type": "queued", "position": position, "max_running": self.max_running})
+
+    async def _acquire_slot(self, run: _RunningJob):
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        self._waiting.append(run)
+        self._emit_queued(run, len(self._waiting))
+        try:
+            await self._slots.acquire()
+        finally:
+            index = self._waiting.index(run)
+            self._waiting.remove(run)
+            for position, other in enumerate(self._waiting[index:], index + 1):
+                self._emit_queued(other, position)
+
+    async def _run(self, run: _RunningJob, events: AsyncIterator[dict]):
+        try:
+            await self._acquire_slot(run)
+            try:
+                run.status = "running"
+                await asyncio.to_thread(self.store.set_status, run.job_id, "running")
+                run.notify()
+                async for event in events:
+                    self._emit(run, event)
+                    if event.get("type") == "error":
+                        run.error = event.get("message", "")
+                    elif event.get("type") in ("done", "complete"):
+                        run.summary = {k: v for k, v in event.items() if k != "type"}
+                    if len(run.pending) >= self.flush_size or time.monotonic() - run.last_flush >= self.flush_interval:
+                        await self._flush(run)
+            finally:
+                self._slots.release()
+            run.status = "failed" if run.error else "completed"
+        except asyncio.CancelledError:
+            # Cancelling the task also closes the generator, whose finally
+            # block cancels its workers and hands their browsers back.
+            run.status = "cancelled" if run.cancel_requested and not self._closing else "interrupted"
+            self._emit(run, {"type": "cancelled", "message": "Job cancelled" if run.status == "cancelled" else "Server shutting down"})
+        except Exception as e:
+            run.status, run.error = "failed", str(e)
+            self._emit(run, {"type": "error", "message": str(e)})
+        finally:
+            await asyncio.shield(self._finish(run, events))
+
+    async def _finish(self, run: _RunningJob, events: AsyncIterator[dict]):
+        try:
+            await events.aclose()
+        except Exception:
+            pass
+        await self._flush(run)
+        await asyncio.to_thread(self.store.set_status, run.job_id, run.status, run.error, run.summary)
+        self._running.pop(run.job_id, None)
+        run.notify()
+
+    async def cancel(self, job_id: str) -> bool:
+        run = self._running.get(job_id)
+        if run is None or run.task is None:
+            return False
+        run.cancel_requested = True
+        self.cancelled += 1
+        run.task.cancel()
+        await asyncio.gather(run.task, return_exceptions=True)
+        return True
+
+    # ── Reading ─────────────────────────────────────────
+
+    async def get(self, job_id: str) -> dict | None:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        run = self._running.get(job_id)
+        if job is not None and run is not None:
+            # The store lags the running job by at most one flush.
+            job.update(status=run.status, event_count=run.seq)
+        return job
+
+    async def list_jobs(self, limit: int = 50, status: str | None = None, kind: str | None = None) -> list[dict]:
+        jobs = await asyncio.to_thread(self.store.list_jobs, limit, status, kind)
+        for job in jobs:
+            run = self._running.get(job["job_id"])
+            if run is not None:
+                job.update(status=run.status, event_count=run.seq)
+        return jobs
+
+    async def stream(self, job_id: str, offset: int = 0, keepalive: float = 15.0) -> AsyncIterator[tuple[int, dict] | None]:
+        """Yield `(seq, event)` from `offset` on, following the job until it ends.
+
+        Yields None every `keepalive` seconds without news so SSE callers can
+        send a comment line and notice disconnected clients.
+        """
+        offset = max(0, offset)
+        while True:
+            run = self._running.get(job_id)
+            changed = run.changed if run is not None else None
+            rows = await asyncio.to_thread(self.store.events, job_id, offset)
+            for seq, event in rows:
+                yield seq, event
+                offset = seq + 1
+            if rows:
+                continue
+            if run is None:
+                return  # finished before the store read, so the store was complete
+            buffered = run.unflushed()
+            if buffered and buffered[0][0] > offset:
+                continue  # a flush landed between the reads; fetch it from the store
+            fresh = [(seq, event) for seq, event in buffered if seq >= offset]
+            for seq, event in fresh:
+                yield seq, event
+                offset = seq + 1
+            if fresh:
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def stats(self) -> dict:
+        running = [run for run in self._running.values() if run.status == "running"]
+        return {
+            "running": len(running),
+            "queued": len(self._running) - len(running),
+            "max_running": self.max_running,
+            "started": self.started,
+            "cancelled": self.cancelled,
+        }
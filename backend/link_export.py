@@ -0,0 +1,79 @@
+"""
+Server-side export of collect-links results.
+
+Links are appended to a gzip-compressed NDJSON or CSV file as they are
+discovered, so the SSE stream only needs to carry totals and a download
+URL instead of every link in the final event.
+"""
+import csv
+import gzip
+import io
+import json
+import pathlib
+import threading
+import time
+import uuid
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CSV_COLUMNS = ("href", "text", "category", "parent_url", "depth", "scope")
+
+_ID_CHARS = set("0123456789abcdef")
+
+
+class LinkExporter:
+    def __init__(self, export_dir: pathlib.Path, fmt: str):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+        self.fmt = fmt
+        self.export_id = uuid.uuid4().hex
+        export_dir.mkdir(parents=True, exist_ok=True)
+        self.path = export_dir / f"{self.export_id}.{fmt}.gz"
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(self.path, "wt", encoding="utf-8", newline="")
+        if fmt == "csv":
+            # UTF-8 BOM so Excel opens Korean text correctly
+            self._file.write("\ufeff")
+            csv.writer(self._file).writerow(CSV_COLUMNS)
+
+    def write(self, items: list[dict], scope: str):
+        """Append link dicts (LinkItem.model_dump()) tagged 'internal' or 'external'."""
+        if not items:
+            return
+        with self._lock:
+            if self.fmt == "ndjson":
+                self._file.write("".join(json.dumps({**item, "scope": scope}, ensure_ascii=False) + "\n" for item in items))
+            else:
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                for item in items:
+                    writer.writerow([item.get(col, scope if col == "scope" else "") for col in CSV_COLUMNS])
+                self._file.write(buf.getvalue())
+            self.count += len(items)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def find_export(export_dir: pathlib.Path, export_id: str) -> pathlib.Path | None:
+    if not export_id or not set(export_id) <= _ID_CHARS:
+        return None
+    for fmt in EXPORT_FORMATS:
+        path = export_dir / f"{export_id}.{fmt}.gz"
+        if path.is_file():
+            return path
+    return None
+
+
+def prune_exports(export_dir: pathlib.Path, max_age_seconds: float):
+    if not export_dir.is_dir():
+        return
+    cutoff = time.time() - max_age_seconds
+    for path in export_dir.glob("*.gz"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
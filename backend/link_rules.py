@@ -0,0 +1,155 @@
+"""
+Compiled link categorizer for the link collector.
+
+Rules come from a JSON config (`VCRAWL_LINK_RULES`) or `DEFAULT_RULES`:
+
+    {
+      "default": "Standard",
+      "categories": [                      # first match wins
+        {"name": "File Download", "extensions": [".pdf", ...]},
+        {"name": "Board/Forum", "url_keywords": ["board", ...], "text_keywords": ["게시판", ...]}
+      ],
+      "domains": {                         # per-domain overrides (host or any subdomain)
+        "example.com": {"categories": [...], "default": "Standard"}
+      }
+    }
+
+A category matches when the lower-cased URL ends with one of `extensions`
+(optionally followed by a query string), contains one of `url_keywords`,
+matches one of `url_patterns` (regexes), or the lower-cased link text
+contains one of `text_keywords`. Domain categories are tried before the
+global ones.
+
+Each category's keywords, extensions and patterns are compiled into one URL
+regex and one text regex, so a link costs at most two regex searches per
+category, however long the keyword lists get. (A single regex covering all
+categories would need lookaheads to keep priority order; that defeats the
+regex engine's literal-prefix scan and measured slower.)
+"""
+import json
+import pathlib
+import re
+from typing import Callable
+
+DEFAULT_RULES = {
+    "default": "Standard",
+    "categories": [
+        {
+            "name": "File Download",
+            "extensions": [
+                ".pdf", ".zip", ".rar", ".hwp", ".doc", ".docx",
+                ".xls", ".xlsx", ".ppt", ".pptx", ".csv",
+                ".png", ".jpg", ".jpeg", ".gif", ".mp3", ".mp4", ".avi",
+            ],
+        },
+        {
+            "name": "Board/Forum",
+            "url_keywords": ["board", "forum", "bbs", "view", "article", "notice", "list.do", "view.do"],
+            "text_keywords": ["게시판", "공지사항", "자료실", "목록"],
+        },
+    ],
+    "domains": {},
+}
+
+_RULE_KEYS = {"name", "extensions", "url_keywords", "url_patterns", "text_keywords"}
+
+
+def _alternation(words: list[str]) -> str:
+    # Longest first so the regex engine settles on a match as early as possible.
+    return "|".join(re.escape(w.lower()) for w in sorted(set(words), key=len, reverse=True) if w)
+
+
+def _url_pattern(rule: dict) -> str:
+    parts = []
+    if rule.get("extensions"):
+        parts.append(rf"(?:{_alternation(rule['extensions'])})(?:\?|\Z)")
+    if rule.get("url_keywords"):
+        parts.append(_alternation(rule["url_keywords"]))
+    for pattern in rule.get("url_patterns") or []:
+        re.compile(pattern)  # fail early with the offending pattern
+        parts.append(f"(?:{pattern})")
+    return "|".join(parts)
+
+
+
+_HOST_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^/?#@]*@)?([^/?#:]*)")
+
+
+def _host(url: str) -> str:
+    """Lower-cased host of an absolute URL ('' for relative ones); cheaper than urlsplit."""
+    m = _HOST_RE.match(url)
+    return m.group(1).lower() if m else ""
+
+
+class CompiledRules:
+    def __init__(self, categories: list[dict], default: str):
+        for rule in categories:
+            unknown = set(rule) - _RULE_KEYS
+            if not rule.get("name") or unknown:
+                raise ValueError(f"Invalid link rule {rule!r}" + (f" (unknown keys: {', '.join(sorted(unknown))})" if unknown else ""))
+        self.names = [rule["name"] for rule in categories]
+        self.default = default
+        self._checks: list[tuple[str, Callable | None, Callable | None]] = []
+        for rule in categories:
+            url_pattern = _url_pattern(rule)
+            text_pattern = _alternation(rule.get("text_keywords") or [])
+            self._checks.append((
+                rule["name"],
+                re.compile(url_pattern).search if url_pattern else None,
+                re.compile(text_pattern).search if text_pattern else None,
+            ))
+
+    def categorize(self, url: str, text: str) -> str:
+        url = url.lower()
+        text = text.lower() if text else ""
+        for name, url_search, text_search in self._checks:
+            if url_search and url_search(url):
+                return name
+            if text_search and text and text_search(text):
+                return name
+        return self.default
+
+
+class LinkCategorizer:
+    def __init__(self, rules: dict | None = None):
+        rules = rules or DEFAULT_RULES
+        self.default = rules.get("default", "Standard")
+        global_categories = list(rules.get("categories") or [])
+        self._global = CompiledRules(global_categories, self.default)
+        self._domains: dict[str, CompiledRules] = {}
+        for domain, override in (rules.get("domains") or {}).items():
+            categories = list(override.get("categories") or []) + global_categories
+            self._domains[domain.lower().lstrip(".")] = CompiledRules(categories, override.get("default", self.default))
+        self._host_rules: dict[str, CompiledRules] = {}
+
+    @classmethod
+    def from_file(cls, path: str | pathlib.Path) -> "LinkCategorizer":
+        return cls(json.loads(pathlib.Path(path).read_text(encoding="utf-8")))
+
+    def _rules_for(self, url: str) -> CompiledRules:
+        if not self._domains:
+            return self._global
+        host = _host(url)
+        rules = self._host_rules.get(host)
+        if rules is None:
+            rules = self._global
+            labels = host.split(".")
+            # Most specific domain wins: a.b.example.com → b.example.com → example.com …
+            for i in range(len(labels)):
+                candidate = self._domains.get(".".join(labels[i:]))
+                if candidate is not None:
+                    rules = candidate
+                    break
+            if len(self._host_rules) < 10_000:
+                self._host_rules[host] = rules
+        return rules
+
+    def categorize(self, url: str, text: str) -> str:
+        return self._rules_for(url).categorize(url, text)
+
+    def categorize_many(self, links: list[tuple[str, str]]) -> list[str]:
+        """Classify a whole page's (url, text) pairs in one call."""
+        if not self._domains:
+            categorize = self._global.categorize
+            return [categorize(url, text) for url, text in links]
+        return [self._rules_for(url).categorize(url, text) for url, text in links]
@@ -0,0 +1,488 @@
+"""
+OpenAI Batch API helpers for the /api/v1/llm-batch endpoints.
+
+`convert_folder` turns a folder of crawled `.md` files into `batch_NNN.jsonl`
+shards. Files are read in parallel off the event loop, request lines are
+streamed to disk, and a shard is closed as soon as the next line would push
+it past the request, byte or estimated-token limit (OpenAI rejects batches
+whose enqueued tokens exceed the organization's queue limit). Every request
+is recorded in `_manifest.ndjson` (custom_id → source file, shard, line).
+
+`submit_shards` uploads shards and creates their batches concurrently with
+the async OpenAI client, retrying transient failures per shard.
+
+`fetch_results` streams output / error files to disk and unpacks them line
+by line in worker threads, several batches at a time.
+"""
+import asyncio
+import json
+import pathlib
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator
+
+from chunking import approx_tokens
+
+# OpenAI limits per input file
+MAX_REQUESTS_PER_FILE = 50_000
+# Target 500MB max per file to be safely under 512MB
+MAX_BYTES_PER_FILE = 500 * 1024 * 1024
+
+SHARD_GLOB = "batch_*.jsonl"
+MANIFEST_NAME = "_manifest.ndjson"
+
+
+def build_request(custom_id: str, content: str, instruction: str, model: str) -> dict:
+    if "gpt-5" in model:
+        messages = [{"role": "user", "content": f"System Instruction:\n{instruction}\n\nUser Content:\n{content}"}]
+        body = {
+            "model": model,
+            "messages": messages,
+            "reasoning_effort": "low"
+        }
+    else:
+        messages = [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": content}
+        ]
+        body = {
+            "model": model,
+            "messages": messages
+        }
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": body
+    }
+
+
+class _Prepared:
+    __slots__ = ("custom_id", "source", "line", "size", "tokens")
+
+    def __init__(self, custom_id: str, source: str, line: bytes, tokens: int):
+        self.custom_id = custom_id
+        self.source = source
+        self.line = line
+        self.size = len(line)
+        self.tokens = tokens
+
+
+def _prepare(path: pathlib.Path, instruction: str, instruction_tokens: int, model: str) -> _Prepared:
+    content = path.read_text(encoding="utf-8")
+    entry = build_request(path.stem, content, instruction, model)
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+    return _Prepared(path.stem, path.name, line, instruction_tokens + approx_tokens(content))
+
+
+class ShardWriter:
+    """Appends request lines to rotating shard files and the manifest (blocking; run in a thread)."""
+
+    def __init__(self, output_dir: pathlib.Path, max_requests: int, max_bytes: int, max_tokens: int):
+        self.output_dir = output_dir
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.shards: list[dict] = []
+        self._file = None
+        self._manifest = open(output_dir / MANIFEST_NAME, "w", encoding="utf-8")
+
+    def _open_next(self) -> dict:
+        self.close_shard()
+        shard = {"file": f"batch_{len(self.shards) + 1:03d}.jsonl", "requests": 0, "bytes": 0, "est_tokens": 0}
+        self.shards.append(shard)
+        self._file = open(self.output_dir / shard["file"], "wb")
+        return shard
+
+    def close_shard(self) -> dict | None:
+        if self._file is None:
+            return None
+        self._file.close()
+        self._file = None
+        return self.shards[-1]
+
+    def write(self, items: list[_Prepared]) -> list[dict]:
+        """Write items; return shards that were closed along the way."""
+        closed = []
+        for item in items:
+            shard = self.shards[-1] if self._file is not None else None
+            if shard is None or (shard["requests"] and (
+                shard["requests"] >= self.max_requests
+                or shard["bytes"] + item.size > self.max_bytes
+                or shard["est_tokens"] + item.tokens > self.max_tokens
+            )):
+                if shard is not None:
+                    closed.append(shard)
+                shard = self._open_next()
+            self._file.write(item.line)
+            self._manifest.write(json.dumps({
+                "custom_id": item.custom_id,
+                "source": item.source,
+                "shard": shard["file"],
+                "line": shard["requests"] + 1,
+                "est_tokens": item.tokens,
+            }, ensure_ascii=False) + "\n")
+            shard["requests"] += 1
+            shard["bytes"] += item.size
+            shard["est_tokens"] += item.tokens
+        return closed
+
+    def close(self) -> dict | None:
+        last = self.close_shard()
+        if not self._manifest.closed:
+            self._manifest.close()
+        return last
+
+
+async def convert_folder(
+    folder: pathlib.Path,
+    output_dir: pathlib.Path,
+    instruction: str,
+    model: str,
+    max_requests: int = MAX_REQUESTS_PER_FILE,
+    max_bytes: int = MAX_BYTES_PER_FILE,
+    max_tokens: int = 2_000_000,
+    read_concurrency: int = 8,
+    progress_interval: float = 0.5,
+) -> AsyncIterator[dict]:
+    """Build JSONL shards from `folder/*.md`, yielding progress / shard / done events."""
+    md_files = await asyncio.to_thread(lambda: sorted(folder.glob("*.md")))
+    if not md_files:
+        raise ValueError("No .md files found in the directory.")
+
+    def setup():
+        output_dir.mkdir(parents=True, exist_ok=True)
+        # Shards left over from a previous, larger run would be submitted too.
+        for stale in output_dir.glob(SHARD_GLOB):
+            stale.unlink()
+        return ShardWriter(output_dir, max_requests, max_bytes, max_tokens)
+
+    writer = await asyncio.to_thread(setup)
+    instruction_tokens = approx_tokens(instruction)
+    total = len(md_files)
+    processed = 0
+    last_progress = 0.0
+    # Read ahead up to `read_concurrency` files, but write them in folder order
+    # so shard contents are deterministic.
+    pending: deque[asyncio.Task] = deque()
+    files = iter(md_files)
+    window = max(1, read_concurrency)
+    try:
+        yield {"type": "progress", "processed": 0, "total": total, "shards": 0}
+
+        def refill():
+            while len(pending) < window * 2:
+                path = next(files, None)
+                if path is None:
+                    return
+                pending.append(asyncio.create_task(asyncio.to_thread(_prepare, path, instruction, instruction_tokens, model)))
+
+        refill()
+        while pending:
+            batch = [await pending.popleft()]
+            while pending and pending[0].done() and len(batch) < window:
+                batch.append(pending.popleft().result())
+            refill()
+
+            for shard in await asyncio.to_thread(writer.write, batch):
+                yield {"type": "shard", **shard}
+            processed += len(batch)
+
+            now = time.monotonic()
+            if now - last_progress >= progress_interval or processed == total:
+                last_progress = now
+                yield {"type": "progress", "processed": processed, "total": total, "shards": len(writer.shards)}
+
+        last = await asyncio.to_thread(writer.close)
+        if last is not None:
+            yield {"type": "shard", **last}
+
+        yield {
+            "type": "done",
+            "output_folder": str(output_dir),
+            "file_count": processed,
+            "batch_files_created": len(writer.shards),
+            "est_tokens": sum(s["est_tokens"] for s in writer.shards),
+            "manifest": str(output_dir / MANIFEST_NAME),
+            "shards": writer.shards,
+        }
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.to_thread(writer.close)
+
+
+# ── Submission ──────────────────────────────────────────────
+
+def _retryable(exc: Exception) -> bool:
+    import openai
+    if isinstance(exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429)
+    return False
+
+
+async def _with_retries(call, retries: int, base_delay: float):
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= retries or not _retryable(e):
+                raise
+            # Exponential backoff with jitter: ~1s, 2s, 4s … capped at 30s.
+            delay = min(30.0, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+async def submit_shards(
+    client,
+    files: list[pathlib.Path],
+    concurrency: int = 4,
+    retries: int = 4,
+    base_delay: float = 1.0,
+    completion_window: str = "24h",
+) -> tuple[list[dict], list[dict]]:
+    """Upload each shard and create its batch with an `openai.AsyncOpenAI` client.
+
+    Shards are handled concurrently (at most `concurrency` at a time) and each
+    step is retried on transient errors, so one failing shard does not stop
+    the others. Returns (created batches, failures) in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def submit_one(path: pathlib.Path) -> dict:
+        async with semaphore:
+            input_file_id = None
+            stage = "upload"
+            try:
+                async def upload():
+                    # Reopen on every attempt; the SDK streams the file from disk.
+                    with open(path, "rb") as f:
+                        return await client.files.create(file=f, purpose="batch")
+
+                file_obj = await _with_retries(upload, retries, base_delay)
+                input_file_id = file_obj.id
+                stage = "create"
+                batch_job = await _with_retries(
+                    lambda: client.batches.create(
+                        input_file_id=input_file_id,
+                        endpoint="/v1/chat/completions",
+                        completion_window=completion_window,
+                    ),
+                    retries,
+                    base_delay,
+                )
+                return {
+                    "batch_id": batch_job.id,
+                    "input_file_id": input_file_id,
+                    "filename": path.name,
+                    "status": batch_job.status,
+                }
+            except Exception as e:
+                return {
+                    "filename": path.name,
+                    "stage": stage,
+                    "input_file_id": input_file_id,
+                    "error": str(e) or type(e).__name__,
+                }
+
+    results = await asyncio.gather(*(submit_one(path) for path in files))
+    batches = [r for r in results if "batch_id" in r]
+    failures = [r for r in results if "batch_id" not in r]
+    return batches, failures
+
+
+# ── Results ─────────────────────────────────────────────
+
+MAX_BASE_LEN = 180  # leave room for suffix + .md
+REJECTED_SUFFIX = " [REJECTED]"
+FAILURES_NAME = "_failures.ndjson"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def result_path(output_dir: pathlib.Path, custom_id: str, llm_text: str) -> tuple[pathlib.Path, bool]:
+    # custom_id is the original file stem (e.g. "0001_pagename")
+    # Sanitize any Windows-illegal characters just in case
+    base_filename = re.sub(r'[<>:"\\|?*]', '_', custom_id)
+    if "[STATUS: REJECTED]" in llm_text:
+        # Trim base so total stays within OS limit
+        return output_dir / f"{base_filename[:MAX_BASE_LEN]}{REJECTED_SUFFIX}.md", True
+    return output_dir / f"{base_filename[:MAX_BASE_LEN + len(REJECTED_SUFFIX)]}.md", False
+
+
+# One lock per failures file: fetch_results calls for different batches
+# (e.g. tracker auto-downloads) can write to the same folder at once.
+_FAILURE_LOCKS: dict[pathlib.Path, threading.Lock] = {}
+_FAILURE_LOCKS_GUARD = threading.Lock()
+
+
+class FailureLog:
+    """Per-request failure records shared by concurrent result writers (thread-safe)."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.count = 0
+        with _FAILURE_LOCKS_GUARD:
+            self._lock = _FAILURE_LOCKS.setdefault(path.resolve(), threading.Lock())
+        self._file = None
+
+    def drop_batches(self, batch_ids: list[str]):
+        """Remove earlier records of `batch_ids`, so fetching a batch again does not duplicate them."""
+        drop = set(batch_ids)
+        with self._lock:
+            if not self.path.exists():
+                return
+            with open(self.path, "r+", encoding="utf-8") as f:
+                kept = []
+                for line in f:
+                    try:
+                        if json.loads(line).get("batch_id") in drop:
+                            continue
+                    except ValueError:
+                        pass
+                    kept.append(line)
+                # Rewritten in place: other writers hold append handles to this file.
+                f.seek(0)
+                f.writelines(kept)
+                f.truncate()
+
+    def add(self, record: dict):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+async def download_file(client, file_id: str, dest: pathlib.Path, chunk_size: int = 1024 * 1024):
+    """Stream a Files API download to `dest` without holding it in memory."""
+    f = await asyncio.to_thread(open, dest, "wb")
+    try:
+        async with client.files.with_streaming_response.content(file_id) as response:
+            async for chunk in response.iter_bytes(chunk_size):
+                await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def _write_outputs_sync(path: pathlib.Path, output_dir: pathlib.Path, batch_id: str, failures: FailureLog) -> tuple[int, int, int]:
+    written = rejected = failed = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result_data = json.loads(line)
+            custom_id = result_data.get("custom_id") or f"unknown_{uuid.uuid4().hex[:8]}"
+            response = result_data.get("response") or {}
+            if response.get("status_code", 200) != 200 or result_data.get("error"):
+                failures.add({
+                    "batch_id": batch_id,
+                    "custom_id": custom_id,
+                    "status_code": response.get("status_code"),
+                    "error": result_data.get("error") or (response.get("body") or {}).get("error"),
+                })
+                failed += 1
+                continue
+            try:
+                llm_text = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                llm_text = "ERROR: Failed to parse LLM response from batch result."
+            out_file, is_rejected = result_path(output_dir, custom_id, llm_text or "")
+            out_file.write_text(llm_text or "", encoding="utf-8")
+            written += 1
+            rejected += is_rejected
+    return written, rejected, failed
+
+
+def _write_errors_sync(path: pathlib.Path, batch_id: str, failures: FailureLog) -> int:
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            failures.add({
+                "batch_id": batch_id,
+                "custom_id": record.get("custom_id"),
+                "status_code": response.get("status_code"),
+                "error": record.get("error") or (response.get("body") or {}).get("error"),
+            })
+            count += 1
+    return count
+
+
+async def fetch_results(
+    client,
+    batch_ids: list[str],
+    output_dir: pathlib.Path,
+    concurrency: int = 4,
+    retries: int = 4,
+) -> dict:
+    """Download and unpack several batches concurrently.
+
+    Output and error files are streamed to temporary files, then parsed line
+    by line in a worker thread: every response becomes a `.md` file and
+    every failed request a record in `_failures.ndjson`, replacing the
+    records an earlier fetch of the same batches left there.
+    """
+    await asyncio.to_thread(output_dir.mkdir, parents=True, exist_ok=True)
+    failures = FailureLog(output_dir / FAILURES_NAME)
+    await asyncio.to_thread(failures.drop_batches, batch_ids)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(batch_id: str) -> dict:
+        summary = {"batch_id": batch_id, "status": None, "files": 0, "rejected": 0, "failed": 0}
+        async with semaphore:
+            try:
+                batch_job = await _with_retries(lambda: client.batches.retrieve(batch_id), retries, 1.0)
+                summary["status"] = batch_job.status
+                if batch_job.status not in TERMINAL_STATUSES:
+                    summary["error"] = f"Batch is still {batch_job.status}"
+                    return summary
+
+                for file_id, kind in ((batch_job.output_file_id, "output"), (batch_job.error_file_id, "error")):
+                    if not file_id:
+                        continue
+                    part = output_dir / f".{batch_id}_{kind}.jsonl.part"
+                    try:
+                        await _with_retries(lambda: download_file(client, file_id, part), retries, 1.0)
+                        if kind == "output":
+                            written, rejected, failed = await asyncio.to_thread(_write_outputs_sync, part, output_dir, batch_id, failures)
+                            summary["files"] += written
+                            summary["rejected"] += rejected
+                            summary["failed"] += failed
+                        else:
+                            summary["failed"] += await asyncio.to_thread(_write_errors_sync, part, batch_id, failures)
+                    finally:
+                        await asyncio.to_thread(part.unlink, missing_ok=True)
+            except Exception as e:
+                summary["error"] = str(e) or type(e).__name__
+            return summary
+
+    try:
+        batches = await asyncio.gather(*(fetch_one(batch_id) for batch_id in batch_ids))
+    finally:
+        failures.close()
+
+    return {
+        "output_folder": str(output_dir),
+        "total_files": sum(b["files"] for b in batches),
+        "rejected_count": sum(b["rejected"] for b in batches),
+        "failed_count": failures.count,
+        "failures_file": str(failures.path) if failures.count else "",
+        "batches": batches,
+    }
@@ -0,0 +1,94 @@
+"""
+Persistent cache for /api/v1/analyze results.
+
+Keyed by (llm_model, instruction, sha256 of content, analysis params) and
+stored in SQLite next to the page cache. Entries expire after a TTL and the
+total size is bounded with LRU eviction.
+"""
+import asyncio
+import hashlib
+import json
+import pathlib
+import time
+
+from sqlite_lru import SqliteLRUStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_results (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_results_accessed ON llm_results (accessed_at);
+"""
+
+
+def cache_key(model: str, instruction: str, content: str, params: dict | None = None) -> str:
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    raw = json.dumps(
+        {"model": model, "instruction": instruction, "content": content_hash, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: pathlib.Path, ttl: float = 7 * 86400.0, max_bytes: int = 64 * 1024 * 1024):
+        self.path = pathlib.Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._store = SqliteLRUStore(self.path, "llm_results", _SCHEMA, max_bytes)
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def evictions(self) -> int:
+        return self._store.evictions
+
+    def _get_sync(self, key: str) -> str | None:
+        row = self._store.get(key, "result, created_at")
+        if row is None:
+            return None
+        result, created_at = row
+        if time.time() - created_at > self.ttl:
+            self._store.delete(key)
+            return None
+        return result
+
+    def _put_sync(self, key: str, model: str, result: str):
+        now = time.time()
+        self._store.put(key, model=model, result=result, size=len(result.encode("utf-8")), created_at=now, accessed_at=now)
+
+    async def get(self, key: str) -> str | None:
+        result = await asyncio.to_thread(self._get_sync, key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def put(self, key: str, model: str, result: str):
+        if result:
+            await asyncio.to_thread(self._put_sync, key, model, result)
+
+    def stats(self) -> dict:
+        entries, size = self._store.counts()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        self._store.close()
@@ -1,11 +1,11 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from pydantic import BaseModel
-from crawl4ai import AsyncWebCrawler
+from typing import Literal
 import uvicorn
 import asyncio
 import sys
-import html2text
+import time
 import os
 from crawl4ai import LLMConfig
 from crawl4ai.extraction_strategy import LLMExtractionStrategy
@@ -20,8 +20,9 @@ import litellm
 import copy
 
 _original_completion = litellm.completion
+_original_acompletion = litellm.acompletion
 
-def _patched_completion(*args, **kwargs):
+def _adjust_gpt5_kwargs(args, kwargs):
     model = kwargs.get("model") or (args[0] if args else "")
     
     # Check if this is a gpt-5 family model
@@ -50,10 +51,16 @@ def _patched_completion(*args, **kwargs):
             
         # 3. Add reasoning effort for gpt-5 family
         kwargs["reasoning_effort"] = "low"
-            
-    return _original_completion(*args, **kwargs)
+    return kwargs
+
+def _patched_completion(*args, **kwargs):
+    return _original_completion(*args, **_adjust_gpt5_kwargs(args, kwargs))
+
+async def _patched_acompletion(*args, **kwargs):
+    return await _original_acompletion(*args, **_adjust_gpt5_kwargs(args, kwargs))
 
 litellm.completion = _patched_completion
+litellm.acompletion = _patched_acompletion
 # --------------------------------------------------------
 
 # Fix for Windows asyncio loop policy
@@ -61,7 +68,260 @@ litellm.completion = _patched_completion
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-app = FastAPI(title="Crawl4AI Tester")
+# --- Render profiles: resource blocking and adaptive render wait for browser loads ---
+from render_profile import LEGACY_DELAY, build_profiles, render_hooks
+
+RenderProfileName = Literal["full", "balanced", "lean"]
+_block_types = os.getenv("VCRAWL_BLOCK_RESOURCE_TYPES")
+render_profiles = build_profiles(
+    # Unset = image,media,font; empty = block no resource types (ad domains still apply)
+    block_types=tuple(t.strip() for t in _block_types.split(",") if t.strip()) if _block_types is not None else None,
+    extra_domains=tuple(os.getenv("VCRAWL_BLOCK_DOMAINS", "").split(",")),
+    quiet_ms=int(os.getenv("VCRAWL_RENDER_QUIET_MS", "500")),
+    max_wait_ms=int(os.getenv("VCRAWL_RENDER_MAX_WAIT_MS", "2000")),
+)
+# `full` (the previous fixed 2s delay, no blocking) until the other profiles are verified in a browser
+RENDER_PROFILE = os.getenv("VCRAWL_RENDER_PROFILE", "full")
+if RENDER_PROFILE not in render_profiles:
+    raise ValueError(f"VCRAWL_RENDER_PROFILE must be one of {', '.join(render_profiles)}")
+
+# --- Shared browser pool (one set of warm browsers for the app lifespan) ---
+from contextlib import asynccontextmanager
+from browser_pool import BrowserPool
+
+browser_pool = BrowserPool(
+    size=int(os.getenv("VCRAWL_POOL_SIZE", "4")),
+    max_pages_per_browser=int(os.getenv("VCRAWL_POOL_MAX_PAGES", "200")),
+    acquire_timeout=float(os.getenv("VCRAWL_POOL_ACQUIRE_TIMEOUT", "120")),
+    hooks=render_hooks(render_profiles),
+)
+
+# --- Persistent page cache (shared by crawl, collect-links and batch-crawl) ---
+import pathlib
+from page_cache import PageCache, config_key
+
+page_cache = PageCache(
+    path=pathlib.Path(os.getenv("VCRAWL_PAGE_CACHE_PATH", pathlib.Path(__file__).parent / ".vcrawl_cache" / "pages.sqlite3")),
+    ttl=float(os.getenv("VCRAWL_PAGE_CACHE_TTL", "86400")),
+    max_bytes=int(float(os.getenv("VCRAWL_PAGE_CACHE_MAX_MB", "512")) * 1024 * 1024),
+    revalidate=os.getenv("VCRAWL_PAGE_CACHE_REVALIDATE", "1") == "1",
+)
+
+CacheMode = Literal["use", "bypass", "refresh"]
+
+# --- Per-host adaptive rate limiting (shared by every page fetch, browser or HTTP) ---
+from host_limiter import HostLimiter
+
+host_limiter = HostLimiter(
+    initial_rate=float(os.getenv("VCRAWL_HOST_RATE", "2")),
+    max_rate=float(os.getenv("VCRAWL_HOST_MAX_RATE", "10")),
+    initial_concurrency=int(os.getenv("VCRAWL_HOST_CONCURRENCY", "2")),
+    max_concurrency=int(os.getenv("VCRAWL_HOST_MAX_CONCURRENCY", "8")),
+)
+
+# --- HTTP fetch strategy: browser, http (pooled HTTP/2 client) or auto (HTTP, browser fallback) ---
+from http_fetch import FETCH_STRATEGIES, HttpFetcher
+
+FetchStrategy = Literal["browser", "http", "auto"]
+FETCH_STRATEGY = os.getenv("VCRAWL_FETCH_STRATEGY", "browser")
+if FETCH_STRATEGY not in FETCH_STRATEGIES:
+    raise ValueError(f"VCRAWL_FETCH_STRATEGY must be one of {', '.join(FETCH_STRATEGIES)}")
+
+http_fetcher = HttpFetcher(
+    timeout=float(os.getenv("VCRAWL_HTTP_TIMEOUT", "30")),
+    max_connections=int(os.getenv("VCRAWL_HTTP_MAX_CONNECTIONS", "100")),
+    http2=os.getenv("VCRAWL_HTTP2", "1") == "1",
+    min_text=int(os.getenv("VCRAWL_HTTP_MIN_TEXT", "200")),
+    memory_ttl=float(os.getenv("VCRAWL_HTTP_HOST_TTL", "86400")),
+    max_bytes=int(float(os.getenv("VCRAWL_HTTP_MAX_MB", "20")) * 1024 * 1024),
+)
+
+# --- Metrics (Prometheus text on /metrics) ---
+from metrics import REGISTRY, STAGE_SECONDS, StageTimer
+
+OPERATION_SECONDS = REGISTRY.histogram("vcrawl_operation_seconds", "End-to-end latency per operation (crawl request, analyze request, collect-links / batch-crawl job)", ("operation",))
+IN_FLIGHT = REGISTRY.gauge("vcrawl_in_flight", "Operations currently running", ("operation",))
+PAGES = REGISTRY.counter("vcrawl_pages_total", "Pages fetched, from the browser, the HTTP client or the page cache", ("operation", "source"))
+FETCH_FALLBACKS = REGISTRY.counter("vcrawl_fetch_fallbacks_total", "auto-strategy pages handed from HTTP to the browser", ("reason",))
+PAGE_FAILURES = REGISTRY.counter("vcrawl_page_failures_total", "Failed page fetches by reason", ("operation", "reason"))
+CONTENT_BYTES = REGISTRY.counter("vcrawl_content_bytes_total", "Characters of HTML / markdown produced", ("operation", "kind"))
+LLM_REQUESTS = REGISTRY.counter("vcrawl_llm_requests_total", "LLM calls by model and outcome", ("model", "outcome"))
+LLM_TOKENS = REGISTRY.counter("vcrawl_llm_tokens_total", "LLM tokens by model and direction", ("model", "direction"))
+RENDER_BLOCKED = REGISTRY.counter("vcrawl_render_blocked_requests_total", "Browser sub-requests blocked by the render profile, by resource type or ad_domain", ("profile", "reason"))
+RENDER_WAIT_SAVED = REGISTRY.counter("vcrawl_render_wait_saved_seconds_total", f"Render wait saved against the fixed {LEGACY_DELAY:g}s delay", ("profile",))
+RENDER_WAIT_CAPPED = REGISTRY.counter("vcrawl_render_wait_capped_total", "Adaptive render waits that hit VCRAWL_RENDER_MAX_WAIT_MS", ("profile",))
+
+def _failure_reason(status: int | None = None, message: str = "") -> str:
+    """Coarse, low-cardinality reason for a failed fetch."""
+    if status and status >= 400:
+        return f"http_{status // 100}xx"
+    message = (message or "").lower()
+    if "timeout" in message or "timed out" in message:
+        return "timeout"
+    if "net::" in message or "dns" in message or "connection" in message:
+        return "network"
+    if "closed" in message or "crash" in message or "disconnected" in message:
+        return "browser"
+    return "other"
+
+async def _tracked(operation: str, events):
+    """Pass an event generator through, counting it as in flight and timing it."""
+    IN_FLIGHT.inc(operation=operation)
+    started = time.perf_counter()
+    try:
+        async for event in events:
+            yield event
+    finally:
+        IN_FLIGHT.dec(operation=operation)
+        OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        await events.aclose()
+
+async def _fetch_page(
+    url: str,
+    config=None,
+    cache_mode: CacheMode = "use",
+    operation: str = "crawl",
+    timer: StageTimer | None = None,
+    strategy: FetchStrategy | None = None,
+):
+    """Fetch one page through the page cache, then the HTTP client and/or a pooled browser.
+
+    `strategy` defaults to VCRAWL_FETCH_STRATEGY (see `http_fetch`). Stage
+    timings go to `timer` (and the `vcrawl_stage_seconds` histogram):
+    cache_lookup, host_wait, http_fetch, http_convert, browser_wait,
+    browser_launch, fetch, render_delay, cache_store. `render_delay` is the
+    part of a browser load spent waiting for the page to settle (the fixed
+    delay, or the adaptive wait of the render profile), `fetch` the rest of
+    it (navigation and crawl4ai scraping).
+    """
+    timer = timer or StageTimer(operation)
+    strategy = strategy or FETCH_STRATEGY
+    cfg_key = config_key(config, strategy)
+    if cache_mode == "use":
+        with timer.stage("cache_lookup"):
+            cached = await page_cache.get(url, cfg_key)
+        if cached is not None:
+            PAGES.inc(operation=operation, source="cache")
+            return cached
+
+    result = None
+    try:
+        if http_fetcher.choose(url, strategy) == "http":
+            result = await _fetch_http(url, config, strategy, timer)
+        if result is None:
+            result = await _fetch_browser(url, config, timer)
+    except Exception as e:
+        PAGE_FAILURES.inc(operation=operation, reason=_failure_reason(message=str(e)))
+        raise
+
+    PAGES.inc(operation=operation, source=getattr(result, "fetched_via", "browser"))
+    if result.success:
+        CONTENT_BYTES.inc(len(result.html or ""), operation=operation, kind="html")
+    else:
+        PAGE_FAILURES.inc(operation=operation, reason=_failure_reason(getattr(result, "status_code", None), getattr(result, "error_message", "")))
+
+    if cache_mode != "bypass":
+        with timer.stage("cache_store"):
+            await page_cache.put(url, cfg_key, result)
+    return result
+
+async def _fetch_http(url: str, config, strategy: str, timer: StageTimer):
+    """Fetch with the pooled HTTP client; None means `auto` should use the browser instead."""
+    queued = time.perf_counter()
+    async with host_limiter.slot(url) as slot:
+        timer.add("host_wait", time.perf_counter() - queued)
+        started = time.monotonic()
+        page, reason = await http_fetcher.fetch(url)
+        elapsed = time.monotonic() - started
+        timer.add("http_fetch", elapsed)
+        status = page.status_code
+        slot.done(
+            status=status,
+            error=reason == "error" or bool(status and status >= 500),
+            retry_after=page.response_headers.get("retry-after"),
+            latency=elapsed,
+        )
+
+    if strategy == "auto":
+        if reason is not None:
+            FETCH_FALLBACKS.inc(reason=reason)
+            # Network / server errors and non-HTML or oversized responses say nothing about how the host renders.
+            http_fetcher.fallback(url, reason, remember=reason not in ("error", "not_html", "too_large"))
+            return None
+        http_fetcher.remember(url, "http")
+
+    with timer.stage("http_convert"):
+        return await http_fetcher.process(page, config)
+
+async def _fetch_browser(url: str, config, timer: StageTimer):
+    profile = render_profiles.get(((config.shared_data or {}) if config is not None else {}).get("render_profile"))
+    render = None
+    if profile is not None:
+        # Fresh dict per load for the render hooks to report into.
+        render = {}
+        config = config.clone(shared_data={**config.shared_data, "render": render})
+
+    queued = time.perf_counter()
+    async with host_limiter.slot(url) as slot:
+        timer.add("host_wait", time.perf_counter() - queued)
+        async with browser_pool.acquire() as crawler:
+            timer.add("browser_wait", crawler.wait_seconds)
+            if crawler.launch_seconds:
+                timer.add("browser_launch", crawler.launch_seconds)
+            started = time.monotonic()
+            result = await crawler.arun(url=url, config=config) if config else await crawler.arun(url=url)
+            elapsed = time.monotonic() - started
+            status = getattr(result, "status_code", None)
+            headers = {k.lower(): v for k, v in (getattr(result, "response_headers", None) or {}).items()}
+            slot.done(
+                status=status,
+                # A 404 is an answer, not a sign the host is struggling.
+                error=not result.success and not (status and 400 <= status < 500),
+                retry_after=headers.get("retry-after"),
+                latency=elapsed,
+            )
+
+    delay = float(getattr(config, "delay_before_return_html", 0) or 0) if result.success else 0.0
+    if render and "settle_ms" in render:
+        delay += render["settle_ms"] / 1000
+    delay = min(delay, elapsed)
+    if delay:
+        timer.add("render_delay", delay)
+    timer.add("fetch", elapsed - delay)
+    if profile is not None:
+        _record_render(profile, render, delay if result.success else None, timer)
+    return result
+
+def _record_render(profile, render: dict, waited: float | None, timer: StageTimer):
+    blocked = render.get("blocked", {})
+    for reason, count in blocked.items():
+        RENDER_BLOCKED.inc(count, profile=profile.name, reason=reason)
+    summary = {"profile": profile.name, "blocked_requests": sum(blocked.values()), "blocked": dict(blocked)}
+    if waited is not None:
+        saved = LEGACY_DELAY - waited
+        RENDER_WAIT_SAVED.inc(max(0.0, saved), profile=profile.name)
+        summary["wait_ms"] = round(waited * 1000, 1)
+        summary["wait_saved_ms"] = round(saved * 1000, 1)
+    if render.get("capped"):
+        RENDER_WAIT_CAPPED.inc(profile=profile.name)
+        summary["wait_capped"] = True
+    timer.details["render"] = summary
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await browser_pool.start(warm=os.getenv("VCRAWL_POOL_WARM", "0") == "1")
+    await batch_tracker.start()
+    await job_manager.start()
+    yield
+    await job_manager.close()
+    await batch_tracker.close()
+    await browser_pool.close()
+    await http_fetcher.close()
+    page_cache.close()
+    llm_cache.close()
+    post_processor.shutdown()
+
+app = FastAPI(title="Crawl4AI Tester", lifespan=lifespan)
 
 class CrawlRequest(BaseModel):
     url: str
@@ -70,8 +330,17 @@ class CrawlRequest(BaseModel):
     llm_model: str = "none"
     # Custom LLM instruction
     instruction: str = "Extract the main content, key points, and purpose of this page. Structure the output clearly in markdown."
-
-from bs4 import BeautifulSoup
+    # Page cache: 'use' (read + write), 'bypass' (no cache), 'refresh' (re-fetch, then write)
+    cache_mode: CacheMode = "use"
+    # 'browser', 'http' or 'auto' (HTTP first, browser for JS-rendered pages); None = VCRAWL_FETCH_STRATEGY
+    fetch_strategy: FetchStrategy | None = None
+    # Browser loads: 'full' (everything, fixed 2s delay), 'balanced' or 'lean'; None = VCRAWL_RENDER_PROFILE
+    render_profile: RenderProfileName | None = None
+    # Add per-stage timings (ms), content sizes and render savings to the response metadata
+    include_timings: bool = False
+
+import postprocess
+from postprocess import PostProcessor
 
 class PageStructure(BaseModel):
     header: str = "Not found"
@@ -91,190 +360,110 @@ class CrawlResponse(BaseModel):
     metadata: dict = {}
     error_message: str = ""
 
-def find_element_by_heuristics(soup, tags, keywords):
-    # 1. Try specific tags first
-    for tag in tags:
-        element = soup.find(tag)
-        if element: return element
-    
-    # 2. Search by ID/Class with keywords
-    candidates = []
-    for keyword in keywords:
-        # ID search
-        elements = soup.find_all(attrs={"id": lambda x: x and keyword in x.lower()})
-        candidates.extend(elements)
-        # Class search
-        elements = soup.find_all(attrs={"class": lambda x: x and any(keyword in c.lower() for c in x)})
-        candidates.extend(elements)
-    
-    if not candidates:
-        return None
+# HTML parser backend for structure / content-only extraction: html.parser, lxml or selectolax
+HTML_PARSER = os.getenv("VCRAWL_HTML_PARSER", "html.parser")
 
-    # 3. Score candidates based on text length and density
-    best_candidate = None
-    max_score = 0
-    
-    for element in candidates:
-        text_len = len(element.get_text(strip=True))
-        if text_len == 0: continue
-        
-        # Simple score: text length
-        score = text_len
-        
-        # Boost if it's a div or section
-        if element.name in ['div', 'section', 'article']:
-            score *= 1.2
-            
-        if score > max_score:
-            max_score = score
-            best_candidate = element
-            
-    return best_candidate
-
-def analyze_structure(html: str):
-    """Analyze page structure and return both structure data and main content element"""
-    soup = BeautifulSoup(html, 'html.parser')
-    structure = PageStructure()
-    main_element = None  # Store the full main element
-
-    # 1. Header
-    # Keywords: header, top, gnb (Global Navigation Bar), head
-    header = find_element_by_heuristics(soup, ['header'], ['header', 'top', 'gnb', 'head'])
-    if header:
-        structure.header = str(header)[:1000] + "..." if len(str(header)) > 1000 else str(header)
-    
-    # 2. Navigation
-    # Keywords: nav, menu, lnb (Local Navigation Bar)
-    nav = find_element_by_heuristics(soup, ['nav'], ['nav', 'menu', 'lnb'])
-    if nav:
-        structure.navigation = str(nav)[:1000] + "..." if len(str(nav)) > 1000 else str(nav)
-
-    # 3. Main Content
-    # Keywords: main, content, body, article, center, container, wrapper
-    main = find_element_by_heuristics(soup, ['main', 'article'], ['content', 'main', 'body', 'center', 'container', 'wrapper'])
-    
-    # Fallback: If no main found by keywords, find the div with the most text
-    if not main:
-        divs = soup.find_all('div')
-        max_text_len = 0
-        for div in divs:
-            # Skip if it's likely a wrapper for the whole page (too large relative to body)
-            # This is a simple heuristic; can be improved
-            text_len = len(div.get_text(strip=True))
-            if text_len > max_text_len:
-                max_text_len = text_len
-                main = div
-
-    if main:
-        main_element = main  # Store the full element
-        structure.main_content = str(main)[:2000] + "..." if len(str(main)) > 2000 else str(main)
-
-    # 4. Footer
-    # Keywords: footer, bottom, info, copyright
-    footer = find_element_by_heuristics(soup, ['footer'], ['footer', 'bottom', 'info', 'copyright'])
-    if footer:
-        structure.footer = str(footer)[:1000] + "..." if len(str(footer)) > 1000 else str(footer)
-
-    # 5. Ads (Heuristic)
-    ad_selectors = [
-        'iframe[src*="ads"]', 
-        'div[id*="ad-"]', 'div[class*="ad-"]',
-        'div[id*="banner"]', 'div[class*="banner"]',
-        'ins.adsbygoogle',
-        '[class*="promotion"]', '[id*="promotion"]'
-    ]
-    found_ads = []
-    for selector in ad_selectors:
-        ads = soup.select(selector)
-        for ad in ads:
-            found_ads.append(str(ad)[:200] + "...")
-            if len(found_ads) >= 5: break 
-        if len(found_ads) >= 5: break
-    
-    structure.ads = found_ads
-    return structure, main_element
+def analyze_structure(html: str, parser: str = ""):
+    """Analyze page structure and return both structure data and main content element.
+
+    One pass over the tree (see `structure_analyzer`) finds header, navigation,
+    main content, footer and ads. `parser` defaults to VCRAWL_HTML_PARSER.
+    """
+    structure, main_element = postprocess.analyze(html, parser or HTML_PARSER)
+    return PageStructure(**structure), main_element
+
+# CPU-bound post-processing (structure analysis + html2text) runs off the event loop
+post_processor = PostProcessor(
+    mode=os.getenv("VCRAWL_POSTPROCESS_MODE", "process"),
+    workers=int(os.getenv("VCRAWL_POSTPROCESS_WORKERS", "2")),
+)
 
 @app.post("/api/v1/crawl", response_model=CrawlResponse)
 async def crawl(request: CrawlRequest):
+    with IN_FLIGHT.track(operation="crawl"), OPERATION_SECONDS.time(operation="crawl"):
+        return await _crawl(request, StageTimer("crawl"))
+
+async def _crawl(request: CrawlRequest, timer: StageTimer) -> CrawlResponse:
+    fetching = False
     try:
         url = request.url
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
         
-        from crawl4ai import BrowserConfig, CrawlerRunConfig
+        # domcontentloaded + 90s timeout, then the profile's blocking and render wait
+        crawl_config = render_profiles[request.render_profile or RENDER_PROFILE].run_config()
         
-        browser_config = BrowserConfig(
-            headless=True,
-            verbose=True
-        )
-        
-        # Try with networkidle first, but have a fallback
-        crawl_config = CrawlerRunConfig(
-            wait_until="domcontentloaded",  # More reliable than networkidle
-            page_timeout=90000,             # 90 seconds timeout (increased for slow pages)
-            delay_before_return_html=2.0    # Wait 2 seconds before capturing
-        )
+        fetching = True
+        result = await _fetch_page(url, crawl_config, request.cache_mode, timer=timer, strategy=request.fetch_strategy)
+        fetching = False
         
-        async with AsyncWebCrawler(config=browser_config, verbose=True) as crawler:
-            result = await crawler.arun(
-                url=url, 
-                config=crawl_config
-            )
-            
-            if not result.success:
-                 return CrawlResponse(
-                    success=False,
-                    error_message=result.error_message or "Unknown error occurred"
-                )
-            
-            # Analyze structure and get main content element
-            structure_data, main_element = analyze_structure(result.html)
-            
-            # Extract content-only versions
-            content_only_html = ""
-            content_only_markdown = ""
-            
-            if main_element:
-                content_only_html = str(main_element)
-                # Convert HTML to markdown
-                h = html2text.HTML2Text()
-                h.ignore_links = False
-                h.ignore_images = False
-                content_only_markdown = h.handle(content_only_html)
-            
-            # Debug logging
-            print(f"[DEBUG] Markdown length: {len(result.markdown) if result.markdown else 0}")
-            print(f"[DEBUG] HTML length: {len(result.html) if result.html else 0}")
-            print(f"[DEBUG] Cleaned HTML length: {len(result.cleaned_html) if result.cleaned_html else 0}")
-            print(f"[DEBUG] Content-only HTML length: {len(content_only_html)}")
-            print(f"[DEBUG] Content-only Markdown length: {len(content_only_markdown)}")
-            
-            source_url = result.url or request.url
-            md_citation = f"\n\n---\n**출처(Citations):** [{source_url}]({source_url})"
-            html_citation = f"<br><hr><p><strong>출처(Citations):</strong> <a href='{source_url}'>{source_url}</a></p>"
-
-            final_markdown = (result.markdown or "") + md_citation
-            final_html = (result.cleaned_html or result.html or "") + html_citation
-            final_content_only_markdown = content_only_markdown + md_citation if content_only_markdown else ""
-            final_content_only_html = content_only_html + html_citation if content_only_html else ""
-            
-            return CrawlResponse(
-                success=True,
-                markdown=final_markdown,
-                html=final_html,
-                content_only_markdown=final_content_only_markdown,
-                content_only_html=final_content_only_html,
-                llm_extraction="",
-                structure=structure_data,
-                metadata={
-                    "url": result.url,
-                    "llm_model": request.llm_model
-                }
+        if not result.success:
+             return CrawlResponse(
+                success=False,
+                metadata={"timings_ms": timer.as_ms(), **timer.details} if request.include_timings else {},
+                error_message=result.error_message or "Unknown error occurred"
             )
+        
+        # Analyze structure and extract content-only versions in the post-processing pool
+        started = time.perf_counter()
+        processed = await post_processor.run(result.html or "", HTML_PARSER)
+        worker_seconds = 0.0
+        for stage, seconds in processed["timings"].items():
+            timer.add(stage, seconds)
+            worker_seconds += seconds
+        # Queueing for a free worker plus pickling the page to and from it
+        timer.add("postprocess_wait", time.perf_counter() - started - worker_seconds)
+        structure_data = PageStructure(**processed["structure"])
+        content_only_html = processed["content_only_html"]
+        content_only_markdown = processed["content_only_markdown"]
+        
+        sizes = {
+            "markdown": len(result.markdown or ""),
+            "html": len(result.html or ""),
+            "cleaned_html": len(result.cleaned_html or ""),
+            "content_only_html": len(content_only_html),
+            "content_only_markdown": len(content_only_markdown),
+        }
+        for kind in ("markdown", "content_only_markdown"):
+            CONTENT_BYTES.inc(sizes[kind], operation="crawl", kind=kind)
+        
+        source_url = result.url or request.url
+        md_citation = f"\n\n---\n**출처(Citations):** [{source_url}]({source_url})"
+        html_citation = f"<br><hr><p><strong>출처(Citations):</strong> <a href='{source_url}'>{source_url}</a></p>"
+
+        final_markdown = (result.markdown or "") + md_citation
+        final_html = (result.cleaned_html or result.html or "") + html_citation
+        final_content_only_markdown = content_only_markdown + md_citation if content_only_markdown else ""
+        final_content_only_html = content_only_html + html_citation if content_only_html else ""
+        
+        metadata = {
+            "url": result.url,
+            "llm_model": request.llm_model,
+            "from_cache": getattr(result, "from_cache", False),
+            "fetched_via": "cache" if getattr(result, "from_cache", False) else getattr(result, "fetched_via", "browser"),
+        }
+        if request.include_timings:
+            metadata["timings_ms"] = timer.as_ms()
+            metadata["sizes"] = sizes
+            metadata.update(timer.details)
+
+        return CrawlResponse(
+            success=True,
+            markdown=final_markdown,
+            html=final_html,
+            content_only_markdown=final_content_only_markdown,
+            content_only_html=final_content_only_html,
+            llm_extraction="",
+            structure=structure_data,
+            metadata=metadata
+        )
     except Exception as e:
+        if not fetching:  # _fetch_page counts its own failures
+            PAGE_FAILURES.inc(operation="crawl", reason=_failure_reason(message=str(e)))
         return CrawlResponse(
             success=False,
+            metadata={"timings_ms": timer.as_ms(), **timer.details} if request.include_timings else {},
             error_message=str(e)
         )
 
@@ -287,49 +476,296 @@ class AnalyzeRequest(BaseModel):
     content: str
     llm_model: str
     instruction: str = "Analyze the provided content and return a well-structured markdown report."
+    # Stream tokens back as SSE events instead of one JSON response
+    stream: bool = False
+    # Skip the result cache lookup (the fresh result still replaces the cached one)
+    no_cache: bool = False
+    # Map-reduce mode for long documents: split on headings/paragraphs, analyze
+    # chunks concurrently, then merge the partial results in a reduce call
+    chunked: bool = False
+    chunk_tokens: int = 8000          # at least MIN_CHUNK_TOKENS
+    chunk_concurrency: int = 4
+    reduce_instruction: str = ""
+
+
+class ChunkStat(BaseModel):
+    index: int                 # 1-based chunk number; 0 for the reduce step
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
 
 
 class AnalyzeResponse(BaseModel):
     success: bool
     result: str = ""
+    cached: bool = False
+    chunks: list[ChunkStat] = []
     error_message: str = ""
 
 
-@app.post("/api/v1/analyze", response_model=AnalyzeResponse)
-async def analyze(request: AnalyzeRequest):
+# Results are cached by (model, instruction, content hash, params)
+from llm_cache import LLMCache, cache_key as llm_cache_key
+
+llm_cache = LLMCache(
+    path=pathlib.Path(os.getenv("VCRAWL_LLM_CACHE_PATH", pathlib.Path(__file__).parent / ".vcrawl_cache" / "llm.sqlite3")),
+    ttl=float(os.getenv("VCRAWL_LLM_CACHE_TTL", str(7 * 86400))),
+    max_bytes=int(float(os.getenv("VCRAWL_LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+)
+
+
+def _analyze_cache_key(request: AnalyzeRequest) -> str:
+    params = {"chunked": True, "chunk_tokens": request.chunk_tokens, "reduce_instruction": request.reduce_instruction} if request.chunked else {}
+    return llm_cache_key(request.llm_model, request.instruction, request.content, params)
+
+
+def _validate_analyze_request(request: AnalyzeRequest) -> str:
+    """Check the request and return the provider API key."""
+    if not request.llm_model or request.llm_model == "none":
+        raise Exception("No LLM model selected. Please choose a model from the dropdown.")
+
+    if not request.content.strip():
+        raise Exception("Content is empty. Please provide text to analyze.")
+
+    model_str = request.llm_model
+    provider = model_str.split("/")[0] if "/" in model_str else model_str
+
+    if provider == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise Exception("GEMINI_API_KEY is not set in the environment.")
+    elif provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise Exception("OPENAI_API_KEY is not set in the environment.")
+    else:
+        raise Exception(f"Unsupported LLM provider: '{provider}'")
+    return api_key
+
+
+def _analyze_messages(request: AnalyzeRequest) -> list[dict]:
+    return [
+        {"role": "system", "content": request.instruction},
+        {"role": "user",   "content": request.content},
+    ]
+
+
+# ── Chunked (map-reduce) analysis ──
+from chunking import split_markdown, approx_tokens
+
+MAX_CHUNK_CONCURRENCY = 16
+# Smallest accepted chunk_tokens, so a tiny value cannot fan out into thousands of LLM calls
+MIN_CHUNK_TOKENS = 500
+
+DEFAULT_REDUCE_INSTRUCTION = (
+    "The following are partial results produced from consecutive parts of one long document "
+    "with this instruction:\n\n{instruction}\n\n"
+    "Merge them into a single coherent result that follows the instruction. "
+    "Remove duplication between parts and keep the original order of information."
+)
+
+
+def _token_counter(model: str):
+    def count(text: str) -> int:
+        try:
+            return litellm.token_counter(model=model, text=text)
+        except Exception:
+            return approx_tokens(text)
+    return count
+
+
+def _usage(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return 0, 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+def _record_llm(model: str, stage: str, seconds: float, outcome: str, response=None):
+    STAGE_SECONDS.observe(seconds, operation="analyze", stage=stage)
+    LLM_REQUESTS.inc(model=model, outcome=outcome)
+    if response is not None:
+        input_tokens, output_tokens = _usage(response)
+        LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+        LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+
+
+async def _llm_completion(stage: str, **kwargs):
+    """litellm.acompletion (non-streaming) with latency, outcome and token metrics."""
+    started = time.perf_counter()
     try:
-        if not request.llm_model or request.llm_model == "none":
-            raise Exception("No LLM model selected. Please choose a model from the dropdown.")
+        response = await litellm.acompletion(**kwargs)
+    except Exception:
+        _record_llm(kwargs["model"], stage, time.perf_counter() - started, "error")
+        raise
+    _record_llm(kwargs["model"], stage, time.perf_counter() - started, "ok", response)
+    return response
+
+
+async def _analyze_chunks(request: AnalyzeRequest, api_key: str, on_chunk=None) -> tuple[list[str], list[ChunkStat]]:
+    """Map step: analyze every chunk concurrently (bounded), results in document order."""
+    chunks = split_markdown(request.content, max(request.chunk_tokens, MIN_CHUNK_TOKENS), _token_counter(request.llm_model))
+    total = len(chunks)
+    sem = asyncio.Semaphore(max(1, min(request.chunk_concurrency, MAX_CHUNK_CONCURRENCY)))
+
+    async def run(index: int, chunk: str):
+        async with sem:
+            started = time.perf_counter()
+            response = await _llm_completion(
+                "llm_map",
+                model=request.llm_model,
+                messages=[
+                    {"role": "system", "content": f"{request.instruction}\n\n(This is part {index} of {total} of a longer document. Work only with this part; the partial results will be merged afterwards.)"},
+                    {"role": "user", "content": chunk},
+                ],
+                api_key=api_key,
+            )
+            input_tokens, output_tokens = _usage(response)
+            stat = ChunkStat(index=index, input_tokens=input_tokens, output_tokens=output_tokens, seconds=round(time.perf_counter() - started, 3))
+            if on_chunk:
+                await on_chunk(stat, total)
+            return response.choices[0].message.content or "", stat
+
+    results = await asyncio.gather(*(run(i, c) for i, c in enumerate(chunks, start=1)))
+    return [text for text, _ in results], [stat for _, stat in results]
+
+
+def _reduce_messages(request: AnalyzeRequest, partials: list[str]) -> list[dict]:
+    instruction = request.reduce_instruction or DEFAULT_REDUCE_INSTRUCTION.format(instruction=request.instruction)
+    merged = "\n\n".join(f"## Part {i}\n\n{text}" for i, text in enumerate(partials, start=1))
+    return [
+        {"role": "system", "content": instruction},
+        {"role": "user",   "content": merged},
+    ]
+
 
-        if not request.content.strip():
-            raise Exception("Content is empty. Please provide text to analyze.")
+async def _analyze_stream_generator(request: AnalyzeRequest, api_key: str, cache_key: str, cached: str | None):
+    """SSE generator: forwards LLM tokens as they arrive."""
+    import json
 
-        import litellm
+    def sse(data: dict) -> str:
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        model_str = request.llm_model
-        provider = model_str.split("/")[0] if "/" in model_str else model_str
+    try:
+        if cached is not None:
+            yield sse({"type": "token", "content": cached})
+            yield sse({"type": "done", "result": cached, "cached": True})
+            return
 
-        if provider == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                raise Exception("GEMINI_API_KEY is not set in the environment.")
-        elif provider == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise Exception("OPENAI_API_KEY is not set in the environment.")
-        else:
-            raise Exception(f"Unsupported LLM provider: '{provider}'")
-
-        response = litellm.completion(
-            model=model_str,
-            messages=[
-                {"role": "system", "content": request.instruction},
-                {"role": "user",   "content": request.content},
-            ],
+        messages = _analyze_messages(request)
+        if request.chunked:
+            # Map step runs first; chunk events are sent as each part finishes.
+            chunk_events: asyncio.Queue = asyncio.Queue()
+
+            async def on_chunk(stat: ChunkStat, total: int):
+                await chunk_events.put({"type": "chunk", "total": total, **stat.model_dump()})
+
+            map_task = asyncio.create_task(_analyze_chunks(request, api_key, on_chunk))
+            getter = None
+            try:
+                while not (map_task.done() and chunk_events.empty()):
+                    getter = asyncio.create_task(chunk_events.get())
+                    done, _ = await asyncio.wait({getter, map_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter in done:
+                        yield sse(getter.result())
+                    else:
+                        getter.cancel()
+            finally:
+                # Client gone (GeneratorExit) or failure: stop the remaining chunk LLM calls.
+                for task in (getter, map_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+                        try:
+                            await task
+                        except (asyncio.CancelledError, Exception):
+                            pass
+            partials, _ = map_task.result()
+            if len(partials) == 1:
+                yield sse({"type": "token", "content": partials[0]})
+                await llm_cache.put(cache_key, request.llm_model, partials[0])
+                yield sse({"type": "done", "result": partials[0], "cached": False})
+                return
+            messages = _reduce_messages(request, partials)
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await litellm.acompletion(
+                model=request.llm_model,
+                messages=messages,
+                api_key=api_key,
+                stream=True,
+            )
+            parts = []
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield sse({"type": "token", "content": delta})
+            outcome = "ok"
+        finally:
+            # Token usage is not reported on streamed responses
+            _record_llm(request.llm_model, "llm_stream", time.perf_counter() - started, outcome)
+        result_text = "".join(parts)
+        await llm_cache.put(cache_key, request.llm_model, result_text)
+        yield sse({"type": "done", "result": result_text, "cached": False})
+    except Exception as e:
+        yield sse({"type": "error", "message": str(e)})
+
+
+@app.post("/api/v1/analyze", response_model=AnalyzeResponse)
+async def analyze(request: AnalyzeRequest):
+    if request.stream:
+        return await _analyze(request)  # the SSE body is tracked while it streams
+    with IN_FLIGHT.track(operation="analyze"), OPERATION_SECONDS.time(operation="analyze"):
+        return await _analyze(request)
+
+async def _analyze(request: AnalyzeRequest):
+    try:
+        api_key = _validate_analyze_request(request)
+
+        cache_key = _analyze_cache_key(request)
+        cached = None if request.no_cache else await llm_cache.get(cache_key)
+
+        if request.stream:
+            return StreamingResponse(
+                _tracked("analyze", _analyze_stream_generator(request, api_key, cache_key, cached)),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "X-Accel-Buffering": "no",
+                },
+            )
+
+        if cached is not None:
+            return AnalyzeResponse(success=True, result=cached, cached=True)
+
+        if request.chunked:
+            partials, stats = await _analyze_chunks(request, api_key)
+            if len(partials) == 1:
+                result_text = partials[0]
+            else:
+                started = time.perf_counter()
+                response = await _llm_completion(
+                    "llm_reduce",
+                    model=request.llm_model,
+                    messages=_reduce_messages(request, partials),
+                    api_key=api_key,
+                )
+                input_tokens, output_tokens = _usage(response)
+                stats.append(ChunkStat(index=0, input_tokens=input_tokens, output_tokens=output_tokens, seconds=round(time.perf_counter() - started, 3)))
+                result_text = response.choices[0].message.content or ""
+            await llm_cache.put(cache_key, request.llm_model, result_text)
+            return AnalyzeResponse(success=True, result=result_text, chunks=stats)
+
+        response = await _llm_completion(
+            "llm",
+            model=request.llm_model,
+            messages=_analyze_messages(request),
             api_key=api_key,
         )
 
         result_text = response.choices[0].message.content or ""
+        await llm_cache.put(cache_key, request.llm_model, result_text)
         return AnalyzeResponse(success=True, result=result_text)
 
     except Exception as e:
@@ -343,6 +779,51 @@ class CollectLinksRequest(BaseModel):
     url: str
     depth: int = 0
     max_urls: int = 500
+    cache_mode: CacheMode = "use"
+    fetch_strategy: FetchStrategy | None = None   # None = VCRAWL_FETCH_STRATEGY
+    # Same render config as crawl / batch-crawl, so discovered pages are cache hits for the scrape that follows
+    render_profile: RenderProfileName | None = None   # None = VCRAWL_RENDER_PROFILE
+    workers: int = 0   # concurrent page fetches; 0 = browser pool size
+    # Dedup on canonical URLs (no fragment, sorted query, no tracking/session params, ...)
+    canonicalize: bool = True
+    strip_params: list[str] | None = None   # glob patterns; None = VCRAWL_STRIP_PARAMS or built-in list
+    # Write every link to a gzip file downloadable from /api/v1/collect-links/export/{id}
+    export: Literal["none", "ndjson", "csv"] = "none"
+    # Skip pages disallowed by robots.txt and honor its Crawl-delay
+    respect_robots: bool = False
+    # Seed links from sitemaps (robots.txt Sitemap: lines, else /sitemap.xml)
+    use_sitemap: bool = False
+    sitemap_urls: list[str] | None = None
+
+# Upper bound for CollectLinksRequest.max_urls
+COLLECT_MAX_URLS = int(os.getenv("VCRAWL_COLLECT_MAX_URLS", "2000"))
+# Visited URLs are kept exactly up to this many, then in a Bloom filter
+VISITED_EXACT_LIMIT = int(os.getenv("VCRAWL_VISITED_EXACT_LIMIT", "100000"))
+# Max links per `links` SSE event
+LINK_EVENT_BATCH = int(os.getenv("VCRAWL_LINK_EVENT_BATCH", "200"))
+# Collected-link exports, removed after VCRAWL_EXPORT_TTL seconds
+EXPORT_DIR = pathlib.Path(os.getenv("VCRAWL_EXPORT_DIR") or pathlib.Path(__file__).resolve().parent / ".vcrawl_cache" / "exports")
+EXPORT_TTL = float(os.getenv("VCRAWL_EXPORT_TTL", str(24 * 3600)))
+
+from url_canon import Canonicalizer, VisitedSet, DEFAULT_STRIP_PARAMS
+from link_export import LinkExporter, find_export, prune_exports
+from site_discovery import RobotsCache, iter_sitemap_urls
+
+# Page URLs read from sitemaps per collect-links run
+SITEMAP_MAX_URLS = int(os.getenv("VCRAWL_SITEMAP_MAX_URLS", "50000"))
+
+robots_cache = RobotsCache(
+    user_agent=os.getenv("VCRAWL_ROBOTS_USER_AGENT", "vcrawl"),
+    ttl=float(os.getenv("VCRAWL_ROBOTS_TTL", "3600")),
+    max_crawl_delay=float(os.getenv("VCRAWL_MAX_CRAWL_DELAY", "10")),
+)
+
+def _collector_canonicalizer(request: CollectLinksRequest) -> Canonicalizer:
+    patterns = request.strip_params
+    if patterns is None:
+        env_patterns = os.getenv("VCRAWL_STRIP_PARAMS", "")
+        patterns = [p.strip() for p in env_patterns.split(",") if p.strip()] if env_patterns else list(DEFAULT_STRIP_PARAMS)
+    return Canonicalizer(strip_params=patterns)
 
 class LinkItem(BaseModel):
     href: str
@@ -357,146 +838,287 @@ class CollectLinksResponse(BaseModel):
     external_links: list[LinkItem] = []
     error_message: str = ""
 
+from link_rules import LinkCategorizer
+
+# Category rules: JSON file from VCRAWL_LINK_RULES, else the built-in rules
+_link_rules_path = os.getenv("VCRAWL_LINK_RULES", "")
+link_categorizer = LinkCategorizer.from_file(_link_rules_path) if _link_rules_path else LinkCategorizer()
+
 def categorize_link(url: str, text: str) -> str:
-    url_lower = url.lower()
-    text_lower = text.lower()
-    
-    # 1. Check for files
-    file_extensions = [
-        '.pdf', '.zip', '.rar', '.hwp', '.doc', '.docx', 
-        '.xls', '.xlsx', '.ppt', '.pptx', '.csv', 
-        '.png', '.jpg', '.jpeg', '.gif', '.mp3', '.mp4', '.avi'
-    ]
-    if any(url_lower.endswith(ext) or (ext + '?') in url_lower for ext in file_extensions):
-        return 'File Download'
-        
-    # 2. Check for boards/forums
-    board_keywords = ['board', 'forum', 'bbs', 'view', 'article', 'notice', 'list.do', 'view.do']
-    if any(kw in url_lower for kw in board_keywords) or any(kw in text_lower for kw in ['게시판', '공지사항', '자료실', '목록']):
-        return 'Board/Forum'
-        
-    return 'Standard'
+    return link_categorizer.categorize(url, text)
 
-async def _collect_links_generator(request: CollectLinksRequest):
-    """Async generator that yields SSE-formatted JSON events during link collection."""
-    import urllib.parse
-    import json
+async def _collect_links_events(request: CollectLinksRequest):
+    """Async generator that yields progress events (dicts) during link collection.
 
-    def sse(data: dict) -> str:
-        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    Pages are crawled by a fixed set of workers pulling from a priority
+    frontier (shallower pages first). Links found on a page are queued as
+    soon as that page is parsed, so the browsers never wait for a whole
+    depth level to finish.
+    """
+    import urllib.parse
 
+    workers: list[asyncio.Task] = []
+    exporter: LinkExporter | None = None
     try:
         url_to_crawl = request.url.strip()
         if not url_to_crawl:
-            yield sse({"type": "error", "message": "URL cannot be empty"})
+            yield {"type": "error", "message": "URL cannot be empty"}
             return
 
         if not url_to_crawl.startswith(('http://', 'https://')):
             url_to_crawl = 'https://' + url_to_crawl
 
-        parsed_seed = urllib.parse.urlparse(url_to_crawl)
-        base_domain = parsed_seed.netloc
+        canon = _collector_canonicalizer(request)
+        if request.canonicalize:
+            url_key = canon.canonicalize
+            base_domain = canon.host(url_to_crawl)
+        else:
+            url_key = lambda href, base="": href
+            base_domain = urllib.parse.urlparse(url_to_crawl).netloc
 
         target_depth = max(0, min(request.depth, 3))
-        max_urls = max(1, min(request.max_urls, 2000))
-
-        all_internal_items = {}
-        all_external_items = {}
-
-        yield sse({"type": "log", "message": f"🚀 Starting crawl: {url_to_crawl}"})
-        yield sse({"type": "log", "message": f"📋 Depth: {target_depth}  |  Max URLs: {max_urls}"})
-
-        async with AsyncWebCrawler(verbose=False) as crawler:
-            visited_urls = set()
-            current_level_urls = [url_to_crawl]
-
-            for current_d in range(target_depth + 1):
-                if not current_level_urls:
-                    break
-
-                yield sse({"type": "log", "message": f"🔍 Depth {current_d}: fetching {len(current_level_urls)} URL(s)…"})
-
-                if len(current_level_urls) == 1:
-                    results = [await crawler.arun(url=current_level_urls[0])]
-                else:
-                    results = await crawler.arun_many(urls=current_level_urls)
-
-                visited_urls.update(current_level_urls)
-                next_level_urls = set()
-                success_count = 0
-                fail_count = 0
+        max_urls = max(1, min(request.max_urls, COLLECT_MAX_URLS))
+        crawl_config = render_profiles[request.render_profile or RENDER_PROFILE].run_config()
+        # Every worker holds one pooled browser while it fetches a page.
+        worker_count = max(1, min(request.workers or browser_pool.size, browser_pool.size))
+
+        # Links are streamed out as they are found; only their keys stay in memory.
+        seen_internal = VisitedSet(exact_limit=VISITED_EXACT_LIMIT, capacity=max_urls * 50)
+        seen_external = VisitedSet(exact_limit=VISITED_EXACT_LIMIT, capacity=max_urls * 50)
+        if request.export != "none":
+            await asyncio.to_thread(prune_exports, EXPORT_DIR, EXPORT_TTL)
+            exporter = await asyncio.to_thread(LinkExporter, EXPORT_DIR, request.export)
+
+        yield {"type": "log", "message": f"🚀 Starting crawl: {url_to_crawl}"}
+        yield {"type": "log", "message": f"📋 Depth: {target_depth}  |  Max URLs: {max_urls}  |  Workers: {worker_count}"}
+
+        # Frontier entries: (depth, discovery order, url)
+        frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        events: asyncio.Queue = asyncio.Queue()
+        scheduled = VisitedSet(exact_limit=VISITED_EXACT_LIMIT, capacity=max_urls * 4)
+        scheduled.add(url_key(url_to_crawl))
+        depth_stats = {d: {"ok": 0, "failed": 0, "started": False} for d in range(target_depth + 1)}
+        state = {"seq": 0, "truncated": False}
+        robots = await robots_cache.get(url_to_crawl) if (request.respect_robots or request.use_sitemap) else None
+        disallowed = VisitedSet(exact_limit=VISITED_EXACT_LIMIT, capacity=max_urls * 4)
+
+        def is_allowed(href: str, key: str) -> bool:
+            if not request.respect_robots or robots.allowed(href):
+                return True
+            disallowed.add(key)
+            return False
+
+        if is_allowed(url_to_crawl, url_key(url_to_crawl)):
+            frontier.put_nowait((0, 0, url_to_crawl))
+        else:
+            yield {"type": "log", "message": f"🚫 {url_to_crawl} is disallowed by robots.txt"}
+        if request.respect_robots and robots.crawl_delay:
+            yield {"type": "log", "message": f"🐢 robots.txt Crawl-delay: {min(robots.crawl_delay, robots_cache.max_crawl_delay):g}s"}
+
+        def same_site(href: str) -> bool:
+            parsed_href = urllib.parse.urlparse(href)
+            host = canon.host(href) if request.canonicalize else parsed_href.netloc
+            return host == base_domain or not parsed_href.netloc
+
+        def schedule(href: str, key: str, depth: int):
+            if key in scheduled or key in disallowed:
+                return
+            if not is_allowed(href, key):
+                return
+            if len(scheduled) >= max_urls:
+                if not state["truncated"]:
+                    state["truncated"] = True
+                    events.put_nowait({"type": "log", "message": f"⚡ Max URL limit ({max_urls}) reached. No more pages will be queued."})
+                return
+            scheduled.add(key)
+            state["seq"] += 1
+            # Fetch the URL as found (minus the fragment); dedup uses the canonical key.
+            frontier.put_nowait((depth, state["seq"], urllib.parse.urldefrag(href)[0]))
+
+        def handle_result(res, current_d: int) -> tuple[list[dict], list[dict]]:
+            links_dict = res.links if hasattr(res, 'links') and res.links else {}
+            page_url = getattr(res, 'url', '')
+            internal = list(links_dict.get('internal', []))
+            external = []
+            # crawl4ai compares the link's host:port with a port-less base domain, so on
+            # sites with an explicit port every link comes back external; re-check those.
+            for link in links_dict.get('external', []):
+                href = urllib.parse.urljoin(page_url, link.get('href', ''))
+                try:
+                    promote = href.startswith(('http://', 'https://')) and same_site(href)
+                except ValueError:
+                    promote = False
+                (internal if promote else external).append(link)
+
+            found_internal: list[tuple[str, str]] = []
+            found_external: list[tuple[str, str]] = []
+            for link in internal:
+                href = link.get('href', '')
+                text = link.get('text', '').strip()
+                if not href:
+                    continue
+                try:
+                    key = url_key(href, page_url)
+                except ValueError:
+                    continue
+                if seen_internal.add(key):
+                    found_internal.append((href, text))
+                if current_d < target_depth:
+                    try:
+                        if same_site(href):
+                            schedule(urllib.parse.urljoin(page_url, href), key, current_d + 1)
+                    except Exception:
+                        pass
+
+            for link in external:
+                href = link.get('href', '')
+                text = link.get('text', '').strip()
+                if not href:
+                    continue
+                try:
+                    key = url_key(href, page_url)
+                except ValueError:
+                    continue
+                if seen_external.add(key):
+                    found_external.append((href, text))
+            return link_items(found_internal, page_url, current_d), link_items(found_external, page_url, current_d)
+
+        def link_items(found: list[tuple[str, str]], parent_url: str, depth: int) -> list[dict]:
+            categories = link_categorizer.categorize_many(found)
+            return [
+                LinkItem(href=href, text=text, category=category, parent_url=parent_url, depth=depth).model_dump()
+                for (href, text), category in zip(found, categories)
+            ]
+
+        async def emit_links(new_internal: list[dict], new_external: list[dict]):
+            if exporter is not None:
+                await asyncio.to_thread(exporter.write, new_internal, "internal")
+                await asyncio.to_thread(exporter.write, new_external, "external")
+            batch = max(1, LINK_EVENT_BATCH)
+            for i in range(0, max(len(new_internal), len(new_external)), batch):
+                events.put_nowait({
+                    "type": "links",
+                    "internal": new_internal[i:i + batch],
+                    "external": new_external[i:i + batch],
+                })
 
-                for res in results:
+        if request.use_sitemap:
+            sources = request.sitemap_urls or robots.sitemaps or [urllib.parse.urljoin(url_to_crawl, "/sitemap.xml")]
+            async for sitemap, pages, error in iter_sitemap_urls(sources, robots_cache.user_agent, SITEMAP_MAX_URLS):
+                if error:
+                    yield {"type": "log", "message": f"  ⚠️  Sitemap failed: {sitemap} ({error})"}
+                    continue
+                found_internal: list[tuple[str, str]] = []
+                found_external: list[tuple[str, str]] = []
+                for href in pages:
+                    try:
+                        key = url_key(href)
+                        internal = same_site(href)
+                    except ValueError:
+                        continue
+                    seen = seen_internal if internal else seen_external
+                    if seen.add(key):
+                        (found_internal if internal else found_external).append((href, ""))
+                    # Sitemap pages sit one level below the seed page.
+                    if internal and target_depth >= 1:
+                        schedule(href, key, 1)
+                new_internal = link_items(found_internal, sitemap, 0)
+                await emit_links(new_internal, link_items(found_external, sitemap, 0))
+                while not events.empty():
+                    yield events.get_nowait()
+                if pages:
+                    yield {"type": "log", "message": f"🗺️  {sitemap} → +{len(new_internal)} internal links"}
+
+        async def worker():
+            while True:
+                current_d, _, url = await frontier.get()
+                try:
+                    if not depth_stats[current_d]["started"]:
+                        depth_stats[current_d]["started"] = True
+                        events.put_nowait({"type": "log", "message": f"🔍 Depth {current_d}: started"})
+                    if request.respect_robots:
+                        await robots_cache.wait(url)
+                    res = await _fetch_page(url, crawl_config, request.cache_mode, operation="collect_links", strategy=request.fetch_strategy)
                     if not res.success:
-                        fail_count += 1
-                        yield sse({"type": "log", "message": f"  ⚠️  Failed: {getattr(res, 'url', '?')}"})
+                        depth_stats[current_d]["failed"] += 1
+                        events.put_nowait({"type": "log", "message": f"  ⚠️  Failed: {getattr(res, 'url', url)}"})
                         continue
+                    depth_stats[current_d]["ok"] += 1
+                    new_internal, new_external = handle_result(res, current_d)
+                    await emit_links(new_internal, new_external)
+                    events.put_nowait({"type": "log", "message": f"  ✅ {getattr(res, 'url', url)} → +{len(new_internal)} internal links"})
+                except Exception as e:
+                    depth_stats[current_d]["failed"] += 1
+                    events.put_nowait({"type": "log", "message": f"  ⚠️  Failed: {url} ({e})"})
+                finally:
+                    frontier.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+        drained = asyncio.create_task(frontier.join())
+        while not (drained.done() and events.empty()):
+            getter = asyncio.create_task(events.get())
+            done, _ = await asyncio.wait({getter, drained}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
 
-                    success_count += 1
-                    links_dict = res.links if hasattr(res, 'links') and res.links else {}
-                    internal = links_dict.get('internal', [])
-                    external = links_dict.get('external', [])
-
-                    new_internal = 0
-                    for link in internal:
-                        href = link.get('href', '')
-                        text = link.get('text', '').strip()
-                        if not href:
-                            continue
-                        if href not in all_internal_items:
-                            category = categorize_link(href, text)
-                            all_internal_items[href] = LinkItem(href=href, text=text, category=category, parent_url=getattr(res, 'url', ''), depth=current_d)
-                            new_internal += 1
-                        if current_d < target_depth:
-                            try:
-                                parsed_href = urllib.parse.urlparse(href)
-                                if parsed_href.netloc == base_domain or not parsed_href.netloc:
-                                    if href not in visited_urls:
-                                        next_level_urls.add(href)
-                            except Exception:
-                                pass
-
-                    for link in external:
-                        href = link.get('href', '')
-                        text = link.get('text', '').strip()
-                        if not href:
-                            continue
-                        if href not in all_external_items:
-                            category = categorize_link(href, text)
-                            all_external_items[href] = LinkItem(href=href, text=text, category=category, parent_url=getattr(res, 'url', ''), depth=current_d)
-
-                    yield sse({"type": "log", "message": f"  ✅ {getattr(res, 'url', '?')} → +{new_internal} internal links"})
-
-                yield sse({"type": "log", "message": f"📊 Depth {current_d} done — ✅ {success_count} ok, ⚠️ {fail_count} failed. Total internal: {len(all_internal_items)}, external: {len(all_external_items)}"})
-
-                current_level_urls = list(next_level_urls)
-                if len(visited_urls) + len(current_level_urls) > max_urls:
-                    remaining_allowance = max_urls - len(visited_urls)
-                    current_level_urls = current_level_urls[:max(0, remaining_allowance)]
-                    yield sse({"type": "log", "message": f"⚡ Max URL limit ({max_urls}) reached. Truncating queue to {len(current_level_urls)}."})
-
-        yield sse({"type": "log", "message": f"🏁 Crawl complete! Found {len(all_internal_items)} internal and {len(all_external_items)} external links."})
-        yield sse({
+        for d, st in depth_stats.items():
+            if st["started"]:
+                yield {"type": "log", "message": f"📊 Depth {d} done — ✅ {st['ok']} ok, ⚠️ {st['failed']} failed."}
+
+        if len(disallowed):
+            yield {"type": "log", "message": f"🚫 Skipped {len(disallowed)} pages disallowed by robots.txt."}
+        yield {"type": "log", "message": f"🏁 Crawl complete! Found {len(seen_internal)} internal and {len(seen_external)} external links."}
+        done_event = {
             "type": "done",
-            "internal_links": [item.model_dump() for item in all_internal_items.values()],
-            "external_links": [item.model_dump() for item in all_external_items.values()],
-        })
+            "total_internal": len(seen_internal),
+            "total_external": len(seen_external),
+            "pages_ok": sum(st["ok"] for st in depth_stats.values()),
+            "pages_failed": sum(st["failed"] for st in depth_stats.values()),
+            "pages_disallowed": len(disallowed),
+        }
+        if exporter is not None:
+            await asyncio.to_thread(exporter.close)
+            done_event["export"] = {
+                "id": exporter.export_id,
+                "format": exporter.fmt,
+                "count": exporter.count,
+                "url": f"/api/v1/collect-links/export/{exporter.export_id}",
+            }
+        yield done_event
 
     except Exception as e:
-        yield sse({"type": "error", "message": str(e)})
+        yield {"type": "error", "message": str(e)}
+    finally:
+        for task in workers:
+            task.cancel()
+        if exporter is not None:
+            exporter.close()
 
 
 @app.post("/api/v1/collect-links")
 async def collect_links(request: CollectLinksRequest):
+    # Runs as a background job; closing the stream does not stop it (see /api/v1/jobs).
+    job_id = await _submit_job("collect-links", request)
     return StreamingResponse(
-        _collect_links_generator(request),
+        _job_event_stream(job_id, announce=True),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",
+            "X-Job-Id": job_id,
         },
     )
 
+
+@app.get("/api/v1/collect-links/export/{export_id}")
+async def collect_links_export(export_id: str):
+    path = find_export(EXPORT_DIR, export_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    return FileResponse(path, media_type="application/gzip", filename=f"links_{path.name}")
+
 # ──────────────────────────────────────────────
 # Batch Crawl – Crawl multiple URLs and save Full Markdown to Downloads
 # ──────────────────────────────────────────────
@@ -512,6 +1134,13 @@ class BatchCrawlLink(BaseModel):
 class BatchCrawlRequest(BaseModel):
     links: list[BatchCrawlLink]
     output_folder_name: str = ""
+    concurrency: int = 4            # pages in flight at once
+    per_host_concurrency: int = 2   # pages in flight per host
+    cache_mode: CacheMode = "use"
+    fetch_strategy: FetchStrategy | None = None   # None = VCRAWL_FETCH_STRATEGY
+    render_profile: RenderProfileName | None = None   # None = VCRAWL_RENDER_PROFILE
+
+MAX_BATCH_CONCURRENCY = 32
 
 def _safe_filename(text: str, index: int, max_len: int = 80) -> str:
     """Build a safe 4-digit-padded filename from link text."""
@@ -528,222 +1157,298 @@ def _safe_filename(text: str, index: int, max_len: int = 80) -> str:
     clean = clean.strip('_')
     return f"{prefix}_{clean}" if clean else prefix
 
-async def _batch_crawl_generator(request: BatchCrawlRequest):
-    """SSE generator: crawls each link and saves Full Markdown to the Downloads folder."""
+BATCH_MANIFEST_NAME = "_vcrawl_manifest.jsonl"
+
+def _load_batch_manifest(path: pathlib.Path) -> dict[str, dict]:
+    """Read the batch manifest; the latest record per URL wins."""
     import json
 
-    def sse(data: dict) -> str:
-        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    records: dict[str, dict] = {}
+    if not path.exists():
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn write from a crash; the page will be retried
+            if record.get("url"):
+                records[record["url"]] = record
+    return records
+
+def _append_batch_manifest(path: pathlib.Path, record: dict):
+    import json
 
-    try:
-        from crawl4ai import BrowserConfig, CrawlerRunConfig
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _batch_folder_name(request: BatchCrawlRequest) -> str:
+    """Output folder name; an empty one is pinned to a timestamp so a retried job reuses it."""
+    if not request.output_folder_name.strip():
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        request.output_folder_name = f"vcrawl_batch_{timestamp}"
+    return request.output_folder_name.strip()
+
+async def _batch_crawl_events(request: BatchCrawlRequest):
+    """Event generator: crawls links concurrently and saves Full Markdown to the Downloads folder.
 
+    Up to `concurrency` pages are in flight at once (at most
+    `per_host_concurrency` per host). Files keep their input-order names
+    (`0001_...md`) while `progress` events are emitted as pages complete.
+
+    Every finished page is recorded in a manifest inside the output folder,
+    so re-submitting the same batch with the same `output_folder_name`
+    skips pages that are already done and retries only failed/missing ones.
+    """
+    import hashlib
+    import urllib.parse
+
+    tasks: list[asyncio.Task] = []
+    try:
         if not request.links:
-            yield sse({"type": "error", "message": "링크 목록이 비어 있습니다."})
+            yield {"type": "error", "message": "링크 목록이 비어 있습니다."}
             return
 
         # Determine output folder
         downloads_dir = pathlib.Path.home() / "Downloads"
-        folder_name = request.output_folder_name.strip()
-        if not folder_name:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            folder_name = f"vcrawl_batch_{timestamp}"
-        output_dir = downloads_dir / folder_name
+        output_dir = downloads_dir / _batch_folder_name(request)
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        manifest_path = output_dir / BATCH_MANIFEST_NAME
+        manifest = _load_batch_manifest(manifest_path)
+
         total = len(request.links)
-        yield sse({"type": "log", "message": f"📁 출력 폴더: {output_dir}"})
-        yield sse({"type": "log", "message": f"📋 총 {total}개 링크 처리 시작…"})
-
-        browser_config = BrowserConfig(headless=True, verbose=False)
-        crawl_config = CrawlerRunConfig(
-            wait_until="domcontentloaded",
-            page_timeout=90000,
-            delay_before_return_html=2.0,
-        )
+        # Every in-flight page holds a pooled browser, so the pool size is the real ceiling.
+        concurrency = max(1, min(request.concurrency, MAX_BATCH_CONCURRENCY, browser_pool.size))
+        per_host_limit = max(1, min(request.per_host_concurrency, concurrency))
+        yield {"type": "log", "message": f"📁 출력 폴더: {output_dir}"}
+        yield {"type": "log", "message": f"📋 총 {total}개 링크 처리 시작… (동시 {concurrency}개, 호스트당 {per_host_limit}개)"}
+
+        crawl_config = render_profiles[request.render_profile or RENDER_PROFILE].run_config()
+
+        events: asyncio.Queue = asyncio.Queue()
+        global_sem = asyncio.Semaphore(concurrency)
+        host_sems: dict[str, asyncio.Semaphore] = {}
+        counts = {"success": 0, "failed": 0, "skipped": 0, "completed": 0}
+
+        def progress(idx: int, url: str, filename: str, status: str, **extra) -> dict:
+            return {
+                "type": "progress",
+                "current": idx,
+                "total": total,
+                "completed": counts["completed"],
+                "url": url,
+                "filename": filename,
+                "status": status,
+                **extra,
+            }
 
-        success_count = 0
-        fail_count = 0
-
-        async with AsyncWebCrawler(config=browser_config, verbose=False) as crawler:
-            for idx, link in enumerate(request.links, start=1):
-                url = link.href.strip()
-                link_text = link.text.strip() or url
-                if not url.startswith(("http://", "https://")):
-                    url = "https://" + url
-
-                filename = _safe_filename(link_text, idx) + ".md"
-                filepath = output_dir / filename
-
-                yield sse({
-                    "type": "progress",
-                    "current": idx,
-                    "total": total,
-                    "url": url,
-                    "filename": filename,
-                    "status": "crawling",
-                })
+        async def crawl_one(idx: int, link: BatchCrawlLink):
+            url = link.href.strip()
+            link_text = link.text.strip() or url
+            if not url.startswith(("http://", "https://")):
+                url = "https://" + url
+
+            filename = _safe_filename(link_text, idx) + ".md"
+            filepath = output_dir / filename
 
+            async def record(status: str, content_hash: str = "", error: str = ""):
+                # A manifest write failure only costs resumability, never the page's result.
                 try:
-                    result = await crawler.arun(url=url, config=crawl_config)
+                    await asyncio.to_thread(_append_batch_manifest, manifest_path, {
+                        "url": url,
+                        "filename": filename,
+                        "status": status,
+                        "content_hash": content_hash,
+                        "error": error,
+                        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                    })
+                except Exception as e:
+                    events.put_nowait({"type": "log", "message": f"⚠️ 매니페스트 기록 실패 ({filename}): {e}"})
+
+            # The stream waits until every link is counted, so the count and the
+            # final progress event happen in `finally`, whatever fails above.
+            outcome, status, extra = "failed", "failed", {}
+            try:
+                previous = manifest.get(url)
+                if previous and previous.get("status") == "done" and (output_dir / previous.get("filename", "")).is_file():
+                    outcome, status, extra = "skipped", "done", {"skipped": True}
+                    filename = previous["filename"]
+                    return
+
+                host = urllib.parse.urlparse(url).netloc.lower()
+                host_sem = host_sems.setdefault(host, asyncio.Semaphore(per_host_limit))
+
+                # Host slot first: waiting on a busy host must not hold a global slot
+                # that links to other hosts could use.
+                async with host_sem, global_sem:
+                    await events.put(progress(idx, url, filename, "crawling"))
+                    timer = StageTimer("batch_crawl")
+                    result = await _fetch_page(url, crawl_config, request.cache_mode, operation="batch_crawl", timer=timer, strategy=request.fetch_strategy)
 
                     if not result.success:
-                        fail_count += 1
-                        yield sse({
-                            "type": "progress",
-                            "current": idx,
-                            "total": total,
-                            "url": url,
-                            "filename": filename,
-                            "status": "failed",
-                            "error": result.error_message or "Unknown error",
-                        })
-                        continue
+                        extra = {"error": result.error_message or "Unknown error"}
+                        await record("failed", error=extra["error"])
+                        return
 
                     # Build Full Markdown with citation
                     source_url = result.url or url
                     citation = f"\n\n---\n**출처(Citations):** [{source_url}]({source_url})"
                     markdown_content = (result.markdown or "") + citation
 
-                    # Write to file (UTF-8)
-                    filepath.write_text(markdown_content, encoding="utf-8")
-                    success_count += 1
-
-                    yield sse({
-                        "type": "progress",
-                        "current": idx,
-                        "total": total,
-                        "url": url,
-                        "filename": filename,
-                        "status": "done",
-                    })
-
-                except Exception as e:
-                    fail_count += 1
-                    yield sse({
-                        "type": "progress",
-                        "current": idx,
-                        "total": total,
-                        "url": url,
-                        "filename": filename,
-                        "status": "failed",
-                        "error": str(e),
-                    })
-
-        yield sse({
+                    # Write to file (UTF-8) off the event loop
+                    with timer.stage("write"):
+                        await asyncio.to_thread(filepath.write_text, markdown_content, encoding="utf-8")
+                    CONTENT_BYTES.inc(len(markdown_content), operation="batch_crawl", kind="markdown")
+                    await record("done", content_hash=hashlib.sha256(markdown_content.encode("utf-8")).hexdigest())
+                    outcome, status = "success", "done"
+
+            except Exception as e:
+                extra = {"error": str(e)}
+                await record("failed", error=str(e))
+            finally:
+                counts[outcome] += 1
+                counts["completed"] += 1
+                events.put_nowait(progress(idx, url, filename, status, **extra))
+
+        tasks = [
+            asyncio.create_task(crawl_one(idx, link))
+            for idx, link in enumerate(request.links, start=1)
+        ]
+
+        if manifest:
+            yield {"type": "log", "message": f"♻️ 기존 매니페스트 발견: {sum(1 for r in manifest.values() if r.get('status') == 'done')}개 완료 페이지는 건너뜁니다."}
+
+        while counts["completed"] < total or not events.empty():
+            yield await events.get()
+
+        yield {
             "type": "complete",
             "folder_path": str(output_dir),
-            "total_success": success_count,
-            "total_failed": fail_count,
-        })
+            "total_success": counts["success"] + counts["skipped"],
+            "total_failed": counts["failed"],
+            "total_skipped": counts["skipped"],
+        }
 
     except Exception as e:
-        import json
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        yield {"type": "error", "message": str(e)}
+    finally:
+        # Job cancelled (or we failed): stop any pages still in flight.
+        for task in tasks:
+            task.cancel()
 
 
 # ──────────────────────────────────────────────
 # LLM Batch — OpenAI Batch API
 # ──────────────────────────────────────────────
 import json
-import uuid
+import llm_batch
+from batch_tracker import BatchTracker, batch_info
+
+# Enqueued-token budget per JSONL shard (OpenAI batch queue limits are per model and tier)
+BATCH_MAX_TOKENS_PER_FILE = int(os.getenv("VCRAWL_BATCH_MAX_TOKENS", "2000000"))
+# .md files read concurrently while building shards
+BATCH_READ_CONCURRENCY = int(os.getenv("VCRAWL_BATCH_READ_CONCURRENCY", "8"))
+# Shards uploaded / created at once by llm-batch/submit, and retries per step
+BATCH_SUBMIT_CONCURRENCY = int(os.getenv("VCRAWL_BATCH_SUBMIT_CONCURRENCY", "4"))
+BATCH_SUBMIT_RETRIES = int(os.getenv("VCRAWL_BATCH_SUBMIT_RETRIES", "4"))
+# Batches downloaded / unpacked at once by llm-batch/results
+BATCH_RESULTS_CONCURRENCY = int(os.getenv("VCRAWL_BATCH_RESULTS_CONCURRENCY", "4"))
+# Seconds a batches.list response is reused by llm-batch/list
+BATCH_LIST_TTL = float(os.getenv("VCRAWL_BATCH_LIST_TTL", "30"))
+
+def _openai_client():
+    import openai
+    api_key = os.getenv("OPENAI_API_KEY")
+    return openai.AsyncOpenAI(api_key=api_key, max_retries=2) if api_key else None
+
+# One background poller for every submitted batch; status requests and the
+# events stream are answered from its cache instead of calling OpenAI.
+batch_tracker = BatchTracker(
+    path=pathlib.Path(os.getenv("VCRAWL_BATCH_TRACKER_PATH", pathlib.Path(__file__).parent / ".vcrawl_cache" / "batches.sqlite3")),
+    client_factory=_openai_client,
+    min_interval=float(os.getenv("VCRAWL_BATCH_POLL_MIN", "5")),
+    max_interval=float(os.getenv("VCRAWL_BATCH_POLL_MAX", "300")),
+)
+_batch_list_cache: dict = {"at": 0.0, "limit": 0, "batches": []}
 
 class LLMBatchConvertRequest(BaseModel):
     folder_path: str
     instruction: str
     model: str = "gpt-5-mini"
+    # Close a shard before its estimated input tokens exceed this; 0 = VCRAWL_BATCH_MAX_TOKENS
+    max_tokens_per_file: int = 0
+    stream: bool = False   # SSE progress events instead of a single JSON response
 
 class LLMBatchSubmitRequest(BaseModel):
     jsonl_folder_path: str
+    # Download results into output_folder_path as soon as each batch completes
+    auto_download: bool = False
+    output_folder_path: str = ""
 
 class LLMBatchStatusRequest(BaseModel):
     batch_ids: list[str]
 
-class LLMBatchResultsRequest(BaseModel):
+class LLMBatchTrackRequest(BaseModel):
     batch_ids: list[str]
+    auto_download: bool = False
     output_folder_path: str = ""
 
-@app.post("/api/v1/llm-batch/convert")
-async def batch_convert(request: LLMBatchConvertRequest):
-    try:
-        folder_path = pathlib.Path(request.folder_path.strip('"\' '))
-        if not folder_path.is_dir():
-            raise Exception(f"Invalid directory path: {folder_path}")
-
-        md_files = list(folder_path.glob("*.md"))
-        if not md_files:
-            raise Exception("No .md files found in the directory.")
+class LLMBatchEventsRequest(BaseModel):
+    batch_ids: list[str] = []   # empty = every tracked batch
 
-        output_dir = folder_path.parent / f"{folder_path.name}_jsonl"
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        # OpenAI Limits
-        MAX_REQUESTS_PER_FILE = 50000
-        # Target 500MB max per file to be safely under 512MB
-        MAX_BYTES_PER_FILE = 500 * 1024 * 1024 
-
-        current_file_index = 1
-        current_request_count = 0
-        current_file_bytes = 0
-        
-        out_file = output_dir / f"batch_{current_file_index:03d}.jsonl"
-        f_out = open(out_file, "w", encoding="utf-8")
-
-        files_info = []
-        for file_path in md_files:
-            content = file_path.read_text(encoding="utf-8")
-            custom_id = file_path.stem
-
-            if "gpt-5" in request.model:
-                messages = [{"role": "user", "content": f"System Instruction:\n{request.instruction}\n\nUser Content:\n{content}"}]
-                body = {
-                    "model": request.model,
-                    "messages": messages,
-                    "reasoning_effort": "low"
-                }
-            else:
-                messages = [
-                    {"role": "system", "content": request.instruction},
-                    {"role": "user", "content": content}
-                ]
-                body = {
-                    "model": request.model,
-                    "messages": messages
-                }
-
-            jsonl_entry = {
-                "custom_id": custom_id,
-                "method": "POST",
-                "url": "/v1/chat/completions",
-                "body": body
-            }
-
-            line = json.dumps(jsonl_entry, ensure_ascii=False) + "\n"
-            line_bytes = len(line.encode("utf-8"))
+class LLMBatchResultsRequest(BaseModel):
+    batch_ids: list[str]
+    output_folder_path: str = ""
 
-            # Check if adding this prevents exceeding limits
-            if current_request_count >= MAX_REQUESTS_PER_FILE or (current_file_bytes + line_bytes) > MAX_BYTES_PER_FILE:
-                f_out.close()
-                current_file_index += 1
-                out_file = output_dir / f"batch_{current_file_index:03d}.jsonl"
-                f_out = open(out_file, "w", encoding="utf-8")
-                
-                current_request_count = 0
-                current_file_bytes = 0
+def _convert_output_dir(request: LLMBatchConvertRequest) -> tuple[pathlib.Path, pathlib.Path]:
+    folder_path = pathlib.Path(request.folder_path.strip('"\' '))
+    if not folder_path.is_dir():
+        raise Exception(f"Invalid directory path: {folder_path}")
+    return folder_path, folder_path.parent / f"{folder_path.name}_jsonl"
+
+def _convert_events(request: LLMBatchConvertRequest):
+    folder_path, output_dir = _convert_output_dir(request)
+    return llm_batch.convert_folder(
+        folder_path,
+        output_dir,
+        request.instruction,
+        request.model,
+        max_tokens=request.max_tokens_per_file or BATCH_MAX_TOKENS_PER_FILE,
+        read_concurrency=BATCH_READ_CONCURRENCY,
+    )
 
-            f_out.write(line)
-            current_request_count += 1
-            current_file_bytes += line_bytes
-            files_info.append({"custom_id": custom_id, "batch_file": out_file.name})
+async def _batch_convert_generator(request: LLMBatchConvertRequest):
+    def sse(data: dict) -> str:
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        f_out.close()
+    try:
+        async for event in _convert_events(request):
+            yield sse(event)
+    except Exception as e:
+        yield sse({"type": "error", "message": str(e)})
 
-        return {
-            "success": True, 
-            "output_folder": str(output_dir), 
-            "file_count": len(files_info),
-            "batch_files_created": current_file_index 
-        }
+@app.post("/api/v1/llm-batch/convert")
+async def batch_convert(request: LLMBatchConvertRequest):
+    if request.stream:
+        return StreamingResponse(
+            _batch_convert_generator(request),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            },
+        )
+    try:
+        result = None
+        async for event in _convert_events(request):
+            if event["type"] == "done":
+                result = event
+        result.pop("type")
+        return {"success": True, **result}
     except Exception as e:
         return {"success": False, "error_message": str(e)}
 
@@ -754,65 +1459,95 @@ async def batch_submit(request: LLMBatchSubmitRequest):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise Exception("OPENAI_API_KEY is not set.")
-        client = openai.OpenAI(api_key=api_key)
+        # Retries are done per shard in llm_batch.submit_shards.
+        client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
 
         folder_path = pathlib.Path(request.jsonl_folder_path.strip('"\' '))
         if not folder_path.is_dir():
             raise Exception(f"Invalid directory path: {folder_path}")
 
-        jsonl_files = list(folder_path.glob("*.jsonl"))
+        jsonl_files = sorted(folder_path.glob("*.jsonl"))
         if not jsonl_files:
             raise Exception("No .jsonl files found in the directory.")
 
-        batches = []
-        for file_path in jsonl_files:
-            with open(file_path, "rb") as f:
-                file_obj = client.files.create(file=f, purpose="batch")
-            
-            batch_job = client.batches.create(
-                input_file_id=file_obj.id,
-                endpoint="/v1/chat/completions",
-                completion_window="24h"
+        async with client:
+            batches, failed = await llm_batch.submit_shards(
+                client,
+                jsonl_files,
+                concurrency=BATCH_SUBMIT_CONCURRENCY,
+                retries=BATCH_SUBMIT_RETRIES,
             )
-            batches.append({
-                "batch_id": batch_job.id,
-                "input_file_id": file_obj.id,
-                "filename": file_path.name,
-                "status": batch_job.status
-            })
-
-        return {"success": True, "batches": batches}
+
+        if not batches:
+            return {"success": False, "error_message": f"All {len(failed)} shard(s) failed: {failed[0]['error']}", "batches": [], "failed": failed}
+        await batch_tracker.track(
+            [b["batch_id"] for b in batches],
+            auto_download=request.auto_download,
+            output_folder=request.output_folder_path.strip('"\' '),
+        )
+        return {"success": True, "batches": batches, "failed": failed}
     except Exception as e:
         return {"success": False, "error_message": str(e)}
 
 @app.post("/api/v1/llm-batch/status")
 async def batch_status(request: LLMBatchStatusRequest):
     try:
-        import openai
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not os.getenv("OPENAI_API_KEY"):
             raise Exception("OPENAI_API_KEY is not set.")
-        client = openai.OpenAI(api_key=api_key)
-
-        batches_info = []
-        for batch_id in request.batch_ids:
-            batch_job = client.batches.retrieve(batch_id)
-            batches_info.append({
-                "batch_id": batch_job.id,
-                "status": batch_job.status,
-                "completed": batch_job.request_counts.completed if batch_job.request_counts else 0,
-                "failed": batch_job.request_counts.failed if batch_job.request_counts else 0,
-                "total": batch_job.request_counts.total if batch_job.request_counts else 0,
-                "output_file_id": batch_job.output_file_id,
-                "error_file_id": batch_job.error_file_id
-            })
-
+        # Known batches come straight from the tracker; unknown ones are
+        # tracked from now on and wait briefly for their first poll.
+        batches_info = await batch_tracker.status(list(dict.fromkeys(request.batch_ids)))
         return {"success": True, "batches": batches_info}
     except Exception as e:
         return {"success": False, "error_message": str(e)}
 
+@app.post("/api/v1/llm-batch/track")
+async def batch_track(request: LLMBatchTrackRequest):
+    try:
+        await batch_tracker.track(
+            request.batch_ids,
+            auto_download=request.auto_download,
+            output_folder=request.output_folder_path.strip('"\' '),
+        )
+        return {"success": True, "batches": batch_tracker.snapshot(request.batch_ids)}
+    except Exception as e:
+        return {"success": False, "error_message": str(e)}
+
+async def _batch_events_generator(request: LLMBatchEventsRequest):
+    def sse(data: dict) -> str:
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    wanted = set(request.batch_ids)
+    queue = batch_tracker.subscribe()
+    try:
+        if wanted:
+            await batch_tracker.track(request.batch_ids)
+        yield sse({"type": "snapshot", "batches": batch_tracker.snapshot(request.batch_ids or None)})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if not wanted or event["batch_id"] in wanted:
+                yield sse(event)
+    finally:
+        batch_tracker.unsubscribe(queue)
+
+@app.post("/api/v1/llm-batch/events")
+async def batch_events(request: LLMBatchEventsRequest):
+    return StreamingResponse(
+        _batch_events_generator(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
 class LLMBatchListRequest(BaseModel):
     limit: int = 30
+    refresh: bool = False   # skip the VCRAWL_BATCH_LIST_TTL cache
 
 @app.post("/api/v1/llm-batch/list")
 async def batch_list(request: LLMBatchListRequest):
@@ -821,42 +1556,42 @@ async def batch_list(request: LLMBatchListRequest):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise Exception("OPENAI_API_KEY is not set.")
-        client = openai.OpenAI(api_key=api_key)
+
+        cached = _batch_list_cache
+        if (
+            not request.refresh
+            and time.time() - cached["at"] < BATCH_LIST_TTL
+            and (cached["limit"] >= request.limit or len(cached["batches"]) < cached["limit"])
+        ):
+            return {"success": True, "batches": cached["batches"][:request.limit], "cached": True}
 
         batches_info = []
         target_limit = request.limit
         fetched_count = 0
         last_id = None
 
-        while fetched_count < target_limit:
-            # The maximum allowed per request by OpenAI is 100
-            fetch_size = min(100, target_limit - fetched_count)
-            
-            kwargs = {"limit": fetch_size}
-            if last_id:
-                kwargs["after"] = last_id
-                
-            batch_jobs = client.batches.list(**kwargs)
-            data_list = list(batch_jobs.data)
-            
-            if not data_list:
-                break # No more batches available
-
-            for batch_job in data_list:
-                batches_info.append({
-                    "batch_id": batch_job.id,
-                    "status": batch_job.status,
-                    "completed": batch_job.request_counts.completed if batch_job.request_counts else 0,
-                    "failed": batch_job.request_counts.failed if batch_job.request_counts else 0,
-                    "total": batch_job.request_counts.total if batch_job.request_counts else 0,
-                    "created_at": batch_job.created_at,
-                    "output_file_id": batch_job.output_file_id,
-                    "error_file_id": batch_job.error_file_id
-                })
-            
-            fetched_count += len(data_list)
-            last_id = data_list[-1].id
+        async with openai.AsyncOpenAI(api_key=api_key) as client:
+            while fetched_count < target_limit:
+                # The maximum allowed per request by OpenAI is 100
+                fetch_size = min(100, target_limit - fetched_count)
 
+                kwargs = {"limit": fetch_size}
+                if last_id:
+                    kwargs["after"] = last_id
+
+                batch_jobs = await client.batches.list(**kwargs)
+                data_list = list(batch_jobs.data)
+
+                if not data_list:
+                    break # No more batches available
+
+                batches_info.extend(batch_info(batch_job) for batch_job in data_list)
+
+                fetched_count += len(data_list)
+                last_id = data_list[-1].id
+
+        _batch_list_cache.update(at=time.time(), limit=target_limit, batches=batches_info)
+        await batch_tracker.observe(batches_info)
         return {"success": True, "batches": batches_info}
     except Exception as e:
         return {"success": False, "error_message": str(e)}
@@ -868,14 +1603,10 @@ async def batch_results(request: LLMBatchResultsRequest):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise Exception("OPENAI_API_KEY is not set.")
-        client = openai.OpenAI(api_key=api_key)
 
         if not request.batch_ids:
             raise Exception("No batch IDs provided.")
 
-        total_files = 0
-        rejected_count = 0
-        
         # Determine output folder
         # For simplicity, we create a default folder in the user's Downloads or beside the script if path not provided.
         # But we'll try to put it beside the current working directory if output_folder_path is empty.
@@ -883,68 +1614,229 @@ async def batch_results(request: LLMBatchResultsRequest):
             output_dir = pathlib.Path(request.output_folder_path.strip('"\' '))
         else:
             output_dir = pathlib.Path.cwd() / "batch_results"
-        
-        output_dir.mkdir(parents=True, exist_ok=True)
 
-        for batch_id in request.batch_ids:
-            batch_job = client.batches.retrieve(batch_id)
-            if batch_job.status == "completed" and batch_job.output_file_id:
-                # Download results
-                response = client.files.content(batch_job.output_file_id)
-                content = response.text
-                
-                for line in content.strip().split("\n"):
-                    if not line.strip(): continue
-                    result_data = json.loads(line)
-                    
-                    custom_id = result_data.get("custom_id", f"unknown_{uuid.uuid4().hex[:8]}")
-                    
-                    try:
-                        response_body = result_data["response"]["body"]
-                        llm_text = response_body["choices"][0]["message"]["content"]
-                    except (KeyError, IndexError, TypeError):
-                        llm_text = "ERROR: Failed to parse LLM response from batch result."
-                    
-                    # Filename logic
-                    # custom_id is the original file stem (e.g. "0001_pagename")
-                    # Sanitize any Windows-illegal characters just in case
-                    MAX_BASE_LEN = 180  # leave room for suffix + .md
-                    REJECTED_SUFFIX = " [REJECTED]"
-                    base_filename = re.sub(r'[<>:"\\|?*]', '_', custom_id)
-
-                    is_rejected = "[STATUS: REJECTED]" in llm_text
-
-                    if is_rejected:
-                        rejected_count += 1
-                        # Trim base so total stays within OS limit
-                        trimmed = base_filename[:MAX_BASE_LEN]
-                        out_file = output_dir / f"{trimmed}{REJECTED_SUFFIX}.md"
-                    else:
-                        out_file = output_dir / f"{base_filename[:MAX_BASE_LEN + len(REJECTED_SUFFIX)]}.md"
-                    
-                    out_file.write_text(llm_text, encoding="utf-8")
-                    total_files += 1
-
-        return {
-            "success": True, 
-            "output_folder": str(output_dir), 
-            "total_files": total_files, 
-            "rejected_count": rejected_count
-        }
+        async with openai.AsyncOpenAI(api_key=api_key, max_retries=0) as client:
+            summary = await llm_batch.fetch_results(
+                client,
+                list(dict.fromkeys(request.batch_ids)),
+                output_dir,
+                concurrency=BATCH_RESULTS_CONCURRENCY,
+                retries=BATCH_SUBMIT_RETRIES,
+            )
+
+        errors = [b for b in summary["batches"] if b.get("error")]
+        if len(errors) == len(summary["batches"]):
+            return {"success": False, "error_message": f"{errors[0]['batch_id']}: {errors[0]['error']}", **summary}
+        return {"success": True, **summary}
     except Exception as e:
         return {"success": False, "error_message": str(e)}
 
 @app.post("/api/v1/batch-crawl")
 async def batch_crawl(request: BatchCrawlRequest):
+    # Runs as a background job; closing the stream does not stop it (see /api/v1/jobs).
+    _batch_folder_name(request)
+    job_id = await _submit_job("batch-crawl", request)
     return StreamingResponse(
-        _batch_crawl_generator(request),
+        _job_event_stream(job_id, announce=True),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",
+            "X-Job-Id": job_id,
         },
     )
 
+# ──────────────────────────────────────────────
+# Jobs — background batch-crawl / collect-links runs with a durable event log
+# ──────────────────────────────────────────────
+from fastapi import Header
+from job_store import JobStore, JobManager
+
+job_manager = JobManager(
+    JobStore(pathlib.Path(os.getenv("VCRAWL_JOB_DB_PATH", pathlib.Path(__file__).parent / ".vcrawl_cache" / "jobs.sqlite3"))),
+    # Jobs running at once; each one still shares the browser pool with everything else
+    max_running=int(os.getenv("VCRAWL_MAX_RUNNING_JOBS", "2")),
+    # Finished jobs and their event logs are deleted after this many seconds
+    retention=float(os.getenv("VCRAWL_JOB_TTL", str(7 * 86400))),
+)
+
+JOB_KINDS = {
+    "batch-crawl": (BatchCrawlRequest, _batch_crawl_events),
+    "collect-links": (CollectLinksRequest, _collect_links_events),
+}
+
+async def _submit_job(kind: str, request: BaseModel) -> str:
+    _, events = JOB_KINDS[kind]
+    return await job_manager.submit(kind, request.model_dump(), _tracked(kind.replace("-", "_"), events(request)))
+
+async def _job_event_stream(job_id: str, offset: int = 0, announce: bool = False):
+    """SSE for a job's events from `offset`; each event carries its `seq` for reconnecting."""
+    if announce:
+        yield f"data: {json.dumps({'type': 'job', 'job_id': job_id})}\n\n"
+    async for item in job_manager.stream(job_id, offset):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        seq, event = item
+        yield f"id: {seq}\ndata: {json.dumps({**event, 'seq': seq}, ensure_ascii=False)}\n\n"
+
+@app.post("/api/v1/jobs/batch-crawl")
+async def create_batch_crawl_job(request: BatchCrawlRequest):
+    _batch_folder_name(request)
+    job_id = await _submit_job("batch-crawl", request)
+    return {"success": True, "job_id": job_id}
+
+@app.post("/api/v1/jobs/collect-links")
+async def create_collect_links_job(request: CollectLinksRequest):
+    job_id = await _submit_job("collect-links", request)
+    return {"success": True, "job_id": job_id}
+
+@app.get("/api/v1/jobs")
+async def list_jobs(limit: int = 50, status: str | None = None, kind: str | None = None):
+    jobs = await job_manager.list_jobs(max(1, min(limit, 500)), status, kind)
+    # Requests can hold thousands of links; the list only needs the job headers.
+    for job in jobs:
+        job.pop("request", None)
+    return {"success": True, "jobs": jobs}
+
+@app.get("/api/v1/jobs/stats")
+async def job_stats():
+    return job_manager.stats()
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def job_events(job_id: str, offset: int = 0, last_event_id: str | None = Header(default=None)):
+    if await job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # EventSource reconnects send Last-Event-ID; resume right after it.
+    if last_event_id and last_event_id.isdigit():
+        offset = max(offset, int(last_event_id) + 1)
+    return StreamingResponse(
+        _job_event_stream(job_id, offset),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not await job_manager.cancel(job_id):
+        return {"success": False, "error_message": f"Job is already {job['status']}"}
+    return {"success": True, "job_id": job_id, "status": "cancelled"}
+
+@app.post("/api/v1/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Start a new job with the same request (batch-crawl skips pages its manifest has as done)."""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    request_model, _ = JOB_KINDS[job["kind"]]
+    new_id = await _submit_job(job["kind"], request_model(**job["request"]))
+    return {"success": True, "job_id": new_id, "retry_of": job_id}
+
+
+@app.get("/api/v1/llm-batch/tracker/stats")
+async def batch_tracker_stats():
+    return batch_tracker.stats()
+
+@app.get("/api/v1/hosts/stats")
+async def hosts_stats():
+    return host_limiter.stats()
+
+
+@app.get("/api/v1/fetch/stats")
+async def fetch_stats():
+    return {"default_strategy": FETCH_STRATEGY, **http_fetcher.stats()}
+
+
+@app.get("/api/v1/pool/stats")
+async def pool_stats():
+    return browser_pool.stats()
+
+
+@app.get("/api/v1/llm-cache/stats")
+async def llm_cache_stats():
+    return llm_cache.stats()
+
+
+@app.get("/api/v1/postprocess/stats")
+async def postprocess_stats():
+    return post_processor.stats()
+
+
+@app.get("/api/v1/page-cache/stats")
+async def page_cache_stats():
+    return page_cache.stats()
+
+
+
+@REGISTRY.collector
+def _component_metrics():
+    """The per-component stats() dicts, as gauges and counters at scrape time."""
+    pool = browser_pool.stats()
+    yield "vcrawl_browser_pool_slots", "gauge", "Browser pool slots by state", [
+        ({"state": "in_use"}, pool["in_use"]),
+        ({"state": "idle"}, pool["idle"]),
+        ({"state": "launched"}, pool["launched"]),
+    ]
+    yield "vcrawl_browser_pool_waiting", "gauge", "Requests waiting for a browser", [({}, pool["waiting"])]
+    yield "vcrawl_browser_pool_events_total", "counter", "Browser launches, recycles, crashes and abandoned pages", [
+        ({"event": "launch"}, pool["total_launches"]),
+        ({"event": "recycle"}, pool["recycled"]),
+        ({"event": "crash"}, pool["crashes"]),
+        ({"event": "abandoned"}, pool["abandoned"]),
+    ]
+
+    caches = (("page", page_cache.stats()), ("llm", llm_cache.stats()))
+    yield "vcrawl_cache_entries", "gauge", "Entries per cache", [({"cache": name}, st["entries"]) for name, st in caches]
+    yield "vcrawl_cache_bytes", "gauge", "Bytes stored per cache", [({"cache": name}, st["bytes"]) for name, st in caches]
+    yield "vcrawl_cache_lookups_total", "counter", "Cache lookups by result", [
+        ({"cache": name, "result": result}, st[key])
+        for name, st in caches
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    ]
+    yield "vcrawl_cache_evictions_total", "counter", "Entries evicted per cache", [({"cache": name}, st["evictions"]) for name, st in caches]
+
+    post = post_processor.stats()
+    yield "vcrawl_postprocess_in_flight", "gauge", "Pages in post-processing (running or queued)", [({}, post["in_flight"])]
+    yield "vcrawl_postprocess_queue_depth", "gauge", "Pages waiting for a post-processing worker", [({}, post["queue_depth"])]
+
+    # Per-host state stays on /api/v1/hosts/stats; only totals here to keep label cardinality bounded.
+    hosts = host_limiter.stats()["hosts"].values()
+    yield "vcrawl_hosts_tracked", "gauge", "Hosts with adaptive rate-limit state", [({}, len(hosts))]
+    yield "vcrawl_host_requests_in_flight", "gauge", "Page requests holding a host slot", [({}, sum(h["in_flight"] for h in hosts))]
+    yield "vcrawl_host_requests_waiting", "gauge", "Page requests waiting for a host slot", [({}, sum(h["waiting"] for h in hosts))]
+    yield "vcrawl_hosts_paused", "gauge", "Hosts currently backing off (429 / Retry-After)", [({}, sum(1 for h in hosts if h["paused_for_s"] > 0))]
+
+    http = http_fetcher.stats()
+    yield "vcrawl_http_requests_total", "counter", "Requests made by the HTTP fetch client", [({}, http["requests"])]
+    yield "vcrawl_http_hosts", "gauge", "Hosts remembered by the auto fetch strategy", [
+        ({"strategy": "http"}, http["hosts_http"]),
+        ({"strategy": "browser"}, http["hosts_browser"]),
+    ]
+
+    jobs = job_manager.stats()
+    yield "vcrawl_jobs", "gauge", "Background jobs by state", [({"state": "running"}, jobs["running"]), ({"state": "queued"}, jobs["queued"])]
+
+    tracker = batch_tracker.stats()
+    yield "vcrawl_llm_batches_tracked", "gauge", "Tracked OpenAI batches by state", [({"state": "active"}, tracker["active"]), ({"state": "all"}, tracker["tracked"])]
+    yield "vcrawl_llm_batch_polls_total", "counter", "OpenAI batch status polls", [({}, tracker["polls"])]
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
@@ -0,0 +1,197 @@
+"""
+Persistent on-disk page cache shared by crawl, collect-links and batch-crawl.
+
+Stores the `CrawlResult` fields the endpoints use (html, cleaned_html,
+markdown, links, final url) in SQLite, keyed by normalized URL + crawl
+config. Entries expire after a TTL, the total size is bounded with LRU
+eviction, and expired entries that carry an ETag / Last-Modified header
+can be revalidated with a cheap conditional GET instead of a browser run.
+"""
+import asyncio
+import hashlib
+import json
+import pathlib
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+
+from sqlite_lru import SqliteLRUStore
+
+CACHE_MODES = ("use", "bypass", "refresh")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    final_url TEXT,
+    payload BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Cheap normalization for cache keys: lower-case scheme/host, no fragment, no default port."""
+    parsed = urllib.parse.urlsplit(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urllib.parse.urlunsplit((scheme, netloc, parsed.path or "/", parsed.query, ""))
+
+
+def config_key(config, strategy: str = "browser") -> str:
+    """Stable key for the parts of a `CrawlerRunConfig` and the fetch strategy that change the page output.
+
+    The strategy is part of the key so an `http` fetch of a JS shell page is
+    never served to a `browser` or `auto` request, and so is the render
+    profile (`shared_data["render_profile"]`), whose blocked resources change
+    the HTML.
+    """
+    if config is None:
+        return "default" if strategy == "browser" else f"default|{strategy}"
+    fields = ("wait_until", "page_timeout", "delay_before_return_html", "wait_for", "js_code")
+    key = {f: getattr(config, f, None) for f in fields}
+    key["fetch_strategy"] = strategy
+    key["render_profile"] = (getattr(config, "shared_data", None) or {}).get("render_profile")
+    return json.dumps(key, sort_keys=True, default=str)
+
+
+class CachedPage:
+    """Duck-types the subset of `CrawlResult` the endpoints read."""
+
+    success = True
+    error_message = ""
+    from_cache = True
+
+    def __init__(self, url: str, html: str, cleaned_html: str, markdown: str, links: dict):
+        self.url = url
+        self.html = html
+        self.cleaned_html = cleaned_html
+        self.markdown = markdown
+        self.links = links
+
+
+class PageCache:
+    def __init__(self, path: pathlib.Path, ttl: float = 86400.0, max_bytes: int = 512 * 1024 * 1024, revalidate: bool = True):
+        self.path = pathlib.Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self._store = SqliteLRUStore(self.path, "pages", _SCHEMA, max_bytes)
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @property
+    def evictions(self) -> int:
+        return self._store.evictions
+
+    @staticmethod
+    def _key(url: str, cfg_key: str) -> str:
+        return hashlib.sha256(f"{normalize_url(url)}\n{cfg_key}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _not_modified(url: str, etag: str, last_modified: str) -> bool:
+        headers = {"User-Agent": "Mozilla/5.0 (vcrawl cache revalidation)"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=10) as resp:
+                return resp.status == 304
+        except urllib.error.HTTPError as e:
+            return e.code == 304
+        except Exception:
+            return False
+
+    # ── async API ──
+
+    async def get(self, url: str, cfg_key: str) -> CachedPage | None:
+        key = self._key(url, cfg_key)
+        row = await asyncio.to_thread(self._store.get, key, "url, final_url, payload, etag, last_modified, fetched_at")
+        if row is None:
+            self.misses += 1
+            return None
+
+        orig_url, final_url, payload, etag, last_modified, fetched_at = row
+        if time.time() - fetched_at > self.ttl:
+            if not (self.revalidate and (etag or last_modified)):
+                self.misses += 1
+                return None
+            if not await asyncio.to_thread(self._not_modified, final_url or orig_url, etag, last_modified):
+                self.misses += 1
+                return None
+            now = time.time()
+            await asyncio.to_thread(self._store.update, key, fetched_at=now, accessed_at=now)
+            self.revalidated += 1
+
+        self.hits += 1
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        return CachedPage(
+            url=final_url or orig_url,
+            html=data.get("html", ""),
+            cleaned_html=data.get("cleaned_html", ""),
+            markdown=data.get("markdown", ""),
+            links=data.get("links", {}),
+        )
+
+    async def put(self, url: str, cfg_key: str, result):
+        """Store a successful `CrawlResult` (or anything exposing the same fields).
+
+        Error pages (status >= 400) are skipped even when crawl4ai reports them
+        as successful, so a passing 429 / 5xx is not served for the whole TTL.
+        """
+        if not getattr(result, "success", False) or getattr(result, "from_cache", False):
+            return
+        status = getattr(result, "status_code", None)
+        if status and status >= 400:
+            return
+        data = {
+            "html": result.html or "",
+            "cleaned_html": result.cleaned_html or "",
+            "markdown": str(result.markdown or ""),
+            "links": result.links or {},
+        }
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+        headers = {k.lower(): v for k, v in (getattr(result, "response_headers", None) or {}).items()}
+        now = time.time()
+        await asyncio.to_thread(
+            self._store.put,
+            self._key(url, cfg_key),
+            url=url,
+            final_url=result.url or url,
+            payload=payload,
+            etag=headers.get("etag", ""),
+            last_modified=headers.get("last-modified", ""),
+            size=len(payload),
+            fetched_at=now,
+            accessed_at=now,
+        )
+
+    def stats(self) -> dict:
+        entries, size = self._store.counts()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        self._store.close()
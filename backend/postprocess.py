@@ -0,0 +1,143 @@
+"""
+CPU-bound page post-processing (structure analysis + html2text), kept in a
+small module so process-pool workers can import it without loading the
+FastAPI app, crawl4ai or litellm.
+
+`PostProcessor` runs `process_page` in a ProcessPoolExecutor (default), a
+ThreadPoolExecutor or inline on the event loop, and tracks queue depth.
+The HTML is sent to the worker once; only the structure previews and the
+content-only HTML/markdown come back.
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import html2text
+
+import structure_analyzer
+
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+
+def _preview(element, limit: int) -> str:
+    text = structure_analyzer.outer_html(element)
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def analyze(html: str, parser: str = "html.parser"):
+    """Return (structure dict matching PageStructure, main content element)."""
+    scan = structure_analyzer.parse_and_scan(html, parser)
+    structure = {}
+
+    # 1. Header — tags: header | keywords: header, top, gnb (Global Navigation Bar), head
+    header = structure_analyzer.find_region(scan, "header")
+    if header:
+        structure["header"] = _preview(header, 1000)
+
+    # 2. Navigation — tags: nav | keywords: nav, menu, lnb (Local Navigation Bar)
+    nav = structure_analyzer.find_region(scan, "navigation")
+    if nav:
+        structure["navigation"] = _preview(nav, 1000)
+
+    # 3. Main Content — tags: main, article | keywords: content, main, body, center, container, wrapper
+    # Fallback: If no main found by keywords, take the div with the most text
+    main_element = structure_analyzer.find_region(scan, "main_content") or structure_analyzer.find_main_fallback(scan)
+    if main_element:
+        structure["main_content"] = _preview(main_element, 2000)
+
+    # 4. Footer — tags: footer | keywords: footer, bottom, info, copyright
+    footer = structure_analyzer.find_region(scan, "footer")
+    if footer:
+        structure["footer"] = _preview(footer, 1000)
+
+    # 5. Ads (Heuristic)
+    structure["ads"] = [structure_analyzer.outer_html(ad)[:200] + "..." for ad in structure_analyzer.collect_ads(scan)]
+    return structure, main_element
+
+
+def html_to_markdown(html: str) -> str:
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = False
+    return h.handle(html)
+
+
+def process_page(html: str, parser: str = "html.parser") -> dict:
+    """Structure analysis + content-only extraction for one page (runs in a worker)."""
+    started = time.perf_counter()
+    structure, main_element = analyze(html, parser)
+    analyzed = time.perf_counter()
+
+    content_only_html = ""
+    content_only_markdown = ""
+    if main_element:
+        content_only_html = structure_analyzer.outer_html(main_element)
+        content_only_markdown = html_to_markdown(content_only_html)
+
+    return {
+        "structure": structure,
+        "content_only_html": content_only_html,
+        "content_only_markdown": content_only_markdown,
+        "timings": {
+            "analyze_structure": analyzed - started,
+            "html2text": time.perf_counter() - analyzed,
+        },
+    }
+
+
+class PostProcessor:
+    def __init__(self, mode: str = "process", workers: int = 2):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown post-processing mode '{mode}'. Choose one of: {', '.join(EXECUTOR_MODES)}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self._executor = None
+
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._latency_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None and self.mode != "inline":
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="postprocess")
+        return self._executor
+
+    async def run(self, html: str, parser: str = "html.parser") -> dict:
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                result = process_page(html, parser)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), process_page, html, parser)
+            self._completed += 1
+            return result
+        except BaseException:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._latency_total += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        finished = self._completed + self._failed
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            # Jobs waiting for a free worker (in flight beyond the worker count)
+            "queue_depth": max(0, self._in_flight - (1 if self.mode == "inline" else self.workers)),
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_latency_ms": round(self._latency_total / finished * 1000, 2) if finished else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,191 @@
+"""
+Render profiles: what the browser downloads and how long it waits before capturing.
+
+The crawl endpoints used to sleep a flat `delay_before_return_html=2.0` on
+every page and let the browser fetch every image, font, video and ad script.
+A profile replaces both:
+
+    full       loads everything and sleeps the fixed 2s (previous behaviour,
+               and the default)
+    balanced   blocks images, media, fonts and ad / analytics domains, and
+               waits until the DOM has been quiet for `quiet_ms` (capped at
+               `max_wait_ms`)
+    lean       also blocks stylesheets and other non-essential requests, with
+               a shorter quiet window
+
+Blocking happens with `page.route` in crawl4ai's `on_page_context_created`
+hook (per page, not per context: crawl4ai reuses contexts across crawls).
+The adaptive wait is a `js:` `wait_for` condition that installs a
+MutationObserver and returns once no mutation was seen for `quiet_ms`, or
+once `max_wait_ms` has passed. It never fails the crawl on the cap.
+
+Each browser fetch gets a fresh `shared_data["render"]` dict that the hooks
+fill with blocked request counts (by resource type, or `ad_domain`) and the
+time actually waited, so callers can report what the profile saved.
+"""
+import urllib.parse
+
+from crawl4ai import CrawlerRunConfig
+
+RESOURCE_TYPES = (
+    "stylesheet", "image", "media", "font", "script", "texttrack",
+    "xhr", "fetch", "eventsource", "websocket", "manifest", "other",
+)
+
+# Ad, tracking and analytics hosts (subdomains included). Pages render the same without them.
+AD_DOMAINS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "analytics.google.com",
+    "connect.facebook.net", "analytics.twitter.com", "ads-twitter.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "pubmatic.com", "rubiconproject.com", "scorecardresearch.com", "hotjar.com", "clarity.ms",
+    "mc.yandex.ru", "wcs.naver.net", "adcr.naver.com", "veta.naver.com", "display.ad.daum.net",
+    "adfit.kakao.com", "analytics.kakao.com", "acecounter.com", "logger.co.kr",
+)
+
+# Fixed delay of the `full` profile; adaptive waits are measured against it.
+LEGACY_DELAY = 2.0
+
+_SETTLE_JS = """js:() => {
+    let s = window.__vcrawlSettle;
+    if (!s) {
+        s = window.__vcrawlSettle = {start: performance.now(), last: performance.now(), waited: null};
+        new MutationObserver(() => { s.last = performance.now(); }).observe(
+            document.documentElement || document,
+            {subtree: true, childList: true, attributes: true, characterData: true}
+        );
+    }
+    const now = performance.now();
+    if (now - s.last >= %(quiet)d || now - s.start >= %(cap)d) {
+        s.waited = now - s.start;
+        return true;
+    }
+    return false;
+}"""
+
+_READ_SETTLE_JS = "() => window.__vcrawlSettle ? window.__vcrawlSettle.waited : null"
+
+
+class RenderProfile:
+    def __init__(
+        self,
+        name: str,
+        block_types: tuple[str, ...] = (),
+        block_domains: tuple[str, ...] = (),
+        quiet_ms: int = 0,
+        max_wait_ms: int = 0,
+        fixed_delay: float = 0.0,
+    ):
+        unknown = set(block_types) - set(RESOURCE_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown resource types {sorted(unknown)}; choose from {', '.join(RESOURCE_TYPES)}")
+        self.name = name
+        self.block_types = frozenset(block_types)
+        self.block_domains = tuple(d.lower().strip() for d in block_domains if d.strip())
+        self.quiet_ms = quiet_ms
+        self.max_wait_ms = max_wait_ms
+        self.fixed_delay = fixed_delay
+
+    @property
+    def adaptive(self) -> bool:
+        return self.max_wait_ms > 0
+
+    @property
+    def blocks(self) -> bool:
+        return bool(self.block_types or self.block_domains)
+
+    def run_config(self, **kwargs) -> CrawlerRunConfig:
+        """`CrawlerRunConfig` for this profile (extra kwargs are passed through)."""
+        settings = {
+            "wait_until": "domcontentloaded",
+            "page_timeout": 90000,
+            "delay_before_return_html": self.fixed_delay,
+            "shared_data": {"render_profile": self.name},
+        }
+        if self.adaptive:
+            settings["wait_for"] = _SETTLE_JS % {"quiet": self.quiet_ms, "cap": self.max_wait_ms}
+            # Safety net only; the condition itself returns at max_wait_ms.
+            settings["wait_for_timeout"] = self.max_wait_ms + 5000
+        return CrawlerRunConfig(**{**settings, **kwargs})
+
+    def block_reason(self, resource_type: str, url: str) -> str | None:
+        if resource_type in self.block_types:
+            return resource_type
+        if self.block_domains:
+            host = (urllib.parse.urlsplit(url).hostname or "").lower()
+            if any(host == domain or host.endswith("." + domain) for domain in self.block_domains):
+                return "ad_domain"
+        return None
+
+
+def build_profiles(
+    block_types: tuple[str, ...] | None = None,
+    extra_domains: tuple[str, ...] = (),
+    quiet_ms: int = 500,
+    max_wait_ms: int = 2000,
+) -> dict[str, RenderProfile]:
+    """The built-in profiles; `block_types` overrides what `balanced` blocks."""
+    domains = AD_DOMAINS + tuple(extra_domains)
+    balanced_types = tuple(block_types) if block_types is not None else ("image", "media", "font")
+    return {
+        "full": RenderProfile("full", fixed_delay=LEGACY_DELAY),
+        "balanced": RenderProfile("balanced", balanced_types, domains, quiet_ms, max_wait_ms),
+        "lean": RenderProfile(
+            "lean",
+            tuple(dict.fromkeys(balanced_types + ("stylesheet", "texttrack", "eventsource", "websocket", "manifest", "other"))),
+            domains,
+            max(100, quiet_ms * 3 // 5),
+            max(500, max_wait_ms * 3 // 4),
+        ),
+    }
+
+
+def render_hooks(profiles: dict[str, RenderProfile]) -> dict:
+    """crawl4ai hooks applying the profile named in `config.shared_data["render_profile"]`."""
+
+    def lookup(config) -> tuple[RenderProfile | None, dict | None]:
+        shared = getattr(config, "shared_data", None) or {}
+        return profiles.get(shared.get("render_profile")), shared.get("render")
+
+    async def on_page_context_created(page, context=None, config=None, **kwargs):
+        profile, render = lookup(config)
+        if profile is None or not profile.blocks:
+            return page
+        blocked = render.setdefault("blocked", {}) if render is not None else {}
+        main_frame = page.main_frame
+
+        async def handle(route):
+            request = route.request
+            try:
+                reason = None
+                # Never block the page itself, only what it pulls in.
+                if not (request.resource_type == "document" and request.frame == main_frame):
+                    reason = profile.block_reason(request.resource_type, request.url)
+                if reason:
+                    blocked[reason] = blocked.get(reason, 0) + 1
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.continue_()
+            except Exception:
+                pass  # page closed mid-request
+
+        await page.route("**/*", handle)
+        return page
+
+    async def before_retrieve_html(page, context=None, config=None, **kwargs):
+        profile, render = lookup(config)
+        if profile is None or render is None or not profile.adaptive:
+            return page
+        try:
+            waited = await page.evaluate(_READ_SETTLE_JS)
+        except Exception:
+            waited = None
+        if waited is not None:
+            render["settle_ms"] = round(waited, 1)
+            render["capped"] = waited >= profile.max_wait_ms
+        return page
+
+    return {
+        "on_page_context_created": on_page_context_created,
+        "before_retrieve_html": before_retrieve_html,
+    }
@@ -0,0 +1,223 @@
+"""
+robots.txt and sitemap.xml discovery for the link collector.
+
+`RobotsCache` fetches robots.txt once per host (plain HTTP, no browser),
+answers allow/deny checks and spaces requests by the host's Crawl-delay.
+
+`iter_sitemap_urls` walks sitemaps and nested sitemap indexes (plain or
+gzip) and yields page URLs in batches. Each file is parsed incrementally
+with iterparse, so a 50 MB sitemap never sits in memory as one document.
+"""
+import asyncio
+import gzip
+import io
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import urllib.robotparser
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator
+
+FETCH_TIMEOUT = 15
+# Sitemap protocol limit for one (uncompressed) file
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_ROBOTS_BYTES = 512 * 1024
+
+
+def _site_root(url: str) -> str:
+    parsed = urllib.parse.urlsplit(url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+class _CappedReader(io.RawIOBase):
+    """Stops reading after `limit` bytes so a huge file can't exhaust memory."""
+
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._left = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        if self._left <= 0:
+            return 0
+        data = self._raw.read(min(len(buf), self._left))
+        self._left -= len(data)
+        buf[:len(data)] = data
+        return len(data)
+
+
+def _open(url: str, user_agent: str, limit: int):
+    req = urllib.request.Request(url, headers={"User-Agent": user_agent, "Accept-Encoding": "gzip"})
+    resp = urllib.request.urlopen(req, timeout=FETCH_TIMEOUT)
+    stream = io.BufferedReader(_CappedReader(resp, limit))
+    # Either a .xml.gz file or Content-Encoding: gzip – detect by magic bytes.
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        stream = io.BufferedReader(_CappedReader(gzip.GzipFile(fileobj=stream), limit))
+    return resp, stream
+
+
+def _parse_crawl_delay(lines: list[str], user_agent: str) -> float:
+    """Crawl-delay for `user_agent` (falling back to `*`); robotparser only accepts integers."""
+    agent = user_agent.lower()
+    delays: dict[str, float] = {}
+    group: list[str] = []
+    in_agents = False
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (part.strip() for part in line.split(":", 1))
+        field = field.lower()
+        if field == "user-agent":
+            if not in_agents:
+                group = []
+            group.append(value.lower())
+            in_agents = True
+            continue
+        in_agents = False
+        if field == "crawl-delay":
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for name in group:
+                delays.setdefault(name, delay)
+    for name, delay in delays.items():
+        if name != "*" and name in agent:
+            return delay
+    return delays.get("*", 0.0)
+
+
+class RobotsRules:
+    def __init__(self, parser: urllib.robotparser.RobotFileParser | None, user_agent: str, crawl_delay: float = 0.0):
+        self._parser = parser
+        self.user_agent = user_agent
+        self.crawl_delay = crawl_delay
+
+    def allowed(self, url: str) -> bool:
+        return self._parser is None or self._parser.can_fetch(self.user_agent, url)
+
+    @property
+    def sitemaps(self) -> list[str]:
+        return list((self._parser and self._parser.site_maps()) or [])
+
+
+class RobotsCache:
+    def __init__(self, user_agent: str = "vcrawl", ttl: float = 3600.0, max_crawl_delay: float = 10.0):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.max_crawl_delay = max_crawl_delay
+        self._rules: dict[str, tuple[float, RobotsRules]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._next_fetch: dict[str, float] = {}
+        self.fetches = 0
+
+    def _fetch_sync(self, root: str) -> RobotsRules:
+        parser = urllib.robotparser.RobotFileParser(root + "/robots.txt")
+        try:
+            resp, stream = _open(root + "/robots.txt", self.user_agent, MAX_ROBOTS_BYTES)
+            with resp:
+                text = stream.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as e:
+            # 401/403 mean "disallow everything", any other error means no rules.
+            if e.code in (401, 403):
+                parser.disallow_all = True
+                return RobotsRules(parser, self.user_agent)
+            return RobotsRules(None, self.user_agent)
+        except Exception:
+            return RobotsRules(None, self.user_agent)
+        lines = text.splitlines()
+        parser.parse(lines)
+        return RobotsRules(parser, self.user_agent, _parse_crawl_delay(lines, self.user_agent))
+
+    async def get(self, url: str) -> RobotsRules:
+        root = _site_root(url)
+        cached = self._rules.get(root)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        lock = self._locks.setdefault(root, asyncio.Lock())
+        async with lock:
+            cached = self._rules.get(root)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            rules = await asyncio.to_thread(self._fetch_sync, root)
+            self.fetches += 1
+            self._rules[root] = (time.monotonic(), rules)
+            return rules
+
+    async def wait(self, url: str):
+        """Sleep until the host's Crawl-delay since the previous fetch has passed."""
+        rules = await self.get(url)
+        delay = min(rules.crawl_delay, self.max_crawl_delay)
+        if delay <= 0:
+            return
+        root = _site_root(url)
+        now = time.monotonic()
+        # Reserve the next slot before sleeping so concurrent callers queue up.
+        start = max(now, self._next_fetch.get(root, 0.0))
+        self._next_fetch[root] = start + delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def stats(self) -> dict:
+        return {"hosts": len(self._rules), "fetches": self.fetches}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _read_sitemap_sync(url: str, user_agent: str, max_urls: int) -> tuple[list[str], list[str]]:
+    """Return (page URLs, child sitemap URLs) from one sitemap or sitemap index."""
+    pages: list[str] = []
+    children: list[str] = []
+    resp, stream = _open(url, user_agent, MAX_SITEMAP_BYTES)
+    with resp:
+        root = None
+        is_index = False
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    is_index = _local(elem.tag) == "sitemapindex"
+                continue
+            name = _local(elem.tag)
+            if name == "loc" and elem.text:
+                loc = urllib.parse.urljoin(url, elem.text.strip())
+                (children if is_index else pages).append(loc)
+                if len(pages) >= max_urls:
+                    break
+            elif name in ("url", "sitemap"):
+                # Drop finished entries so memory stays flat.
+                root.clear()
+    return pages, children
+
+
+async def iter_sitemap_urls(
+    sitemap_urls: list[str],
+    user_agent: str = "vcrawl",
+    max_urls: int = 50_000,
+    max_sitemaps: int = 100,
+) -> AsyncIterator[tuple[str, list[str], str]]:
+    """Yield (sitemap URL, page URLs, error) per sitemap file, following nested indexes."""
+    queue = list(dict.fromkeys(sitemap_urls))
+    seen = set(queue)
+    read = 0
+    remaining = max_urls
+    while queue and read < max_sitemaps and remaining > 0:
+        sitemap = queue.pop(0)
+        read += 1
+        try:
+            pages, children = await asyncio.to_thread(_read_sitemap_sync, sitemap, user_agent, remaining)
+        except Exception as e:
+            yield sitemap, [], str(e) or type(e).__name__
+            continue
+        for child in children:
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+        remaining -= len(pages)
+        yield sitemap, pages, ""
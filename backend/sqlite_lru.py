@@ -0,0 +1,102 @@
+"""
+Size-bounded SQLite key/value table with LRU eviction, shared by the page and LLM caches.
+
+The table must have `key TEXT PRIMARY KEY`, `size INTEGER` and an indexed
+`accessed_at REAL` column; the caller's schema adds whatever else it stores.
+The total of `size` is read once when the database is opened and then kept
+as a running total, so writes do not scan the table. When it goes over
+`max_bytes`, least recently accessed rows are deleted down to 90% of the
+budget.
+
+All methods are synchronous and thread-safe; the caches call them through
+`asyncio.to_thread`.
+"""
+import pathlib
+import sqlite3
+import threading
+import time
+
+
+class SqliteLRUStore:
+    def __init__(self, path: pathlib.Path, table: str, schema: str, max_bytes: int):
+        self.path = pathlib.Path(path)
+        self.table = table
+        self.schema = schema
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._total = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(self.schema)
+            self._total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        return self._conn
+
+    def get(self, key: str, columns: str) -> tuple | None:
+        """`columns` of the row for `key` (and mark it used), or None."""
+        with self._lock:
+            db = self._db()
+            row = db.execute(f"SELECT {columns} FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+        return row
+
+    def update(self, key: str, **values):
+        with self._lock:
+            db = self._db()
+            assignments = ", ".join(f"{column} = ?" for column in values)
+            db.execute(f"UPDATE {self.table} SET {assignments} WHERE key = ?", (*values.values(), key))
+            db.commit()
+
+    def put(self, key: str, **values):
+        """Insert or replace the row for `key`; `values` must include `size` and `accessed_at`."""
+        columns = ", ".join(("key", *values))
+        placeholders = ", ".join("?" * (len(values) + 1))
+        with self._lock:
+            db = self._db()
+            old = db.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            db.execute(f"INSERT OR REPLACE INTO {self.table} ({columns}) VALUES ({placeholders})", (key, *values.values()))
+            self._total += values["size"] - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict(db, keep=key)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, keep: str):
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for old_key, size in db.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"):
+            if self._total <= target:
+                break
+            if old_key == keep:
+                continue
+            victims.append((old_key,))
+            self._total -= size
+        db.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def delete(self, key: str):
+        with self._lock:
+            db = self._db()
+            row = db.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                db.commit()
+                self._total -= row[0]
+
+    def counts(self) -> tuple[int, int]:
+        """(entries, bytes)"""
+        with self._lock:
+            entries = self._db().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            return entries, self._total
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
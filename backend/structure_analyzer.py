@@ -0,0 +1,275 @@
+"""
+Single-pass page structure analyzer.
+
+Walks the parsed tree once (post-order) to compute every tag's stripped
+text length bottom-up, and in the same walk records the first
+header/nav/main/article/footer tags, the id keyword candidates for each
+region and the ad matches. Scoring then works on the precomputed lengths,
+so the cost is linear in the size of the document instead of one full-tree
+scan (plus a subtree `get_text`) per keyword.
+
+The selection rules mirror the original `find_element_by_heuristics`
+implementation so the output is unchanged:
+
+* a region's semantic tags win first (first occurrence in document order);
+* otherwise the id-keyword candidate with the highest text length
+  (x1.2 for div/section/article) wins, earlier keywords first on ties;
+* main content falls back to the div with the most text.
+
+Class keywords are matched only with `match_classes=True`. The original
+`find_all(attrs={"class": lambda ...})` call received individual class
+strings from BeautifulSoup and therefore never matched, so enabling it
+changes results.
+
+Parser backends (`PARSERS`): BeautifulSoup with `html.parser` (reference)
+or `lxml`, and selectolax's C-based lexbor parser. `bench/parsers.py`
+checks them against a golden corpus and times them.
+"""
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+# Tags whose text BeautifulSoup stores as Script/Stylesheet/TemplateString/...
+# and therefore leaves out of get_text(); mirrored for the lexbor walk.
+_STRING_CONTAINER_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+
+# (semantic tags, id/class keywords) per region, in priority order.
+REGIONS = {
+    "header": (("header",), ("header", "top", "gnb", "head")),
+    "navigation": (("nav",), ("nav", "menu", "lnb")),
+    "main_content": (("main", "article"), ("content", "main", "body", "center", "container", "wrapper")),
+    "footer": (("footer",), ("footer", "bottom", "info", "copyright")),
+}
+
+# Equivalent of the soupsieve ad selectors, in the original selector order:
+# 'iframe[src*="ads"]', 'div[id*="ad-"]', 'div[class*="ad-"]', 'div[id*="banner"]',
+# 'div[class*="banner"]', 'ins.adsbygoogle', '[class*="promotion"]', '[id*="promotion"]'
+AD_RULES = (
+    ("iframe", "src", "ads"),
+    ("div", "id", "ad-"),
+    ("div", "class", "ad-"),
+    ("div", "id", "banner"),
+    ("div", "class", "banner"),
+    ("ins", "class-token", "adsbygoogle"),
+    (None, "class", "promotion"),
+    (None, "id", "promotion"),
+)
+MAX_ADS = 5
+
+_SCORE_BOOST_TAGS = ("div", "section", "article")
+_TEXT_TYPES = Tag.MAIN_CONTENT_STRING_TYPES
+
+
+def _attr_str(attrs: dict, name: str) -> str | None:
+    value = attrs.get(name)
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return " ".join(value)
+    return value
+
+
+def _class_list(attrs: dict) -> list[str]:
+    classes = attrs.get("class") or ()
+    return classes.split() if isinstance(classes, str) else list(classes)
+
+
+def _ad_match(name: str, attrs: dict, rule) -> bool:
+    tag_name, attr, needle = rule
+    if tag_name is not None and name != tag_name:
+        return False
+    if attr == "class-token":
+        return needle in _class_list(attrs)
+    value = _attr_str(attrs, attr)
+    return value is not None and needle in value
+
+
+def outer_html(element) -> str:
+    """Serialize a BeautifulSoup Tag or selectolax node (outer HTML)."""
+    if isinstance(element, Tag):
+        return str(element)
+    return element.html or ""
+
+
+class StructureScan:
+    """Result of one pass over the tree.
+
+    Keeps a reference to the parsed tree so returned elements stay valid.
+    Text lengths and names are keyed by `_key(element)` because selectolax
+    creates a fresh Python wrapper on every node access.
+    """
+
+    def __init__(self, tree, match_classes: bool = False):
+        self.tree = tree
+        self.match_classes = match_classes
+        self.text_len: dict[int, int] = {}
+        self.names: dict[int, str] = {}
+        self.first_tag: dict[str, object] = {}
+        # region -> keyword -> [elements in document order]
+        self.id_hits: dict[str, dict[str, list]] = {r: {k: [] for k in kws} for r, (_, kws) in REGIONS.items()}
+        self.class_hits: dict[str, dict[str, list]] = {r: {k: [] for k in kws} for r, (_, kws) in REGIONS.items()}
+        self.divs: list = []
+        self.ads: list[list] = [[] for _ in AD_RULES]
+
+    @staticmethod
+    def _key(element) -> int:
+        return id(element) if isinstance(element, Tag) else element.mem_id
+
+    def length(self, element) -> int:
+        return self.text_len[self._key(element)]
+
+    def name(self, element) -> str:
+        return self.names[self._key(element)]
+
+    def visit(self, element, name: str, attrs: dict):
+        """Pre-order bookkeeping for one element (document order)."""
+        self.names[self._key(element)] = name
+        if name in _WANTED_TAGS and name not in self.first_tag:
+            self.first_tag[name] = element
+        if name == "div":
+            self.divs.append(element)
+
+        tag_id = attrs.get("id")
+        if isinstance(tag_id, str) and tag_id:
+            lowered = tag_id.lower()
+            for region, kw in _KEYWORD_INDEX:
+                if kw in lowered:
+                    self.id_hits[region][kw].append(element)
+        if self.match_classes:
+            lowered_classes = [c.lower() for c in _class_list(attrs)]
+            if lowered_classes:
+                for region, kw in _KEYWORD_INDEX:
+                    if any(kw in c for c in lowered_classes):
+                        self.class_hits[region][kw].append(element)
+
+        for i, rule in enumerate(AD_RULES):
+            if len(self.ads[i]) < MAX_ADS and _ad_match(name, attrs, rule):
+                self.ads[i].append(element)
+
+
+_WANTED_TAGS = frozenset(t for tags, _ in REGIONS.values() for t in tags)
+_KEYWORD_INDEX = [(region, kw) for region, (_, kws) in REGIONS.items() for kw in kws]
+
+
+def _scan_soup(soup: BeautifulSoup, result: StructureScan):
+    # Iterative post-order walk: [tag, child iterator, accumulated text length]
+    stack = [[soup, iter(soup.contents), 0]]
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], None)
+        if child is None:
+            stack.pop()
+            tag, _, total = frame
+            if tag.interesting_string_types != _TEXT_TYPES:
+                # script/style/template/etc. count their own string types
+                total = len(tag.get_text(strip=True))
+            result.text_len[id(tag)] = total
+            if stack:
+                stack[-1][2] += frame[2]
+            continue
+        if isinstance(child, Tag):
+            result.visit(child, child.name, child.attrs)
+            stack.append([child, iter(child.contents), 0])
+        elif isinstance(child, NavigableString) and type(child) in _TEXT_TYPES:
+            frame[2] += len(child.strip())
+
+
+def _scan_lexbor(tree, result: StructureScan):
+    root = tree.root
+    if root is None:
+        return
+    # Same post-order walk over lexbor's first-child / next-sibling links:
+    # [node, next child to visit, accumulated text length, inside a string container]
+    result.visit(root, root.tag, root.attributes)
+    stack = [[root, root.child, 0, root.tag in _STRING_CONTAINER_TAGS]]
+    while stack:
+        frame = stack[-1]
+        node, child, _, hidden = frame
+        if child is None:
+            stack.pop()
+            total = frame[2]
+            if node.tag in _STRING_CONTAINER_TAGS:
+                total = len((node.text(deep=True) or "").strip())
+            result.text_len[node.mem_id] = total
+            if stack:
+                stack[-1][2] += frame[2]
+            continue
+        frame[1] = child.next
+        tag = child.tag
+        if tag == "-text":
+            if not hidden:
+                frame[2] += len((child.text_content or "").strip())
+        elif not tag.startswith(("-", "_", "!")):
+            result.visit(child, tag, child.attributes)
+            stack.append([child, child.child, 0, hidden or tag in _STRING_CONTAINER_TAGS])
+
+
+def scan(soup: BeautifulSoup, match_classes: bool = False) -> StructureScan:
+    """Scan an already parsed BeautifulSoup tree."""
+    result = StructureScan(soup, match_classes)
+    _scan_soup(soup, result)
+    return result
+
+
+def parse_and_scan(html: str, parser: str = "html.parser", match_classes: bool = False) -> StructureScan:
+    """Parse `html` with the chosen backend and scan it in one pass."""
+    if parser == "selectolax":
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError:
+            raise RuntimeError("HTML parser 'selectolax' requires the selectolax package (pip install selectolax)")
+        tree = LexborHTMLParser(html)
+        result = StructureScan(tree, match_classes)
+        _scan_lexbor(tree, result)
+        return result
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown HTML parser '{parser}'. Choose one of: {', '.join(PARSERS)}")
+    return scan(BeautifulSoup(html, parser), match_classes)
+
+
+def _best_candidate(result: StructureScan, candidates):
+    best, max_score = None, 0
+    for element in candidates:
+        text_len = result.length(element)
+        if text_len == 0:
+            continue
+        score = text_len * 1.2 if result.name(element) in _SCORE_BOOST_TAGS else text_len
+        if score > max_score:
+            max_score = score
+            best = element
+    return best
+
+
+def find_region(result: StructureScan, region: str):
+    tags, keywords = REGIONS[region]
+    for name in tags:
+        if name in result.first_tag:
+            return result.first_tag[name]
+
+    def candidates():
+        for kw in keywords:
+            yield from result.id_hits[region][kw]
+            yield from result.class_hits[region][kw]
+
+    return _best_candidate(result, candidates())
+
+
+def find_main_fallback(result: StructureScan):
+    """The div with the most text (first one wins on ties)."""
+    best, max_len = None, 0
+    for div in result.divs:
+        text_len = result.length(div)
+        if text_len > max_len:
+            max_len = text_len
+            best = div
+    return best
+
+
+def collect_ads(result: StructureScan) -> list:
+    found = []
+    for matches in result.ads:
+        for tag in matches:
+            found.append(tag)
+            if len(found) >= MAX_ADS:
+                return found
+    return found
@@ -0,0 +1,171 @@
+"""
+URL canonicalization and a memory-bounded visited set for the link collector.
+
+`Canonicalizer` turns the many spellings of one page (`/page`, `/page/`,
+`/page#top`, `/page?utm_source=x`, reordered query params, `;jsessionid=...`)
+into a single key used for dedup and frontier checks.
+
+`VisitedSet` keeps exact keys up to a limit and then switches to a Bloom
+filter, so very large crawls use a fixed amount of memory at the cost of
+a small, configurable false-positive rate (a page may be skipped, never
+crawled twice).
+"""
+import fnmatch
+import hashlib
+import math
+import re
+import urllib.parse
+
+# Tracking / session parameters stripped by default (glob patterns, case-insensitive).
+DEFAULT_STRIP_PARAMS = (
+    "utm_*",
+    "gclid",
+    "fbclid",
+    "msclkid",
+    "yclid",
+    "_ga",
+    "_gl",
+    "mc_cid",
+    "mc_eid",
+    "jsessionid",
+    "phpsessid",
+    "aspsessionid*",
+    "sessionid",
+    # Not "sid": Korean board sites use it as a content / board id. Add it via VCRAWL_STRIP_PARAMS if needed.
+)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_PATH_PARAM_RE = re.compile(r";[^/]*")
+
+
+class Canonicalizer:
+    def __init__(
+        self,
+        strip_params: tuple[str, ...] | list[str] = DEFAULT_STRIP_PARAMS,
+        drop_fragment: bool = True,
+        sort_query: bool = True,
+        strip_default_port: bool = True,
+        strip_trailing_slash: bool = True,
+    ):
+        self.drop_fragment = drop_fragment
+        self.sort_query = sort_query
+        self.strip_default_port = strip_default_port
+        self.strip_trailing_slash = strip_trailing_slash
+        patterns = [fnmatch.translate(p.lower()) for p in strip_params if p]
+        self._strip_re = re.compile("|".join(patterns)) if patterns else None
+
+    def _strip(self, name: str) -> bool:
+        return bool(self._strip_re and self._strip_re.match(name.lower()))
+
+    def host(self, url: str) -> str:
+        """Canonical `host[:port]` of a URL (for same-site checks)."""
+        parsed = urllib.parse.urlsplit(url)
+        return self._netloc(parsed.scheme.lower(), parsed)
+
+    def _netloc(self, scheme: str, parsed: urllib.parse.SplitResult) -> str:
+        host = parsed.hostname or ""  # always lower-case
+        try:
+            port = parsed.port
+        except ValueError:
+            port = None
+        if port is not None and not (self.strip_default_port and _DEFAULT_PORTS.get(scheme) == port):
+            host = f"{host}:{port}"
+        if parsed.username:
+            userinfo = parsed.username + (f":{parsed.password}" if parsed.password else "")
+            host = f"{userinfo}@{host}"
+        return host
+
+    def canonicalize(self, url: str, base: str = "") -> str:
+        url = url.strip()
+        if base:
+            url = urllib.parse.urljoin(base, url)
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ("http", "https"):
+            return url
+
+        netloc = self._netloc(scheme, parsed)
+
+        # Session ids in path params (e.g. /list.do;jsessionid=ABC)
+        path = _PATH_PARAM_RE.sub(lambda m: "" if self._strip(m.group(0)[1:].split("=", 1)[0]) else m.group(0), parsed.path)
+        if not path:
+            path = "/"
+        elif self.strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+
+        query_pairs = [
+            (k, v) for k, v in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+            if not self._strip(k)
+        ]
+        if self.sort_query:
+            query_pairs.sort()
+        query = urllib.parse.urlencode(query_pairs, doseq=True)
+
+        fragment = "" if self.drop_fragment else parsed.fragment
+        return urllib.parse.urlunsplit((scheme, netloc, path, query, fragment))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for idx in self._indexes(key):
+            self._bits[idx >> 3] |= 1 << (idx & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[idx >> 3] & (1 << (idx & 7)) for idx in self._indexes(key))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class VisitedSet:
+    """Exact set up to `exact_limit` keys, then a Bloom filter sized for `capacity`."""
+
+    def __init__(self, exact_limit: int = 100_000, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.exact_limit = exact_limit
+        self.capacity = max(capacity, exact_limit)
+        self.error_rate = error_rate
+        self._exact: set[str] | None = set()
+        self._bloom: BloomFilter | None = None
+        self._count = 0
+
+    def add(self, key: str) -> bool:
+        """Add `key`; return False if it was (probably) already present."""
+        if key in self:
+            return False
+        if self._exact is not None:
+            self._exact.add(key)
+            if len(self._exact) > self.exact_limit:
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+                for k in self._exact:
+                    self._bloom.add(k)
+                self._exact = None
+        else:
+            self._bloom.add(key)
+        self._count += 1
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        if self._exact is not None:
+            return key in self._exact
+        return key in self._bloom
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def is_exact(self) -> bool:
+        return self._exact is not None
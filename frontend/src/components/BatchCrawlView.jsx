@@ -1,6 +1,9 @@
 import React, { useState, useRef, useEffect } from 'react';
 import '../index.css';
 
+// Running job, so a reloaded tab can re-attach to it
+const JOB_STORAGE_KEY = 'vcrawl.batchCrawlJob';
+
 const STATUS_ICON = {
     pending: '⏳',
     crawling: '🔄',
@@ -60,6 +63,7 @@ const BatchCrawlView = ({ initialLinks = [], onClearBatchLinks }) => {
     const [progress, setProgress] = useState({ current: 0, total: 0 });
     const [resultFolder, setResultFolder] = useState('');
     const [isDragOver, setIsDragOver] = useState(false);
+    const [jobId, setJobId] = useState(null);
 
     const logEndRef = useRef(null);
     const fileInputRef = useRef(null);
@@ -73,6 +77,33 @@ const BatchCrawlView = ({ initialLinks = [], onClearBatchLinks }) => {
         // eslint-disable-next-line react-hooks/exhaustive-deps
     }, [initialLinks]);
 
+    // Re-attach to a job that was still running when the tab was closed
+    useEffect(() => {
+        const saved = JSON.parse(localStorage.getItem(JOB_STORAGE_KEY) || 'null');
+        if (!saved?.job_id) return;
+        (async () => {
+            try {
+                const res = await fetch(`/api/v1/jobs/${saved.job_id}`);
+                const job = res.ok ? await res.json() : null;
+                if (!job || !['queued', 'running'].includes(job.status)) {
+                    localStorage.removeItem(JOB_STORAGE_KEY);
+                    return;
+                }
+                setLinks(saved.links || []);
+                resetState();
+                setJobId(saved.job_id);
+                setIsRunning(true);
+                setProgress({ current: 0, total: (saved.links || []).length });
+                // Replay from the first event to rebuild the table and log.
+                await readJobStream(await fetch(`/api/v1/jobs/${saved.job_id}/events?offset=0`), saved.links || []);
+            } catch (err) {
+                setLogs(prev => [...prev, `❗ 네트워크 오류: ${err.message}`]);
+                setIsRunning(false);
+            }
+        })();
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, []);
+
     // Auto-scroll log panel
     useEffect(() => {
         logEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -141,68 +172,93 @@ const BatchCrawlView = ({ initialLinks = [], onClearBatchLinks }) => {
                     output_folder_name: folderName.trim(),
                 }),
             });
+            await readJobStream(response, links);
+        } catch (err) {
+            setLogs(prev => [...prev, `❗ 네트워크 오류: ${err.message}`]);
+            setIsRunning(false);
+        }
+    }
 
-            if (!response.ok || !response.body) {
-                throw new Error(`Server error: ${response.status}`);
-            }
+    // ── Job event stream (live or replayed) ──
+    async function readJobStream(response, jobLinks) {
+        if (!response.ok || !response.body) {
+            throw new Error(`Server error: ${response.status}`);
+        }
 
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = '';
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                buffer += decoder.decode(value, { stream: true });
-                const chunks = buffer.split('\n\n');
-                buffer = chunks.pop();
-
-                for (const chunk of chunks) {
-                    const dataLine = chunk.split('\n').find(l => l.startsWith('data: '));
-                    if (!dataLine) continue;
-                    try {
-                        const event = JSON.parse(dataLine.slice(6));
-
-                        if (event.type === 'log') {
-                            setLogs(prev => [...prev, event.message]);
-                        } else if (event.type === 'progress') {
-                            setProgress({ current: event.current, total: event.total });
-                            setLinkStatus(prev => ({
-                                ...prev,
-                                [event.url]: {
-                                    status: event.status,
-                                    filename: event.filename,
-                                    error: event.error,
-                                },
-                            }));
-                            const statusMsg = event.status === 'done'
-                                ? `✅ [${event.current}/${event.total}] ${event.filename}`
-                                : event.status === 'crawling'
-                                    ? `🔄 [${event.current}/${event.total}] 크롤링 중: ${event.url}`
-                                    : `❌ [${event.current}/${event.total}] 실패: ${event.url} — ${event.error || ''}`;
-                            setLogs(prev => [...prev, statusMsg]);
-                        } else if (event.type === 'complete') {
-                            setResultFolder(event.folder_path);
-                            setIsDone(true);
-                            setIsRunning(false);
-                            setLogs(prev => [
-                                ...prev,
-                                `🏁 완료! ✅ ${event.total_success}개 성공, ❌ ${event.total_failed}개 실패`,
-                                `📁 저장 폴더: ${event.folder_path}`,
-                            ]);
-                        } else if (event.type === 'error') {
-                            setLogs(prev => [...prev, `❗ 오류: ${event.message}`]);
-                            setIsRunning(false);
-                        }
-                    } catch {
-                        // skip malformed chunks
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const chunks = buffer.split('\n\n');
+            buffer = chunks.pop();
+
+            for (const chunk of chunks) {
+                const dataLine = chunk.split('\n').find(l => l.startsWith('data: '));
+                if (!dataLine) continue;
+                try {
+                    const event = JSON.parse(dataLine.slice(6));
+
+                    if (event.type === 'job') {
+                        setJobId(event.job_id);
+                        localStorage.setItem(JOB_STORAGE_KEY, JSON.stringify({
+                            job_id: event.job_id,
+                            links: jobLinks.map(l => ({ href: l.href, text: l.text })),
+                        }));
+                    } else if (event.type === 'queued') {
+                        setLogs(prev => [...prev, `⏳ 대기 중: ${event.position}번째 (동시 실행 최대 ${event.max_running}개)`]);
+                    } else if (event.type === 'log') {
+                        setLogs(prev => [...prev, event.message]);
+                    } else if (event.type === 'progress') {
+                        // Pages complete out of order; `completed` counts finished pages.
+                        setProgress({ current: event.completed ?? event.current, total: event.total });
+                        setLinkStatus(prev => ({
+                            ...prev,
+                            [event.url]: {
+                                status: event.status,
+                                filename: event.filename,
+                                error: event.error,
+                            },
+                        }));
+                        const statusMsg = event.status === 'done'
+                            ? `✅ [${event.current}/${event.total}] ${event.filename}`
+                            : event.status === 'crawling'
+                                ? `🔄 [${event.current}/${event.total}] 크롤링 중: ${event.url}`
+                                : `❌ [${event.current}/${event.total}] 실패: ${event.url} — ${event.error || ''}`;
+                        setLogs(prev => [...prev, statusMsg]);
+                    } else if (event.type === 'complete') {
+                        localStorage.removeItem(JOB_STORAGE_KEY);
+                        setResultFolder(event.folder_path);
+                        setIsDone(true);
+                        setIsRunning(false);
+                        setLogs(prev => [
+                            ...prev,
+                            `🏁 완료! ✅ ${event.total_success}개 성공, ❌ ${event.total_failed}개 실패`,
+                            `📁 저장 폴더: ${event.folder_path}`,
+                        ]);
+                    } else if (event.type === 'error' || event.type === 'cancelled') {
+                        localStorage.removeItem(JOB_STORAGE_KEY);
+                        setLogs(prev => [...prev, event.type === 'cancelled' ? '⏹️ 작업이 취소되었습니다.' : `❗ 오류: ${event.message}`]);
+                        setIsRunning(false);
                     }
+                } catch {
+                    // skip malformed chunks
                 }
             }
+        }
+    }
+
+    // ── Cancel the running job (stops in-flight pages on the server) ──
+    async function handleCancel() {
+        if (!jobId) return;
+        try {
+            await fetch(`/api/v1/jobs/${jobId}/cancel`, { method: 'POST' });
         } catch (err) {
-            setLogs(prev => [...prev, `❗ 네트워크 오류: ${err.message}`]);
-            setIsRunning(false);
+            setLogs(prev => [...prev, `❗ 취소 실패: ${err.message}`]);
         }
     }
 
@@ -334,7 +390,14 @@ const BatchCrawlView = ({ initialLinks = [], onClearBatchLinks }) => {
                     <section className="batch-section">
                         <div className="batch-progress-header">
                             <span>{isRunning ? '크롤링 진행 중…' : '완료'}</span>
-                            <span>{progress.current} / {progress.total} ({progressPct}%)</span>
+                            <span>
+                                {progress.current} / {progress.total} ({progressPct}%)
+                                {isRunning && jobId && (
+                                    <button className="batch-clear-btn" onClick={handleCancel} style={{ marginLeft: '0.75rem' }}>
+                                        취소
+                                    </button>
+                                )}
+                            </span>
                         </div>
                         <div className="batch-progress-bar-track">
                             <div
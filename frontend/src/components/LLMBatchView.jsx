@@ -66,6 +66,7 @@ const LLMBatchView = () => {
 
     // Step 2: Submit
     const [jsonlFolderPath, setJsonlFolderPath] = useState('');
+    const [autoDownload, setAutoDownload] = useState(false);
 
     // Step 3: Status
     const [activeBatches, setActiveBatches] = useState([]); // Array of { batch_id, status, ... }
@@ -86,17 +87,54 @@ const LLMBatchView = () => {
         }
     }, [convertedJsonlPath]);
 
-    // Polling interval for status
+    // Live status: the backend tracks submitted batches and pushes changes over SSE
+    const batchIdsKey = activeBatches.map(b => b.batch_id).join(',');
+    // Stay subscribed until every batch is finished and every auto-download has reported back
+    const hasPending = activeBatches.some(b =>
+        !['completed', 'failed', 'cancelled', 'expired'].includes(b.status) || (b.auto_download && !b.download)
+    );
     useEffect(() => {
-        let interval;
-        if (activeBatches.length > 0) {
-            const hasPending = activeBatches.some(b => !['completed', 'failed', 'cancelled', 'expired'].includes(b.status));
-            if (hasPending) {
-                interval = setInterval(fetchBatchStatus, 5000);
+        if (!batchIdsKey || !hasPending) return;
+        const controller = new AbortController();
+        const mergeBatches = (updates) => {
+            const byId = new Map(updates.filter(u => u.status).map(u => [u.batch_id, u]));
+            setActiveBatches(prev => prev.map(b => byId.has(b.batch_id) ? { ...b, ...byId.get(b.batch_id) } : b));
+        };
+
+        (async () => {
+            try {
+                const res = await fetch('/api/v1/llm-batch/events', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ batch_ids: batchIdsKey.split(',') }),
+                    signal: controller.signal
+                });
+                const reader = res.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const chunks = buffer.split('\n\n');
+                    buffer = chunks.pop();
+                    for (const chunk of chunks) {
+                        const dataLine = chunk.split('\n').find(l => l.startsWith('data: '));
+                        if (!dataLine) continue;
+                        const event = JSON.parse(dataLine.slice(6));
+                        if (event.type === 'snapshot') {
+                            mergeBatches(event.batches);
+                        } else if (event.type === 'status' || event.type === 'downloaded') {
+                            mergeBatches([event]);
+                        }
+                    }
+                }
+            } catch (err) {
+                if (err.name !== 'AbortError') console.error("Batch status stream failed", err);
             }
-        }
-        return () => clearInterval(interval);
-    }, [activeBatches]);
+        })();
+        return () => controller.abort();
+    }, [batchIdsKey, hasPending]);
 
     const handleConvert = async () => {
         if (!mdFolderPath.trim()) {
@@ -114,16 +152,38 @@ const LLMBatchView = () => {
                 body: JSON.stringify({
                     folder_path: mdFolderPath,
                     instruction,
-                    model: llmModel
+                    model: llmModel,
+                    stream: true
                 })
             });
-            const data = await res.json();
-            if (data.success) {
-                setConvertedJsonlPath(data.output_folder);
-                setSuccessMessage(`Successfully converted ${data.file_count} files to JSONL.\nSaved to: ${data.output_folder}`);
-                setStep(2);
-            } else {
-                setError(data.error_message || 'Conversion failed.');
+            if (!res.ok || !res.body) {
+                throw new Error(`Server error: ${res.status}`);
+            }
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const chunks = buffer.split('\n\n');
+                buffer = chunks.pop();
+                for (const chunk of chunks) {
+                    const dataLine = chunk.split('\n').find(l => l.startsWith('data: '));
+                    if (!dataLine) continue;
+                    const event = JSON.parse(dataLine.slice(6));
+                    if (event.type === 'progress') {
+                        setSuccessMessage(`Converting… ${event.processed} / ${event.total} files (${event.shards} JSONL file(s))`);
+                    } else if (event.type === 'done') {
+                        setConvertedJsonlPath(event.output_folder);
+                        setSuccessMessage(`Successfully converted ${event.file_count} files into ${event.batch_files_created} JSONL file(s) (~${event.est_tokens.toLocaleString()} tokens).\nSaved to: ${event.output_folder}`);
+                        setStep(2);
+                    } else if (event.type === 'error') {
+                        setSuccessMessage(null);
+                        setError(event.message || 'Conversion failed.');
+                    }
+                }
             }
         } catch (err) {
             setError(err.message);
@@ -132,6 +192,9 @@ const LLMBatchView = () => {
         }
     };
 
+    // Derive results folder path from the jsonl folder path
+    const resultsPathFor = (jsonlPath) => jsonlPath ? jsonlPath.replace(/_jsonl[\\\/]?$/, '') + '_results' : '';
+
     const handleSubmit = async () => {
         if (!jsonlFolderPath.trim()) {
             setError('Please enter the path to the JSONL folder.');
@@ -146,13 +209,18 @@ const LLMBatchView = () => {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
-                    jsonl_folder_path: jsonlFolderPath
+                    jsonl_folder_path: jsonlFolderPath,
+                    auto_download: autoDownload,
+                    output_folder_path: autoDownload ? resultsPathFor(jsonlFolderPath) : ''
                 })
             });
             const data = await res.json();
             if (data.success) {
                 setActiveBatches(data.batches);
-                setSuccessMessage(`Successfully created ${data.batches.length} batch job(s).`);
+                const failed = data.failed || [];
+                setSuccessMessage(`Successfully created ${data.batches.length} batch job(s).` + (failed.length
+                    ? `\n⚠️ ${failed.length} file(s) failed — resubmit them separately: ` + failed.map(f => `${f.filename} (${f.error})`).join(', ')
+                    : ''));
                 setStep(3);
             } else {
                 setError(data.error_message || 'Submit failed.');
@@ -194,11 +262,7 @@ const LLMBatchView = () => {
         setError(null);
         setSuccessMessage(null);
 
-        // Derive results folder path from the jsonl folder path
-        let outPath = '';
-        if (jsonlFolderPath) {
-            outPath = jsonlFolderPath.replace(/_jsonl[\\\/]?$/, '') + '_results';
-        }
+        const outPath = resultsPathFor(jsonlFolderPath);
 
         try {
             const res = await fetch('/api/v1/llm-batch/results', {
@@ -212,7 +276,7 @@ const LLMBatchView = () => {
             const data = await res.json();
             if (data.success) {
                 setResultsFolderPath(data.output_folder);
-                setSuccessMessage(`Results downloaded! Total files: ${data.total_files}. Rejected files: ${data.rejected_count}.\nSaved to: ${data.output_folder}`);
+                setSuccessMessage(`Results downloaded! Total files: ${data.total_files}. Rejected files: ${data.rejected_count}.${data.failed_count ? ` Failed requests: ${data.failed_count} (see _failures.ndjson).` : ''}\nSaved to: ${data.output_folder}`);
                 setStep(4);
             } else {
                 setError(data.error_message || 'Failed to download results.');
@@ -304,7 +368,7 @@ const LLMBatchView = () => {
             const data = await res.json();
             if (data.success) {
                 setResultsFolderPath(data.output_folder);
-                setSuccessMessage(`Recovery Download Successful! Total files: ${data.total_files}. Rejected files: ${data.rejected_count}.\nSaved to: ${data.output_folder}`);
+                setSuccessMessage(`Recovery Download Successful! Total files: ${data.total_files}. Rejected files: ${data.rejected_count}.${data.failed_count ? ` Failed requests: ${data.failed_count} (see _failures.ndjson).` : ''}\nSaved to: ${data.output_folder}`);
             } else {
                 setError(data.error_message || 'Failed to download recovered results.');
             }
@@ -405,6 +469,17 @@ const LLMBatchView = () => {
                                 disabled={isLoading}
                             />
                         </div>
+                        <div className="form-group">
+                            <label>
+                                <input
+                                    type="checkbox"
+                                    checked={autoDownload}
+                                    onChange={e => setAutoDownload(e.target.checked)}
+                                    disabled={isLoading}
+                                />{' '}
+                                Download results automatically when each batch completes
+                            </label>
+                        </div>
 
                         <div className="action-row">
                             <button className="primary-btn" onClick={handleSubmit} disabled={isLoading}>
@@ -436,6 +511,7 @@ const LLMBatchView = () => {
                                             <th>Completed</th>
                                             <th>Failed</th>
                                             <th>Total</th>
+                                            <th>Results</th>
                                         </tr>
                                     </thead>
                                     <tbody>
@@ -446,6 +522,7 @@ const LLMBatchView = () => {
                                                 <td>{b.completed}</td>
                                                 <td>{b.failed}</td>
                                                 <td>{b.total}</td>
+                                                <td>{b.download ? (b.download.error ? `⚠️ ${b.download.error}` : `✅ ${b.download.files} file(s)`) : '-'}</td>
                                             </tr>
                                         ))}
                                     </tbody>
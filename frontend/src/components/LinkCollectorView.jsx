@@ -48,6 +48,9 @@ const LinkCollectorView = ({ onBatchCrawl }) => {
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
             let buffer = '';
+            // Links arrive in batched `links` events; render once on `done`
+            const internalLinks = [];
+            const externalLinks = [];
 
             while (true) {
                 const { done, value } = await reader.read();
@@ -62,13 +65,18 @@ const LinkCollectorView = ({ onBatchCrawl }) => {
                     if (!dataLine) continue;
                     try {
                         const event = JSON.parse(dataLine.slice(6));
-                        if (event.type === 'log') {
+                        if (event.type === 'queued') {
+                            setLogs(prev => [...prev, `⏳ 대기 중: ${event.position}번째 (동시 실행 최대 ${event.max_running}개)`]);
+                        } else if (event.type === 'log') {
                             setLogs(prev => [...prev, event.message]);
+                        } else if (event.type === 'links') {
+                            internalLinks.push(...event.internal);
+                            externalLinks.push(...event.external);
                         } else if (event.type === 'done') {
                             setResult({
                                 success: true,
-                                internal_links: event.internal_links,
-                                external_links: event.external_links,
+                                internal_links: internalLinks,
+                                external_links: externalLinks,
                             });
                             setIsLoading(false);
                         } else if (event.type === 'error') {